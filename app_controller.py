@@ -2,6 +2,7 @@ from dataclasses import dataclass
 
 from app_dependencies import AppDependencies, build_default_dependencies
 from models.geracao_config import GeracaoConfig
+from services.exportador import Exportador
 
 
 @dataclass
@@ -9,8 +10,8 @@ class AppController:
     deps: AppDependencies
 
     @classmethod
-    def build_default(cls) -> "AppController":
-        return cls(deps=build_default_dependencies())
+    def build_default(cls, workers: int | None = None) -> "AppController":
+        return cls(deps=build_default_dependencies(workers=workers))
 
     @property
     def logger(self):
@@ -30,8 +31,8 @@ class AppController:
     def formatar_excecao(self, exc: Exception, contexto: str) -> str:
         return self.deps.service.formatar_excecao(exc, contexto)
 
-    def carregar_tabela(self, caminho):
-        return self.deps.carregar_arquivo_uc.execute(caminho)
+    def carregar_tabela(self, caminho, planilha: str | None = None):
+        return self.deps.carregar_arquivo_uc.execute(caminho, planilha)
 
     def obter_colunas(self, tabela):
         return self.deps.service.obter_colunas(tabela)
@@ -39,17 +40,60 @@ class AppController:
     def obter_valores_coluna(self, tabela, coluna):
         return self.deps.service.obter_valores_coluna(tabela, coluna)
 
+    def iterar_valores_texto(self, arquivo, coluna: str | None = None):
+        return self.deps.service.iterar_valores_texto(arquivo, coluna)
+
+    def validar_em_fluxo(self, valores, cfg: GeracaoConfig, total_estimado: int | None = None, histograma=None):
+        return self.deps.service.validar_em_fluxo(valores, cfg, total_estimado, histograma)
+
+    def obter_planilhas(self, tabela):
+        return self.deps.service.obter_planilhas(tabela)
+
     def validar_parametros_geracao(self, codigos, cfg: GeracaoConfig):
         return self.deps.service.validar_parametros_geracao(codigos, cfg)
 
+    def validar_coluna_detalhado(self, codigos, cfg: GeracaoConfig):
+        return self.deps.service.validar_coluna_detalhado(codigos, cfg)
+
     def sanitizar_nome_arquivo(self, nome: str, fallback: str) -> str:
         return self.deps.service.sanitizar_nome_arquivo(nome, fallback)
 
     def normalizar_dado(self, valor: str, cfg: GeracaoConfig) -> str:
         return self.deps.service.normalizar_dado(valor, cfg)
 
-    def gerar_imagem_obj(self, dado: str, cfg: GeracaoConfig):
-        return self.deps.service.gerar_imagem_obj(dado, cfg)
+    def gerar_imagem_obj(self, dado: str, cfg: GeracaoConfig, histograma=None):
+        return self.deps.service.gerar_imagem_obj(dado, cfg, histograma)
+
+    @property
+    def render_workers(self) -> int:
+        return self.deps.service.render_pool.workers
+
+    def desenhar_codigo_pdf(self, pdf, dado: str, cfg: GeracaoConfig, x: float, y: float, largura: float, altura: float):
+        return self.deps.service.desenhar_codigo_pdf(pdf, dado, cfg, x, y, largura, altura)
+
+    def chave_conteudo(self, dado: str, cfg: GeracaoConfig) -> str:
+        return self.deps.service.chave_conteudo(dado, cfg)
+
+    def estatisticas_cache(self) -> dict:
+        return self.deps.service.estatisticas_cache()
+
+    def codificar_imagem(self, imagem, cfg: GeracaoConfig | None = None) -> bytes:
+        return self.deps.service.codificar_imagem(imagem, cfg)
+
+    def codificar_svg(self, dado: str, cfg: GeracaoConfig) -> bytes:
+        return self.deps.service.codificar_svg(dado, cfg)
+
+    def aquecer_render_pool(self):
+        return self.deps.service.aquecer_render_pool()
+
+    def escolher_compressao_zip(self, nome_entrada: str) -> int:
+        return self.deps.service.escolher_compressao_zip(nome_entrada)
+
+    def renderizar_lote(self, dados, cfg: GeracaoConfig, cancelar_evento=None, histograma=None):
+        return self.deps.service.renderizar_lote(dados, cfg, cancelar_evento, histograma)
+
+    def criar_exportador(self, progresso=None, cancelar_evento=None) -> Exportador:
+        return Exportador(self.deps.service, self.logger, progresso, cancelar_evento)
 
     def extrair_codigos_preview(self, tabela, coluna: str, cfg: GeracaoConfig, max_itens: int):
         return self.deps.atualizar_preview_uc.extrair_codigos_preview(tabela, coluna, cfg, max_itens)
@@ -60,5 +104,20 @@ class AppController:
     def preparar_codigos(self, tabela, coluna: str, cfg: GeracaoConfig):
         return self.deps.gerar_codigos_uc.preparar_codigos(tabela, coluna, cfg)
 
+    def preparar_codigos_em_fluxo(self, tabela, coluna: str, cfg: GeracaoConfig, histograma=None):
+        return self.deps.gerar_codigos_uc.preparar_codigos_em_fluxo(tabela, coluna, cfg, histograma)
+
+    def excede_limite_lote(self, total: int | None, cfg: GeracaoConfig) -> bool:
+        return self.deps.service.excede_limite_lote(total, cfg)
+
+    def preparar_codigos_detalhado(self, tabela, coluna: str, cfg: GeracaoConfig):
+        return self.deps.gerar_codigos_uc.preparar_codigos_detalhado(tabela, coluna, cfg)
+
+    def obter_capacidades(self):
+        return self.deps.service.obter_capacidades()
+
+    def iniciar_job(self, cfg: GeracaoConfig) -> str:
+        return self.deps.service.iniciar_job(cfg)
+
     def obter_modelos_barcode(self):
         return self.deps.service.obter_modelos_barcode()
@@ -20,8 +20,8 @@ class AppDependencies:
     i18n: I18nService
 
 
-def build_default_dependencies() -> AppDependencies:
-    service = CodigoService()
+def build_default_dependencies(workers: int | None = None) -> AppDependencies:
+    service = CodigoService(workers=workers)
     return AppDependencies(
         logger=setup_logging(),
         service=service,
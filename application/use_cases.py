@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from itertools import islice
 
 from models.geracao_config import GeracaoConfig
 from services.codigo_service import CodigoService
@@ -10,8 +11,8 @@ from services.codigo_service import CodigoService
 class CarregarArquivoUseCase:
     service: CodigoService
 
-    def execute(self, caminho: str):
-        return self.service.carregar_tabela(caminho)
+    def execute(self, caminho: str, planilha: str | None = None):
+        return self.service.carregar_tabela(caminho, planilha)
 
 
 @dataclass(frozen=True)
@@ -19,18 +20,37 @@ class GerarCodigosUseCase:
     service: CodigoService
 
     def preparar_codigos(self, tabela, coluna: str, cfg: GeracaoConfig):
+        relatorio = self.preparar_codigos_detalhado(tabela, coluna, cfg)
+        return relatorio.validos, relatorio.invalidos
+
+    def preparar_codigos_em_fluxo(self, tabela, coluna: str, cfg: GeracaoConfig, histograma=None):
+        """Iterável preguiçoso dos códigos válidos, lido e validado em blocos durante a geração."""
+        valores = self.service.iterar_valores_coluna(tabela, coluna)
+        return self.service.validar_em_fluxo(valores, cfg, self.service.estimar_total_linhas(tabela), histograma)
+
+    def preparar_codigos_detalhado(self, tabela, coluna: str, cfg: GeracaoConfig):
         codigos = self.service.obter_valores_coluna(tabela, coluna)
-        return self.service.validar_parametros_geracao(codigos, cfg)
+        return self.service.validar_coluna_detalhado(codigos, cfg)
 
 
 @dataclass(frozen=True)
 class AtualizarPreviewUseCase:
     service: CodigoService
 
+    TAMANHO_BLOCO_PREVIEW = 256
+
     def extrair_codigos_preview(self, tabela, coluna: str, cfg: GeracaoConfig, max_itens: int):
-        codigos = self.service.obter_valores_coluna(tabela, coluna)
-        validos, _invalidos = self.service.validar_parametros_geracao(codigos, cfg)
-        return validos[: max(0, int(max_itens))]
+        """Lê a coluna em blocos e para assim que houver itens válidos suficientes para a página."""
+        max_itens = max(0, int(max_itens))
+        valores = self.service.iterar_valores_coluna(tabela, coluna)
+        validos = []
+        while len(validos) < max_itens:
+            bloco = list(islice(valores, self.TAMANHO_BLOCO_PREVIEW))
+            if not bloco:
+                break
+            self.service.validar_config_geracao(len(bloco), cfg)
+            validos.extend(self.service.validar_bloco(bloco, cfg).validos)
+        return validos[:max_itens]
 
     def gerar_amostra(self, cfg: GeracaoConfig) -> str:
         if cfg.tipo_codigo == "barcode":
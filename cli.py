@@ -0,0 +1,257 @@
+"""Geração em lote sem interface gráfica (não importa o Tk).
+
+Exemplos::
+
+    python cli.py dados.csv --coluna codigo --formato zip --saida codigos.zip --workers 4
+    cat codigos.txt | python cli.py - --formato png --saida ./saida
+    python cli.py - --coluna sku --tipo barcode --modelo ean13 --saida etiquetas.pdf -f pdf < itens.csv
+
+O progresso sai na saída padrão como JSON lines (eventos ``start``, ``progress``,
+``done`` e ``error``), pronto para ser consumido por scripts e agendadores.
+"""
+
+import argparse
+import json
+import multiprocessing
+import signal
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import asdict
+
+from app_controller import AppController
+from models.geracao_config import GeracaoConfig
+from services.codificacao_imagem import NIVEL_COMPRESSAO_PADRAO, PERFIL_PADRAO, PERFIS_CODIFICACAO
+from services.exportador import FORMATOS_EXPORTACAO, FORMATOS_RETOMAVEIS, OperacaoCancelada
+from services.histograma_etapas import HistogramaEtapas
+from services.job_run_store import LedgerItens
+from services.perfilador import CapturaPerfil, ModoPerfil, modo_perfil_do_ambiente
+
+SAIDA_OK = 0
+SAIDA_ERRO = 1
+SAIDA_VALIDACAO = 2
+SAIDA_CANCELADO = 130
+
+TAMANHOS_PADRAO_CM = {"qrcode": (4.0, 4.0), "barcode": (8.0, 3.0)}
+
+
+class ProgressoJsonLinhas:
+    """Escreve eventos como JSON lines; avisos de progresso são limitados a um por ``intervalo_min_s``."""
+
+    def __init__(self, saida, intervalo_min_s: float = 0.5):
+        self.saida = saida
+        self.intervalo_min_s = max(0.0, float(intervalo_min_s))
+        self.atual = 0
+        self._ultimo_ts = float("-inf")
+
+    def emitir(self, evento: str, **campos):
+        self.saida.write(json.dumps({"event": evento, **campos}, ensure_ascii=False) + "\n")
+        self.saida.flush()
+
+    def publicar(self, atual: int, total: int, codigo: str = ""):
+        self.atual = atual
+        agora = time.monotonic()
+        if agora - self._ultimo_ts < self.intervalo_min_s:
+            return
+        self._ultimo_ts = agora
+        self.emitir("progress", current=atual, total=total, code=str(codigo))
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="qrgen",
+        description="Gera QR Codes e códigos de barras em lote, sem interface gráfica.",
+    )
+    parser.add_argument("entrada", help="CSV/XLSX/Parquet/Arrow, ou '-' para ler da entrada padrão")
+    parser.add_argument("-c", "--coluna", help="coluna com os dados (na entrada padrão, sem coluna cada linha é um valor)")
+    parser.add_argument("--planilha", help="aba do XLSX (padrão: a primeira)")
+    parser.add_argument("-f", "--formato", choices=FORMATOS_EXPORTACAO, default="png")
+    parser.add_argument("-o", "--saida", required=True, help="pasta (png/svg/svgz/svg_folhas) ou arquivo (zip/pdf) de destino")
+    parser.add_argument("--tipo", choices=("qrcode", "barcode"), default="qrcode")
+    parser.add_argument("--modelo", default="code128", help="modelo do código de barras (ex.: code128, ean13)")
+    parser.add_argument("--modo", choices=("texto", "numerico"), default="texto")
+    parser.add_argument("--prefixo", default="")
+    parser.add_argument("--sufixo", default="")
+    parser.add_argument("--largura-cm", type=float)
+    parser.add_argument("--altura-cm", type=float)
+    parser.add_argument("--cor", default="black")
+    parser.add_argument("--fundo", default="white")
+    parser.add_argument("--sem-proporcao", action="store_true", help="estica o código para o tamanho pedido")
+    parser.add_argument("--pdf-vetorial", action="store_true")
+    parser.add_argument(
+        "--codificacao",
+        choices=tuple(PERFIS_CODIFICACAO),
+        default=PERFIL_PADRAO,
+        help="perfil das imagens: png (RGB), png_paleta (2 cores, 1 bit), png_1bit (1 bit; preto e branco nativo quando possível) ou webp (sem perdas)",
+    )
+    parser.add_argument(
+        "--nivel-compressao",
+        type=int,
+        choices=range(10),
+        default=NIVEL_COMPRESSAO_PADRAO,
+        metavar="0-9",
+        help="nível zlib do PNG / esforço do WebP (mais alto: menos bytes, mais CPU)",
+    )
+    parser.add_argument("--max-tamanho-dado", type=int, default=512)
+    parser.add_argument("--max-codigos-por-lote", type=int, default=5000)
+    parser.add_argument("-w", "--workers", type=int, help="processos de renderização (padrão: QRGEN_WORKERS ou um por núcleo)")
+    parser.add_argument("--intervalo-progresso", type=float, default=0.5, help="segundos mínimos entre eventos de progresso")
+    parser.add_argument("--perfil", choices=("cpu", "mem"), help="captura cProfile (e tracemalloc com 'mem') do job")
+    return parser
+
+
+def montar_config(args) -> GeracaoConfig:
+    largura_padrao, altura_padrao = TAMANHOS_PADRAO_CM[args.tipo]
+    largura = args.largura_cm if args.largura_cm is not None else largura_padrao
+    altura = args.altura_cm if args.altura_cm is not None else altura_padrao
+    qr = (largura, altura) if args.tipo == "qrcode" else TAMANHOS_PADRAO_CM["qrcode"]
+    barras = (largura, altura) if args.tipo == "barcode" else TAMANHOS_PADRAO_CM["barcode"]
+    return GeracaoConfig(
+        qr_width_cm=qr[0],
+        qr_height_cm=qr[1],
+        barcode_width_cm=barras[0],
+        barcode_height_cm=barras[1],
+        keep_qr_ratio=not args.sem_proporcao,
+        keep_barcode_ratio=not args.sem_proporcao,
+        foreground=args.cor,
+        background=args.fundo,
+        tipo_codigo=args.tipo,
+        barcode_model=args.modelo,
+        modo=args.modo,
+        prefixo=args.prefixo,
+        sufixo=args.sufixo,
+        max_codigos_por_lote=args.max_codigos_por_lote,
+        max_tamanho_dado=args.max_tamanho_dado,
+        pdf_vetorial=args.pdf_vetorial,
+        perfil_codificacao=args.codificacao,
+        nivel_compressao=args.nivel_compressao,
+    )
+
+
+def _preparar_codigos(controller: AppController, args, cfg: GeracaoConfig, entrada_padrao, histograma):
+    if args.entrada == "-":
+        valores = controller.iterar_valores_texto(entrada_padrao, args.coluna)
+        return controller.validar_em_fluxo(valores, cfg, histograma=histograma)
+    if not args.coluna:
+        raise ValueError("Informe --coluna para ler de um arquivo.")
+    tabela = controller.carregar_tabela(args.entrada, args.planilha)
+    if args.coluna not in controller.obter_colunas(tabela):
+        raise ValueError(f"Coluna '{args.coluna}' não encontrada em {args.entrada}.")
+    return controller.preparar_codigos_em_fluxo(tabela, args.coluna, cfg, histograma)
+
+
+def _modo_perfil(args) -> ModoPerfil | None:
+    if args.perfil:
+        return ModoPerfil(memoria=args.perfil == "mem")
+    return modo_perfil_do_ambiente()
+
+
+def executar(args, controller: AppController, entrada_padrao, saida, cancelar_evento: threading.Event) -> int:
+    progresso = ProgressoJsonLinhas(saida, args.intervalo_progresso)
+    histograma = HistogramaEtapas()
+    try:
+        cfg = montar_config(args)
+        codigos = _preparar_codigos(controller, args, cfg, entrada_padrao, histograma)
+        if not codigos.tem_validos():
+            raise ValueError("Todos os dados foram rejeitados pela validação de entrada.")
+    except (ValueError, RuntimeError) as exc:
+        progresso.emitir("error", message=str(exc))
+        return SAIDA_VALIDACAO
+
+    total_estimado = int(codigos.total_estimado or 0)
+    parametros = None
+    if args.entrada != "-":
+        # Só entradas em arquivo podem ser relidas numa retomada.
+        parametros = {"arquivo_fonte": args.entrada, "planilha": args.planilha, "coluna": args.coluna, "cfg": asdict(cfg)}
+    job_id = controller.job_store.create_run(
+        formato=args.formato,
+        tipo_codigo=cfg.tipo_codigo,
+        modo=cfg.modo,
+        destino=args.saida,
+        total_entradas=total_estimado,
+        total_invalidos=0,
+        parametros=parametros,
+    )
+    exportador = controller.criar_exportador(progresso, cancelar_evento)
+    ledger = LedgerItens(controller.job_store, job_id) if args.formato in FORMATOS_RETOMAVEIS else None
+    modo_perfil = _modo_perfil(args)
+    captura = CapturaPerfil(job_id, modo_perfil) if modo_perfil else nullcontext()
+    if modo_perfil:
+        exportador.render_paralelo = False
+
+    progresso.emitir(
+        "start",
+        job_id=job_id,
+        format=args.formato,
+        output=args.saida,
+        estimated_total=total_estimado,
+        workers=1 if modo_perfil else controller.render_workers,
+    )
+    controller.logger.info(
+        "Iniciando geração (CLI)",
+        extra={"event": "generate_start", "operation": args.formato, "path": args.saida, "total": total_estimado},
+    )
+    inicio = time.perf_counter()
+    status, erro, codigo_saida = "completed", "", SAIDA_OK
+    backend = ""
+    try:
+        with captura:
+            backend = controller.iniciar_job(cfg)
+            exportador.exportar(codigos, args.formato, args.saida, cfg, ledger=ledger, histograma=histograma)
+    except OperacaoCancelada as exc:
+        status, erro, codigo_saida = "cancelled", str(exc), SAIDA_CANCELADO
+    except Exception as exc:
+        controller.logger.exception(
+            "Falha na geração (CLI)", extra={"event": "generate_error", "operation": args.formato, "path": args.saida, "erro": str(exc)}
+        )
+        status, erro, codigo_saida = "error", str(exc), SAIDA_ERRO
+    duracao = time.perf_counter() - inicio
+
+    controller.job_store.finish_run(job_id, status=status, erro=erro, processado=progresso.atual, total_invalidos=codigos.invalidos)
+    if modo_perfil:
+        controller.job_store.record_profile(job_id, captura.caminho_prof, captura.caminho_resumo)
+    controller.metrics_store.record_run(
+        formato=args.formato,
+        status=status,
+        total_entradas=codigos.lidos,
+        total_invalidos=codigos.invalidos,
+        total_processado=progresso.atual,
+        duracao_s=duracao,
+        erro=erro,
+        histograma=histograma,
+        backend=backend,
+    )
+    if status == "error":
+        progresso.emitir("error", message=erro, job_id=job_id)
+    progresso.emitir(
+        "done",
+        status=status,
+        job_id=job_id,
+        processed=progresso.atual,
+        invalid=codigos.invalidos,
+        rejected=codigos.resumo(),
+        duration_s=round(duracao, 3),
+        output=args.saida,
+    )
+    return codigo_saida
+
+
+def main(argv=None, entrada_padrao=None, saida=None, controller: AppController | None = None) -> int:
+    args = criar_parser().parse_args(argv)
+    controller = controller or AppController.build_default(workers=args.workers)
+    cancelar_evento = threading.Event()
+    anterior = None
+    if threading.current_thread() is threading.main_thread():
+        # Ctrl+C cancela entre itens e deixa o job registrado (e retomável) em vez de abortar no meio de uma escrita.
+        anterior = signal.signal(signal.SIGINT, lambda *_: cancelar_evento.set())
+    try:
+        return executar(args, controller, entrada_padrao or sys.stdin, saida or sys.stdout, cancelar_evento)
+    finally:
+        if anterior is not None:
+            signal.signal(signal.SIGINT, anterior)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
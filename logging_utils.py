@@ -14,7 +14,7 @@ class JsonFormatter(logging.Formatter):
             "msg": record.getMessage(),
         }
         # Campos estruturados opcionais
-        for key in ("event", "operation", "path", "formato", "total", "codigo", "erro"):
+        for key in ("event", "operation", "path", "formato", "total", "codigo", "erro", "duracao_s"):
             if hasattr(record, key):
                 payload[key] = getattr(record, key)
         if record.exc_info:
@@ -18,3 +18,28 @@ class GeracaoConfig:
     sufixo: str
     max_codigos_por_lote: int = 5000
     max_tamanho_dado: int = 512
+    pdf_vetorial: bool = False
+    # Só mudam os bytes gravados (ver services.codificacao_imagem), não a imagem renderizada.
+    perfil_codificacao: str = "png"
+    nivel_compressao: int = 6
+
+    def campos_render(self) -> tuple:
+        """Campos que alteram a imagem gerada (usados como chave de cache)."""
+        if self.tipo_codigo == "barcode":
+            return (
+                "barcode",
+                self.barcode_model,
+                self.barcode_width_cm,
+                self.barcode_height_cm,
+                self.keep_barcode_ratio,
+                self.foreground,
+                self.background,
+            )
+        return (
+            "qrcode",
+            self.qr_width_cm,
+            self.qr_height_cm,
+            self.keep_qr_ratio,
+            self.foreground,
+            self.background,
+        )
@@ -1,6 +1,8 @@
-import io
+from __future__ import annotations
+
 import json
 import logging
+import multiprocessing
 import os
 import queue
 import shutil
@@ -10,35 +12,25 @@ import tempfile
 import threading
 import time
 import traceback
-import zipfile
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, replace
 from enum import Enum, auto
+from typing import TYPE_CHECKING
 
-import qrcode
-from PIL import Image, ImageDraw, ImageTk
-from qrcode.image.svg import SvgImage
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
 from app_controller import AppController
 from models.geracao_config import GeracaoConfig
+from services.canal_ui import CanalProgresso, FilaNotificadora
+from services.codificacao_imagem import NIVEL_COMPRESSAO_PADRAO, PERFIL_PADRAO, PERFIS_CODIFICACAO, validar_nivel_compressao
+from services.exportador import A4, FORMATOS_RETOMAVEIS, OperacaoCancelada, estimar_total, mm
+from services.histograma_etapas import HistogramaEtapas
+from services.job_run_store import LedgerItens
+from services.perfilador import DIRETORIO_PERFIS, CapturaPerfil, ModoPerfil, modo_perfil_do_ambiente
+from services.preview_composer import LayoutPreview, PreviewComposer
 
-# Equivalentes do ReportLab para evitar dependência em tempo de import.
-MM_TO_POINTS = 72 / 25.4
-mm = MM_TO_POINTS
-A4 = (210 * mm, 297 * mm)
-
-
-def _obter_modulos_pdf_reportlab():
-    try:
-        from reportlab.lib.utils import ImageReader
-        from reportlab.pdfgen import canvas as pdf_canvas
-        return pdf_canvas, ImageReader
-    except ImportError as exc:
-        raise RuntimeError(
-            "Exportação PDF requer a dependência opcional 'reportlab'. "
-            "Instale com: pip install reportlab"
-        ) from exc
+if TYPE_CHECKING:
+    from PIL import Image
 
 
 @dataclass
@@ -57,8 +49,8 @@ class InterfaceSections:
     resultado_frame: ttk.LabelFrame | None = None
 
 
-class OperacaoCancelada(Exception):
-    """Sinaliza cancelamento de operação longa."""
+class _PreviewObsoleto(Exception):
+    """Interrompe uma renderização de preview superada por um pedido mais recente."""
 
 
 class EstadoAplicacao(Enum):
@@ -73,12 +65,26 @@ class EstadoAplicacao(Enum):
 class QRCodeGenerator:
     """Aplicativo desktop para geração de QR Codes e códigos de barras."""
 
-    def __init__(self, root: tk.Tk, controller: AppController | None = None):
+    EVENTO_FILA = "<<QRGenFila>>"
+    FORMATOS_RETOMAVEIS = FORMATOS_RETOMAVEIS
+
+    def __init__(self, root: tk.Tk, controller: AppController | None = None, inicio_ts: float | None = None):
+        # Referência do tempo até a janela ficar interativa; o ponto de entrada
+        # passa o instante em que começou, antes de criar o Tk.
+        self._inicio_ts = inicio_ts if inicio_ts is not None else time.perf_counter()
         self.root = root
         self.root.title("")
         self.root.geometry("980x680")
 
-        self.fila = queue.Queue()
+        # Worker -> UI: mensagens discretas pela fila limitada e progresso coalescido pelo
+        # canal. Com Tcl compilado com threads ambos acordam o loop do Tk por evento e o
+        # polling lento é só rede de segurança; sem threads, o polling rápido é o caminho.
+        self._tcl_com_threads = self._detectar_tcl_com_threads()
+        self.fila = FilaNotificadora(self._acordar_ui, substituiveis={"preview_pronto": "preview", "preview_erro": "preview"})
+        self.canal_progresso = CanalProgresso(self._acordar_ui)
+        self.intervalo_fallback_fila_ms = 500 if self._tcl_com_threads else 50
+        self.intervalo_job_progresso_s = 1.0
+        self._ultimo_job_progresso_ts = 0.0
         self.controller = controller or AppController.build_default()
         self.logger = self.controller.logger
         self.job_store = self.controller.job_store
@@ -89,10 +95,19 @@ class QRCodeGenerator:
         self._preview_backend_error_shown = False
         self._preview_after_id = None
         self.preview_debounce_ms = 250
-        self.pdf_export_disponivel = False
-        self.barcode_disponivel = False
+        self.preview_composer = PreviewComposer()
+        self._preview_geracao = 0
+        self._preview_pedidos = queue.Queue()
+        self._preview_worker = None
+        self._preview_duracao_media_ms = None
+        # Otimista até a sondagem em segundo plano responder (ver _executar_aquecimento).
+        self.pdf_export_disponivel = True
+        self.barcode_disponivel = True
         self.motivos_dependencias_indisponiveis = []
+        self.dependencias_verificadas = False
+        self.tempo_ate_interativo_s = None
         self.cancelar_evento = threading.Event()
+        self.exportador = self.controller.criar_exportador(self.canal_progresso, self.cancelar_evento)
         self.sections = InterfaceSections()
 
         self.qr_width_cm = tk.StringVar(value="4.0")
@@ -107,6 +122,10 @@ class QRCodeGenerator:
         self.formato_saida = tk.StringVar(value="pdf")
         self.tipo_codigo = tk.StringVar(value="qrcode")
         self.barcode_model = tk.StringVar(value="code128")
+        self.pdf_vetorial = tk.BooleanVar(value=False)
+        self.perfil_codificacao = tk.StringVar(value=PERFIL_PADRAO)
+        self.nivel_compressao = tk.IntVar(value=NIVEL_COMPRESSAO_PADRAO)
+        self.perfilar_execucao = tk.BooleanVar(value=False)
         self.preview_zoom = tk.StringVar(value="100%")
         self.preview_preset = tk.StringVar(value="A4")
         self.preview_margin_cm = tk.StringVar(value="2.0")
@@ -120,12 +139,16 @@ class QRCodeGenerator:
         self.max_codigos_por_lote = 5000
         self.max_tamanho_dado = 512
         self.max_itens_preview_pagina = 24
+        self.diretorio_perfis = DIRETORIO_PERFIS
         self._inicio_geracao_ts = None
         self._job_id_atual = ""
         self._formato_execucao_atual = ""
         self._total_planejado = 0
         self._processados_atuais = 0
         self._invalidos_ultima_geracao = 0
+        self._fluxo_validacao = None
+        self._histograma_execucao = None
+        self._backend_execucao = ""
         self._ultimo_destino_saida = ""
         self._arquivos_temporarios_impressao = []
         self.space_sm = 8
@@ -135,15 +158,16 @@ class QRCodeGenerator:
         self.estado_atual = EstadoAplicacao.IDLE
 
         self._configurar_estilos()
-        self._verificar_dependencias_essenciais()
         self.root.title(self._t("app.title", "QR / Código de Barras Generator"))
         self.barcode_model_options = self.controller.obter_modelos_barcode()
         self.barcode_label_to_key = {rotulo: chave for chave, rotulo in self.barcode_model_options}
         self.barcode_key_to_label = {chave: rotulo for chave, rotulo in self.barcode_model_options}
         self._criar_interface()
-        self.atualizar_preview()
         self._aplicar_estado_ui()
-        self.root.after(100, self.verificar_fila)
+        self.root.bind(self.EVENTO_FILA, self._ao_evento_fila)
+        self.root.after(self.intervalo_fallback_fila_ms, self.verificar_fila)
+        # Preview e sondagem de dependências só depois que a janela aparece.
+        self.root.after_idle(self._ao_janela_pronta)
 
     def _t(self, key: str, default: str = "", **kwargs) -> str:
         return self.controller.t(key, default, **kwargs)
@@ -206,43 +230,57 @@ class QRCodeGenerator:
             background=[("!disabled", "#2563eb")],
         )
 
-    def _verificar_dependencias_essenciais(self):
-        self.motivos_dependencias_indisponiveis = []
+    def _ao_janela_pronta(self):
+        """Primeiro ciclo ocioso do Tk: mede o tempo até a janela ficar interativa e dispara o aquecimento."""
+        self.root.update_idletasks()
+        self.tempo_ate_interativo_s = time.perf_counter() - self._inicio_ts
+        self.logger.info(
+            "Janela interativa",
+            extra={"event": "startup_ready", "duracao_s": round(self.tempo_ate_interativo_s, 3)},
+        )
+        self.atualizar_preview()
+        threading.Thread(target=self._executar_aquecimento, daemon=True).start()
 
-        try:
-            from reportlab.pdfgen import canvas as _pdf_canvas  # noqa: F401
+    def _executar_aquecimento(self):
+        inicio = time.perf_counter()
+        resultado = self._sondar_dependencias()
+        self.fila.put({"tipo": "dependencias_verificadas", **resultado, "duracao_s": time.perf_counter() - inicio})
 
-            self.pdf_export_disponivel = True
-        except Exception:
-            self.pdf_export_disponivel = False
-            self.motivos_dependencias_indisponiveis.append("PDF/Impressão indisponível (faltando reportlab).")
-
-        cfg_teste_barcode = GeracaoConfig(
-            qr_width_cm=4.0,
-            qr_height_cm=4.0,
-            barcode_width_cm=8.0,
-            barcode_height_cm=3.0,
-            keep_qr_ratio=True,
-            keep_barcode_ratio=True,
-            foreground="black",
-            background="white",
-            tipo_codigo="barcode",
-            barcode_model="code128",
-            modo="texto",
-            prefixo="",
-            sufixo="",
-            max_codigos_por_lote=self.max_codigos_por_lote,
-            max_tamanho_dado=self.max_tamanho_dado,
-        )
+    def _sondar_dependencias(self) -> dict:
+        """Capacidades do ambiente (cache em disco; sonda só na primeira vez) — roda fora da thread do Tk."""
+        motivos = []
         try:
-            amostra = self.controller.gerar_amostra_preview(cfg_teste_barcode)
-            _img = self.controller.gerar_imagem_obj(amostra, cfg_teste_barcode)
-            self.barcode_disponivel = True
-        except Exception:
-            self.barcode_disponivel = False
-            self.motivos_dependencias_indisponiveis.append(
-                "Código de barras indisponível (nenhum backend funcional detectado)."
-            )
+            capacidades = self.controller.obter_capacidades()
+            pdf, modelos = capacidades.pdf, capacidades.modelos_disponiveis()
+        except Exception as exc:
+            self.logger.warning("Falha ao sondar capacidades", extra={"event": "capabilities_error", "erro": str(exc)})
+            pdf, modelos = False, []
+        if not pdf:
+            motivos.append("PDF/Impressão indisponível (faltando reportlab).")
+        if not modelos:
+            motivos.append("Código de barras indisponível (nenhum backend funcional detectado).")
+        return {"pdf": pdf, "barcode": bool(modelos), "modelos_barcode": modelos, "motivos": motivos}
+
+    def _aplicar_dependencias_verificadas(self, msg: dict):
+        self.pdf_export_disponivel = msg["pdf"]
+        self.barcode_disponivel = msg["barcode"]
+        self.motivos_dependencias_indisponiveis = list(msg["motivos"])
+        self.dependencias_verificadas = True
+        if msg["modelos_barcode"]:
+            # Modelos sem backend funcional saem da lista em vez de falhar item a item.
+            self.barcode_model_options = [(chave, rotulo) for chave, rotulo in self.barcode_model_options if chave in msg["modelos_barcode"]]
+            self.barcode_model_combo.configure(values=[rotulo for _chave, rotulo in self.barcode_model_options])
+            if self.barcode_model.get() not in msg["modelos_barcode"]:
+                self.barcode_model.set(self.barcode_model_options[0][0])
+                self.barcode_model_combo.set(self.barcode_model_options[0][1])
+        self.dependency_status_var.set(" | ".join(self.motivos_dependencias_indisponiveis) or "Todos os recursos disponíveis.")
+        self._atualizar_controles_tipo_codigo()
+        self._aplicar_disponibilidade_dependencias()
+        self._aplicar_estado_ui()
+        self.logger.info(
+            "Dependências verificadas",
+            extra={"event": "startup_warm", "duracao_s": round(msg.get("duracao_s", 0.0), 3), "erro": "; ".join(msg["motivos"])},
+        )
 
     def _criar_interface(self):
         conteudo = ttk.Frame(self.root, padding=self.space_md)
@@ -269,6 +307,11 @@ class QRCodeGenerator:
         self.column_combo.grid(row=0, column=2, padx=self.space_sm, pady=self.space_sm, sticky="w")
         self.column_combo.bind("<<ComboboxSelected>>", self._ao_selecionar_coluna)
 
+        ttk.Label(self.dados_frame, text=self._t("label.sheet", "Aba:")).grid(row=0, column=3, padx=(self.space_md, self.space_sm), pady=self.space_sm, sticky="e")
+        self.sheet_combo = ttk.Combobox(self.dados_frame, state="disabled", width=20, style="App.TCombobox")
+        self.sheet_combo.grid(row=0, column=4, padx=self.space_sm, pady=self.space_sm, sticky="w")
+        self.sheet_combo.bind("<<ComboboxSelected>>", self._ao_selecionar_planilha)
+
         self.config_frame = ttk.LabelFrame(conteudo, text=self._t("section.config", "2) Configuração"), padding=self.space_md)
         self.config_frame.pack(fill="x", pady=(0, self.space_sm))
         self.sections.config_frame = self.config_frame
@@ -279,16 +322,31 @@ class QRCodeGenerator:
             style="App.TCombobox",
             textvariable=self.formato_saida,
             state="readonly",
-            width=8,
-            values=["pdf", "png", "zip", "svg"],
+            width=10,
+            values=["pdf", "png", "zip", "svg", "svgz", "svg_folhas"],
         )
         self.formato_combo.grid(row=0, column=1, padx=self.space_sm, pady=self.space_sm, sticky="w")
         self.formato_combo.set(self.formato_saida.get())
         self.formato_combo.bind("<<ComboboxSelected>>", self._ao_alterar_formato_saida)
-        ttk.Label(self.config_frame, text=self._t("hint.svg_only_qr", "(SVG apenas para QR)"), style="SectionHint.TLabel").grid(row=0, column=2, padx=(0, self.space_sm), sticky="w")
-        formatos_disponiveis = ["png", "zip", "svg"]
-        if self.pdf_export_disponivel:
-            formatos_disponiveis = ["pdf", "png", "zip", "svg", "imprimir"]
+        self.pdf_vetorial_check = ttk.Checkbutton(
+            self.config_frame,
+            text=self._t("label.pdf_vector", "PDF vetorial"),
+            variable=self.pdf_vetorial,
+        )
+        self.pdf_vetorial_check.grid(row=0, column=3, padx=5, pady=self.space_sm, sticky="w")
+        ttk.Label(self.config_frame, text=self._t("label.image_encoding", "Codificação")).grid(row=0, column=4, sticky="e", padx=(self.space_md, self.space_sm), pady=self.space_sm)
+        self.codificacao_combo = ttk.Combobox(
+            self.config_frame,
+            style="App.TCombobox",
+            textvariable=self.perfil_codificacao,
+            state="readonly",
+            width=11,
+            values=list(PERFIS_CODIFICACAO),
+        )
+        self.codificacao_combo.grid(row=0, column=5, padx=self.space_sm, pady=self.space_sm, sticky="w")
+        ttk.Label(self.config_frame, text=self._t("label.compression_level", "Compressão (0-9)")).grid(row=0, column=6, sticky="e", padx=(self.space_md, self.space_sm), pady=self.space_sm)
+        ttk.Spinbox(self.config_frame, from_=0, to=9, increment=1, textvariable=self.nivel_compressao, width=3, style="App.TSpinbox").grid(row=0, column=7, padx=self.space_sm, pady=self.space_sm, sticky="w")
+        formatos_disponiveis = self._obter_formatos_saida_disponiveis()
         self.formato_combo.configure(values=formatos_disponiveis)
         if self.formato_saida.get() not in formatos_disponiveis:
             self.formato_saida.set("png")
@@ -340,10 +398,7 @@ class QRCodeGenerator:
         self.barcode_model_combo.grid(row=3, column=4, padx=(2, 5), pady=5, sticky="w")
         self.barcode_model_combo.set(self.barcode_key_to_label.get(self.barcode_model.get(), "Código 128"))
         self.barcode_model_combo.bind("<<ComboboxSelected>>", self._ao_alterar_modelo_barcode)
-        aviso_dependencias = "Todos os recursos disponíveis."
-        if self.motivos_dependencias_indisponiveis:
-            aviso_dependencias = " | ".join(self.motivos_dependencias_indisponiveis)
-        self.dependency_status_var = tk.StringVar(value=aviso_dependencias)
+        self.dependency_status_var = tk.StringVar(value="Verificando recursos opcionais…")
         ttk.Label(self.config_frame, textvariable=self.dependency_status_var, style="Muted.TLabel").grid(
             row=7, column=0, columnspan=5, sticky="w", padx=5, pady=(2, 0)
         )
@@ -449,7 +504,22 @@ class QRCodeGenerator:
             style="Secondary.TButton",
             command=self.cancelar_operacao,
         )
-        self.cancel_button.pack(side="left")
+        self.cancel_button.pack(side="left", padx=(0, self.space_sm))
+
+        self.resume_button = ttk.Button(
+            botoes_frame,
+            text=self._t("button.resume_job", "Retomar job interrompido"),
+            style="Secondary.TButton",
+            command=self.retomar_ultimo_job,
+        )
+        self.resume_button.pack(side="left", padx=(0, self.space_sm))
+
+        self.profile_check = ttk.Checkbutton(
+            botoes_frame,
+            text=self._t("label.profile_run", "Perfilar execução"),
+            variable=self.perfilar_execucao,
+        )
+        self.profile_check.pack(side="left")
 
         self.status_resumo_var = tk.StringVar(value=self._t("status.ready", "Pronto para iniciar. Selecione um arquivo para continuar."))
         ttk.Label(self.acao_status_frame, textvariable=self.status_resumo_var).pack(anchor="w")
@@ -612,18 +682,24 @@ class QRCodeGenerator:
         self.solicitar_atualizacao_preview()
         self._atualizar_stepper_visual()
 
+    def _ao_selecionar_planilha(self, _e=None):
+        planilha = self.sheet_combo.get()
+        if not self.arquivo_fonte or not planilha or planilha == getattr(self.df, "planilha", None):
+            return
+        if self.estado_atual in {EstadoAplicacao.LOADING, EstadoAplicacao.GENERATING, EstadoAplicacao.CANCELLING}:
+            return
+        self._iniciar_carregamento(self.arquivo_fonte, planilha)
+
     def _ao_alterar_formato_saida(self, _e=None):
         formatos_disponiveis = set(self._obter_formatos_saida_disponiveis())
         if self.formato_saida.get() not in formatos_disponiveis:
             self.formato_saida.set("png")
             self.formato_combo.set("png")
-        self._ajustar_formato_incompativel(exibir_aviso=True)
         self._atualizar_controles_impressao()
         self._aplicar_estado_ui()
 
     def _ao_alterar_tipo_codigo(self):
         self._atualizar_controles_tipo_codigo()
-        self._ajustar_formato_incompativel(exibir_aviso=True)
         self.solicitar_atualizacao_preview()
 
     def _ao_alterar_modelo_barcode(self, _e=None):
@@ -657,28 +733,11 @@ class QRCodeGenerator:
             self.formato_combo.set("png")
 
     def _obter_formatos_saida_disponiveis(self):
-        formatos = ["png", "zip", "svg"]
+        formatos = ["png", "zip", "svg", "svgz", "svg_folhas"]
         if self.pdf_export_disponivel:
-            formatos = ["pdf", "png", "zip", "svg", "imprimir"]
-        if self.tipo_codigo.get() == "barcode":
-            formatos = [f for f in formatos if f != "svg"]
+            formatos = ["pdf", *formatos, "imprimir"]
         return formatos
 
-    def _ajustar_formato_incompativel(self, exibir_aviso: bool = False):
-        formatos_disponiveis = self._obter_formatos_saida_disponiveis()
-        self.formato_combo.configure(values=formatos_disponiveis)
-        if self.formato_saida.get() == "svg" and self.tipo_codigo.get() == "barcode":
-            self.formato_saida.set("png")
-            self.formato_combo.set("png")
-            if exibir_aviso:
-                messagebox.showwarning(
-                    self._t("dialog.title.invalid_format", "Formato incompatível"),
-                    self._t(
-                        "validation.svg_not_supported_for_barcode",
-                        "SVG não é suportado para código de barras. Formato ajustado para PNG.",
-                    ),
-                )
-
     def _listar_impressoras_windows(self):
         if not sys.platform.startswith("win"):
             return [], ""
@@ -803,7 +862,7 @@ class QRCodeGenerator:
         if job_id is not None:
             self.resumo_job_var.set(f"Job ID: {job_id if job_id else '-'}")
 
-    def _registrar_job(self, *, formato: str, destino: str, total_validos: int, invalidos: int):
+    def _registrar_job(self, *, formato: str, destino: str, total_validos: int, invalidos: int, parametros: dict | None = None):
         try:
             self._job_id_atual = self.job_store.create_run(
                 formato=formato,
@@ -812,12 +871,22 @@ class QRCodeGenerator:
                 destino=destino,
                 total_entradas=max(0, int(total_validos) + int(invalidos)),
                 total_invalidos=int(invalidos),
+                parametros=parametros,
             )
             self._atualizar_resumo_painel(job_id=self._job_id_atual)
         except Exception as exc:
             self._job_id_atual = ""
             self.logger.exception("Falha ao registrar job", extra={"event": "job_create_error", "erro": str(exc)})
 
+    def _reabrir_job(self, job_id: str):
+        try:
+            self.job_store.reopen_run(job_id)
+            self._job_id_atual = job_id
+            self._atualizar_resumo_painel(job_id=job_id)
+        except Exception as exc:
+            self._job_id_atual = ""
+            self.logger.exception("Falha ao reabrir job", extra={"event": "job_resume_error", "erro": str(exc)})
+
     def _atualizar_job_progresso(self, processado: int):
         if not self._job_id_atual:
             return
@@ -826,11 +895,25 @@ class QRCodeGenerator:
         except Exception as exc:
             self.logger.exception("Falha ao atualizar progresso do job", extra={"event": "job_progress_error", "erro": str(exc), "total": processado})
 
+    def _consolidar_fluxo_validacao(self):
+        """Ao fim de um lote em fluxo, troca as estimativas pelos totais reais de válidos/inválidos."""
+        fluxo, self._fluxo_validacao = self._fluxo_validacao, None
+        if fluxo is not None:
+            self._total_planejado = fluxo.aceitos
+            self._invalidos_ultima_geracao = fluxo.invalidos
+        return fluxo
+
     def _finalizar_job(self, status: str, erro: str = ""):
         if not self._job_id_atual:
             return
         try:
-            self.job_store.finish_run(self._job_id_atual, status=status, erro=erro, processado=self._processados_atuais)
+            self.job_store.finish_run(
+                self._job_id_atual,
+                status=status,
+                erro=erro,
+                processado=self._processados_atuais,
+                total_invalidos=self._invalidos_ultima_geracao,
+            )
         except Exception as exc:
             self.logger.exception("Falha ao finalizar job", extra={"event": "job_finish_error", "erro": str(exc), "operation": status})
 
@@ -850,6 +933,8 @@ class QRCodeGenerator:
                 total_processado=self._processados_atuais,
                 duracao_s=duracao,
                 erro=erro,
+                histograma=self._histograma_execucao,
+                backend=self._backend_execucao,
             )
         except Exception as exc:
             self.logger.exception("Falha ao registrar métricas", extra={"event": "metrics_record_error", "erro": str(exc), "operation": status})
@@ -895,6 +980,8 @@ class QRCodeGenerator:
         pode_teste_impressao = pode_gerar and self.formato_saida.get() == "imprimir"
 
         self.select_button.configure(state="disabled" if bloqueado else "normal")
+        self.resume_button.configure(state="disabled" if bloqueado else "normal")
+        self.profile_check.configure(state="disabled" if bloqueado else "normal")
         self.generate_button.configure(state="normal" if pode_gerar else "disabled")
         self.test_print_button.configure(state="normal" if pode_teste_impressao else "disabled")
         self.cancel_button.configure(
@@ -906,8 +993,13 @@ class QRCodeGenerator:
             self.column_combo.configure(state="readonly")
         else:
             self.column_combo.configure(state="disabled")
+        tem_abas = self.df is not None and len(self.controller.obter_planilhas(self.df)) > 1
+        self.sheet_combo.configure(state="readonly" if (tem_abas and not bloqueado) else "disabled")
 
         self._atualizar_controles_impressao()
+        self.pdf_vetorial_check.configure(
+            state="normal" if (not bloqueado and self.formato_saida.get() == "pdf") else "disabled"
+        )
         if hasattr(self, "barcode_model_combo"):
             barcode_ativo = self.barcode_disponivel and self.tipo_codigo.get() == "barcode"
             estado_barcode = "readonly" if (barcode_ativo and not bloqueado) else "disabled"
@@ -927,11 +1019,13 @@ class QRCodeGenerator:
 
         caminho = filedialog.askopenfilename(
             title=self._t("filedialog.open_data", "Selecione CSV ou Excel"),
-            filetypes=[(self._t("filedialog.data_files", "Arquivos de dados"), "*.csv *.xlsx")],
+            filetypes=[(self._t("filedialog.data_files", "Arquivos de dados"), "*.csv *.xlsx *.xlsm *.parquet *.feather *.arrow")],
         )
         if not caminho:
             return
+        self._iniciar_carregamento(caminho)
 
+    def _iniciar_carregamento(self, caminho, planilha=None):
         self._transicionar_estado(EstadoAplicacao.LOADING)
         self.progress_bar.stop()
         self.progress_bar.configure(mode="indeterminate")
@@ -942,12 +1036,12 @@ class QRCodeGenerator:
         self.progress_frame.pack(fill="x")
 
         self.logger.info("Iniciando carregamento de arquivo", extra={"event": "load_start", "operation": "load", "path": caminho})
-        worker = threading.Thread(target=self._executar_carregamento, args=(caminho,), daemon=True)
+        worker = threading.Thread(target=self._executar_carregamento, args=(caminho, planilha), daemon=True)
         worker.start()
 
-    def _executar_carregamento(self, caminho):
+    def _executar_carregamento(self, caminho, planilha=None):
         try:
-            tabela = self._carregar_tabela(caminho)
+            tabela = self._carregar_tabela(caminho, planilha)
             self.logger.info("Carregamento concluído", extra={"event": "load_done", "operation": "load", "path": caminho})
             self.fila.put({"tipo": "carregamento_sucesso", "caminho": caminho, "tabela": tabela})
         except Exception as exc:
@@ -957,9 +1051,9 @@ class QRCodeGenerator:
     def _formatar_excecao(self, exc: Exception, contexto: str) -> str:
         return self.controller.formatar_excecao(exc, contexto)
 
-    def _carregar_tabela(self, caminho):
+    def _carregar_tabela(self, caminho, planilha=None):
         """Carrega CSV/XLSX com fallback quando pandas/numpy não estiverem disponíveis."""
-        return self.controller.carregar_tabela(caminho)
+        return self.controller.carregar_tabela(caminho, planilha)
 
     def _obter_colunas(self, tabela):
         return self.controller.obter_colunas(tabela)
@@ -998,8 +1092,17 @@ class QRCodeGenerator:
             sufixo=self.sufixo_numerico.get(),
             max_codigos_por_lote=self.max_codigos_por_lote,
             max_tamanho_dado=self.max_tamanho_dado,
+            pdf_vetorial=bool(self.pdf_vetorial.get()),
+            perfil_codificacao=self.perfil_codificacao.get(),
+            nivel_compressao=self._obter_nivel_compressao(),
         )
 
+    def _obter_nivel_compressao(self) -> int:
+        try:
+            return validar_nivel_compressao(self.nivel_compressao.get())
+        except (tk.TclError, ValueError) as exc:
+            raise ValueError("Nível de compressão inválido. Use um valor de 0 a 9.") from exc
+
     def _validar_parametros_geracao(self, codigos, cfg: GeracaoConfig | None = None):
         cfg = cfg or self._build_config()
         return self.controller.validar_parametros_geracao(codigos, cfg)
@@ -1011,25 +1114,11 @@ class QRCodeGenerator:
         cfg = cfg or self._build_config()
         return self.controller.normalizar_dado(valor, cfg)
 
-    def _gerar_imagem_obj(self, dado: str, cfg: GeracaoConfig | None = None) -> Image.Image:
+    def _gerar_imagem_obj(self, dado: str, cfg: GeracaoConfig | None = None, histograma=None) -> Image.Image:
         cfg = cfg or self._build_config()
-        return self.controller.gerar_imagem_obj(dado, cfg)
+        return self.controller.gerar_imagem_obj(dado, cfg, histograma)
 
-    def _extrair_codigos_preview(self):
-        if self.df is None or not self.column_combo.get():
-            return []
-        try:
-            cfg = self._build_config()
-            return self.controller.extrair_codigos_preview(
-                self.df,
-                self.column_combo.get(),
-                cfg,
-                self.max_itens_preview_pagina,
-            )
-        except ValueError:
-            return []
-
-    def _gerar_preview_documento(self, codigos, cfg: GeracaoConfig) -> Image.Image:
+    def _obter_layout_preview(self) -> LayoutPreview:
         preset = self.preview_preset.get()
         if preset == "Etiqueta 8x10.5 cm":
             largura, altura = int(80 * mm), int(105 * mm)
@@ -1040,108 +1129,129 @@ class QRCodeGenerator:
 
         margem_cm = max(0.2, self._parse_float_input(self.preview_margin_cm.get(), self._t("labels.preview_margin", "Margem (cm)")))
         espaco_cm = max(0.1, self._parse_float_input(self.preview_spacing_cm.get(), self._t("labels.preview_spacing", "Espaçamento (cm)")))
-        margem_px = int(margem_cm * 10 * mm)
-        espaco_px = int(espaco_cm * 10 * mm)
-
-        # Evita geometria inválida (x1 < x0 / y1 < y0) em etiquetas pequenas
-        # ou quando margem é maior que metade da área útil.
-        margem_limite = max(1, min((largura - 2) // 2, (altura - 2) // 2))
-        margem_px = min(margem_px, margem_limite)
-
-        fundo = Image.new("RGB", (largura + 120, altura + 120), "#e5e7eb")
-        draw = ImageDraw.Draw(fundo)
-        draw.rounded_rectangle((70, 70, largura + 90, altura + 90), radius=10, fill="#cbd5e1")
-
-        preview = Image.new("RGB", (largura, altura), "white")
-        draw_preview = ImageDraw.Draw(preview)
-
-        x = margem_px
-        y = margem_px
-        x2 = largura - x
-        y2 = altura - y
-        # Coordenadas defensivas para evitar ValueError do Pillow em presets pequenos.
-        x0, x1 = sorted((x, x2))
-        y0, y1 = sorted((y, y2))
-        x0 = max(0, min(x0, largura - 1))
-        x1 = max(0, min(x1, largura - 1))
-        y0 = max(0, min(y0, altura - 1))
-        y1 = max(0, min(y1, altura - 1))
-        item_largura = max(24, int(cfg.qr_width_cm * 10 * mm))
-        item_altura = max(24, int(cfg.qr_height_cm * 10 * mm))
-        if cfg.tipo_codigo == "barcode":
-            item_largura = max(24, int(cfg.barcode_width_cm * 10 * mm))
-            item_altura = max(24, int(cfg.barcode_height_cm * 10 * mm))
-
-        if x1 >= x0 and y1 >= y0:
-            draw_preview.rectangle((x0, y0, x1, y1), outline="#9ca3af", width=2)
-
-        pixels_por_cm = mm * 10
-        largura_util = max(1, x1 - x0)
-        for cm in range(0, int(largura_util / pixels_por_cm) + 1, 5):
-            px = int(x0 + cm * pixels_por_cm)
-            if px > x1:
-                break
-            if y0 >= 8:
-                draw_preview.line((px, y0 - 8, px, y0), fill="#6b7280", width=1)
-            draw_preview.text((px + 2, max(0, y0 - 24)), f"{cm}cm", fill="#6b7280")
-
-        x_cursor = x0
-        y_cursor = y0
-
-        for codigo in codigos:
-            img = self._gerar_imagem_obj(self._normalizar_dado(codigo, cfg), cfg)
-            img = img.resize((item_largura, item_altura))
-            preview.paste(img, (x_cursor, y_cursor))
-
-            x_cursor += item_largura + espaco_px
-            if x_cursor + item_largura > x1:
-                x_cursor = x0
-                y_cursor += item_altura + espaco_px
-            if y_cursor + item_altura > y1:
-                break
-
-        fundo.paste(preview, (60, 60))
-        return fundo
+        return LayoutPreview(
+            largura=largura,
+            altura=altura,
+            margem_px=int(margem_cm * 10 * mm),
+            espaco_px=int(espaco_cm * 10 * mm),
+        )
+
+    def _gerar_preview_documento(self, codigos, cfg: GeracaoConfig, layout: LayoutPreview | None = None, renderizar=None) -> Image.Image:
+        dados = [self._normalizar_dado(codigo, cfg) for codigo in codigos]
+        return self.preview_composer.compor(
+            dados,
+            cfg,
+            layout or self._obter_layout_preview(),
+            renderizar or (lambda dado: self._gerar_imagem_obj(dado, cfg)),
+        )
 
     def atualizar_preview(self):
+        """Captura os parâmetros no loop do Tk e delega a renderização ao worker de preview."""
         try:
             cfg = self._build_config()
-            codigos_preview = self._extrair_codigos_preview()
-            if codigos_preview:
-                img = self._gerar_preview_documento(codigos_preview, cfg)
-            else:
-                amostra = self.controller.gerar_amostra_preview(cfg)
-                img = self._gerar_preview_documento([amostra], cfg)
+            layout = self._obter_layout_preview()
+        except Exception as exc:
+            self._exibir_erro_preview(exc)
+            return
 
-            zoom_txt = self.preview_zoom.get().replace("%", "")
-            zoom_factor = max(0.25, float(zoom_txt) / 100.0) if zoom_txt.isdigit() else 1.0
-            self.preview_escala_var.set(f"Escala visual: {int(zoom_factor * 100)}%")
+        zoom_txt = self.preview_zoom.get().replace("%", "")
+        zoom_factor = max(0.25, float(zoom_txt) / 100.0) if zoom_txt.isdigit() else 1.0
+        self.preview_escala_var.set(f"Escala visual: {int(zoom_factor * 100)}%")
 
-            if zoom_factor != 1.0:
-                img = img.resize(
-                    (max(1, int(img.width * zoom_factor)), max(1, int(img.height * zoom_factor))),
-                    Image.Resampling.LANCZOS,
-                )
+        self._preview_geracao += 1
+        self._preview_pedidos.put(
+            {
+                "geracao": self._preview_geracao,
+                "cfg": cfg,
+                "layout": layout,
+                "zoom": zoom_factor,
+                "tabela": self.df,
+                "coluna": self.column_combo.get(),
+            }
+        )
+        if self._preview_worker is None or not self._preview_worker.is_alive():
+            self._preview_worker = threading.Thread(target=self._executar_worker_preview, daemon=True)
+            self._preview_worker.start()
+
+    def _executar_worker_preview(self):
+        while True:
+            pedido = self._preview_pedidos.get()
+            # Pedidos acumulados durante uma renderização lenta já estão obsoletos.
+            while True:
+                try:
+                    pedido = self._preview_pedidos.get_nowait()
+                except queue.Empty:
+                    break
+            self._renderizar_preview(pedido)
+
+    def _renderizar_preview(self, pedido: dict):
+        geracao = pedido["geracao"]
+        cfg = pedido["cfg"]
+        if geracao != self._preview_geracao:
+            return
+
+        def renderizar(dado):
+            if geracao != self._preview_geracao:
+                raise _PreviewObsoleto()
+            return self._gerar_imagem_obj(dado, cfg)
+
+        inicio = time.perf_counter()
+        try:
+            codigos = []
+            if pedido["tabela"] is not None and pedido["coluna"]:
+                try:
+                    codigos = self.controller.extrair_codigos_preview(
+                        pedido["tabela"],
+                        pedido["coluna"],
+                        cfg,
+                        self.max_itens_preview_pagina,
+                    )
+                except ValueError:
+                    codigos = []
+            if not codigos:
+                codigos = [self.controller.gerar_amostra_preview(cfg)]
+            img = self._gerar_preview_documento(codigos, cfg, pedido["layout"], renderizar)
+            img = self.preview_composer.escalar(img, pedido["zoom"], (560, 420))
+        except _PreviewObsoleto:
+            return
+        except Exception as exc:
+            self.fila.put({"tipo": "preview_erro", "geracao": geracao, "erro": exc})
+            return
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+        self.fila.put({"tipo": "preview_pronto", "geracao": geracao, "imagem": img, "duracao_ms": duracao_ms})
+
+    def _aplicar_preview(self, img: Image.Image, duracao_ms: float):
+        from PIL import ImageTk
 
-            img.thumbnail((560, 420), Image.Resampling.LANCZOS)
-            self.preview_image_ref = ImageTk.PhotoImage(img)
-            self.preview_label.configure(image=self.preview_image_ref, text="")
-            self._preview_backend_error_shown = False
-        except RuntimeError as exc:
+        self.preview_image_ref = ImageTk.PhotoImage(img)
+        self.preview_label.configure(image=self.preview_image_ref, text="")
+        self._preview_backend_error_shown = False
+
+        # Debounce acompanha o custo real da renderização (média móvel exponencial).
+        if self._preview_duracao_media_ms is None:
+            self._preview_duracao_media_ms = duracao_ms
+        else:
+            self._preview_duracao_media_ms = 0.7 * self._preview_duracao_media_ms + 0.3 * duracao_ms
+        self.preview_debounce_ms = int(min(1000, max(120, self._preview_duracao_media_ms * 1.5)))
+
+    def _exibir_erro_preview(self, exc: Exception):
+        if isinstance(exc, RuntimeError):
             # Evita quebrar callback do Tkinter quando backend opcional do reportlab não está disponível.
             self.preview_label.configure(image="", text="Preview indisponível para barcode neste ambiente")
             if not self._preview_backend_error_shown:
                 messagebox.showwarning(self._t("dialog.title.missing_dependency", "Dependência opcional ausente"), str(exc))
                 self._preview_backend_error_shown = True
-        except Exception as exc:
-            self.preview_label.configure(image="", text="Falha ao gerar pré-visualização")
-            self.logger.exception(
-                "Erro inesperado no preview",
-                extra={"event": "preview_error", "operation": "preview", "erro": str(exc)},
-            )
-            if not self._preview_backend_error_shown:
-                messagebox.showwarning(self._t("dialog.title.preview", "Pré-visualização"), self._t("preview.update_error", "Não foi possível atualizar o preview:\n{erro}", erro=exc))
-                self._preview_backend_error_shown = True
+            return
+
+        self.preview_label.configure(image="", text="Falha ao gerar pré-visualização")
+        self.logger.error(
+            "Erro inesperado no preview",
+            exc_info=exc,
+            extra={"event": "preview_error", "operation": "preview", "erro": str(exc)},
+        )
+        if not self._preview_backend_error_shown:
+            messagebox.showwarning(self._t("dialog.title.preview", "Pré-visualização"), self._t("preview.update_error", "Não foi possível atualizar o preview:\n{erro}", erro=exc))
+            self._preview_backend_error_shown = True
 
     def solicitar_atualizacao_preview(self, *_args):
         if self._preview_after_id is not None:
@@ -1152,103 +1262,31 @@ class QRCodeGenerator:
         self._preview_after_id = None
         self.atualizar_preview()
 
-    def gerar_imagens(self, codigos, formato, destino, emitir_sucesso=True):
-        try:
-            cfg = self._build_config()
-            os.makedirs(destino, exist_ok=True)
-            total = len(codigos)
+    @staticmethod
+    def _estimar_total(codigos) -> int:
+        return estimar_total(codigos)
 
-            nomes_usados = set()
-            for i, codigo in enumerate(codigos, start=1):
-                if self.cancelar_evento.is_set():
-                    raise OperacaoCancelada("Operação cancelada pelo usuário.")
-                dado = self._normalizar_dado(codigo, cfg)
-                nome_base = self._sanitizar_nome_arquivo(codigo, f"codigo_{i}")
-                nome_arquivo = nome_base
-                sufixo = 2
-                while nome_arquivo in nomes_usados:
-                    nome_arquivo = f"{nome_base}_{sufixo}"
-                    sufixo += 1
-                nomes_usados.add(nome_arquivo)
-
-                if formato == "svg":
-                    if cfg.tipo_codigo == "barcode":
-                        raise ValueError("Exportação SVG para código de barras não suportada nesta versão.")
-                    qr = qrcode.make(dado, image_factory=SvgImage)
-                    caminho_saida = os.path.join(destino, f"{nome_arquivo}.svg")
-                    with open(caminho_saida, "wb") as f:
-                        qr.save(f)
-                else:
-                    imagem = self._gerar_imagem_obj(dado, cfg)
-                    imagem.save(os.path.join(destino, f"{nome_arquivo}.png"), format="PNG")
-
-                self.fila.put({"tipo": "progresso", "atual": i, "total": total, "codigo": codigo})
-
-            if emitir_sucesso:
-                self.logger.info("Geração de imagens concluída", extra={"event": "generate_done", "operation": "images", "path": destino, "total": total})
-                self.fila.put({"tipo": "sucesso", "caminho": destino})
-        except (OSError, ValueError) as exc:
-            raise RuntimeError(self._formatar_excecao(exc, "Erro ao gerar imagens")) from exc
+    def gerar_imagens(self, codigos, formato, destino, emitir_sucesso=True, cfg=None, ledger=None, concluidos=None, histograma=None):
+        cfg = cfg or self._build_config()
+        self.exportador.gerar_imagens(codigos, formato, destino, cfg, ledger=ledger, concluidos=concluidos, histograma=histograma)
+        if emitir_sucesso:
+            self.fila.put({"tipo": "sucesso", "caminho": destino})
 
-    def gerar_zip(self, codigos, caminho_zip):
-        try:
-            with tempfile.TemporaryDirectory() as tmpdir:
-                self.gerar_imagens(codigos, "png", tmpdir, emitir_sucesso=False)
-                with zipfile.ZipFile(caminho_zip, "w", zipfile.ZIP_DEFLATED) as zf:
-                    for nome in os.listdir(tmpdir):
-                        if nome.lower().endswith('.png'):
-                            zf.write(os.path.join(tmpdir, nome), arcname=nome)
-            self.logger.info("ZIP gerado com sucesso", extra={"event": "generate_done", "operation": "zip", "path": caminho_zip})
-            self.fila.put({"tipo": "sucesso", "caminho": caminho_zip})
-        except (OSError, zipfile.BadZipFile, RuntimeError) as exc:
-            raise RuntimeError(self._formatar_excecao(exc, "Erro ao gerar ZIP")) from exc
-
-    def gerar_pdf(self, codigos, caminho_pdf, emitir_sucesso=True):
-        try:
-            cfg = self._build_config()
-            pdf_canvas, image_reader_cls = _obter_modulos_pdf_reportlab()
-            pdf = pdf_canvas.Canvas(caminho_pdf, pagesize=A4)
-            largura_pagina, altura_pagina = A4
-
-            x = 20 * mm
-            y = altura_pagina - 20 * mm
-            largura_item = cfg.qr_width_cm * 10 * mm
-            altura_item = cfg.qr_height_cm * 10 * mm
-            if cfg.tipo_codigo == "barcode":
-                largura_item = cfg.barcode_width_cm * 10 * mm
-                altura_item = cfg.barcode_height_cm * 10 * mm
-            margem = 10 * mm
-            y -= altura_item
-            total = len(codigos)
-
-            for i, codigo in enumerate(codigos, start=1):
-                if self.cancelar_evento.is_set():
-                    raise OperacaoCancelada("Operação cancelada pelo usuário.")
-                imagem = self._gerar_imagem_obj(self._normalizar_dado(codigo, cfg), cfg)
-                buffer = io.BytesIO()
-                imagem.save(buffer, format="PNG")
-                buffer.seek(0)
-                image_reader = image_reader_cls(buffer)
-
-                pdf.drawImage(image_reader, x, y, width=largura_item, height=altura_item, preserveAspectRatio=True)
-                self.fila.put({"tipo": "progresso", "atual": i, "total": total, "codigo": codigo})
-
-                x += largura_item + margem
-                if x + largura_item > largura_pagina - 20 * mm:
-                    x = 20 * mm
-                    y -= altura_item + margem
-
-                if y < 20 * mm:
-                    pdf.showPage()
-                    x = 20 * mm
-                    y = altura_pagina - 20 * mm - altura_item
-
-            pdf.save()
-            if emitir_sucesso:
-                self.logger.info("PDF gerado com sucesso", extra={"event": "generate_done", "operation": "pdf", "path": caminho_pdf, "total": total})
-                self.fila.put({"tipo": "sucesso", "caminho": caminho_pdf})
-        except (OSError, ValueError, RuntimeError) as exc:
-            raise RuntimeError(self._formatar_excecao(exc, "Erro ao gerar PDF")) from exc
+    def gerar_zip(self, codigos, caminho_zip, cfg=None, ledger=None, concluidos=None, histograma=None):
+        cfg = cfg or self._build_config()
+        self.exportador.gerar_zip(codigos, caminho_zip, cfg, ledger=ledger, concluidos=concluidos, histograma=histograma)
+        self.fila.put({"tipo": "sucesso", "caminho": caminho_zip})
+
+    def gerar_pdf(self, codigos, caminho_pdf, emitir_sucesso=True, cfg=None, histograma=None):
+        cfg = cfg or self._build_config()
+        self.exportador.gerar_pdf(codigos, caminho_pdf, cfg, histograma=histograma)
+        if emitir_sucesso:
+            self.fila.put({"tipo": "sucesso", "caminho": caminho_pdf})
+
+    def gerar_folhas_svg(self, codigos, destino, cfg=None, histograma=None):
+        cfg = cfg or self._build_config()
+        self.exportador.gerar_folhas_svg(codigos, destino, cfg, histograma=histograma)
+        self.fila.put({"tipo": "sucesso", "caminho": destino})
 
     def imprimir_codigos(self, codigos):
         if not sys.platform.startswith("win"):
@@ -1265,7 +1303,9 @@ class QRCodeGenerator:
         impressora = self.impressora_var.get().strip()
         pasta_tmp = tempfile.mkdtemp(prefix="qr_print_")
         self._arquivos_temporarios_impressao.append((pasta_tmp, time.time()))
-        self.gerar_imagens(codigos, "png", pasta_tmp, emitir_sucesso=False)
+        # A impressão lê os PNG RGB da pasta, qualquer que seja o perfil escolhido para exportar.
+        cfg = replace(self._build_config(), perfil_codificacao=PERFIL_PADRAO)
+        self.gerar_imagens(codigos, "png", pasta_tmp, emitir_sucesso=False, cfg=cfg)
 
         arquivos_png = [
             os.path.join(pasta_tmp, nome)
@@ -1285,7 +1325,7 @@ class QRCodeGenerator:
         destino = f"impressora:{impressora or 'padrão do sistema'}"
         self.logger.info(
             "Impressão enviada com sucesso",
-            extra={"event": "print_done", "operation": "print", "path": destino, "total": len(codigos), "copias": copias},
+            extra={"event": "print_done", "operation": "print", "path": destino, "total": len(arquivos_png), "copias": copias},
         )
         self.fila.put(
             {
@@ -1341,8 +1381,11 @@ class QRCodeGenerator:
         if processo.poll() not in (None, 0):
             raise RuntimeError(f"Falha ao enviar imagem para impressão (código {processo.returncode}).")
 
-    def _iniciar_progresso(self, total, invalidos=0, destino="", formato=""):
+    def _iniciar_progresso(self, total, invalidos=0, destino="", formato="", parametros=None, job_id=None, histograma=None):
         self.cancelar_evento.clear()
+        self._histograma_execucao = histograma if histograma is not None else HistogramaEtapas()
+        self.canal_progresso.limpar()
+        self._ultimo_job_progresso_ts = 0.0
         self._transicionar_estado(EstadoAplicacao.GENERATING)
         self.progress_bar.stop()
         self.progress_bar.configure(mode="determinate", maximum=max(total, 1))
@@ -1355,7 +1398,17 @@ class QRCodeGenerator:
         self._invalidos_ultima_geracao = invalidos
         self._atualizar_resumo_painel(processado=0, ignorados=invalidos, duracao=0, caminho=destino, job_id="")
         self._formato_execucao_atual = formato or self.formato_saida.get()
-        self._registrar_job(formato=formato or self.formato_saida.get(), destino=str(destino), total_validos=total, invalidos=invalidos)
+        self._backend_execucao = ""
+        if job_id:
+            self._reabrir_job(job_id)
+        else:
+            self._registrar_job(
+                formato=formato or self.formato_saida.get(),
+                destino=str(destino),
+                total_validos=total,
+                invalidos=invalidos,
+                parametros=parametros,
+            )
         self.progress_frame.pack(fill="x")
 
     def _finalizar_progresso(self, estado_final: EstadoAplicacao | None = None):
@@ -1376,25 +1429,58 @@ class QRCodeGenerator:
             estado_final = EstadoAplicacao.READY if self.df is not None else EstadoAplicacao.IDLE
         self._transicionar_estado(estado_final)
 
+    def _detectar_tcl_com_threads(self) -> bool:
+        """Só um Tcl com threads aceita ``event_generate`` vindo de outra thread."""
+        try:
+            return bool(int(self.root.tk.call("info", "exists", "tcl_platform(threaded)")))
+        except (AttributeError, ValueError, tk.TclError):
+            return False
+
+    def _acordar_ui(self):
+        """Chamado de qualquer thread: agenda o processamento da fila no loop do Tk."""
+        if not self._tcl_com_threads:
+            # Chamar o Tcl fora da thread dele não é seguro: o polling rápido entrega a mensagem.
+            return
+        try:
+            self.root.event_generate(self.EVENTO_FILA, when="tail")
+        except (tk.TclError, RuntimeError):
+            # Janela já destruída: o polling de segurança cobre.
+            pass
+
+    def _ao_evento_fila(self, _event=None):
+        self._processar_fila()
+
+    def _aplicar_progresso(self, estado: dict):
+        atual = estado.get("atual", 0)
+        total = estado.get("total", 1)
+        self.progress_bar.configure(maximum=max(total, 1), style="App.Horizontal.TProgressbar")
+        self.progress_bar["value"] = atual
+        self.progress_label_var.set(
+            self._t("progress.generating_item", "Gerando {atual}/{total}: {codigo}", atual=atual, total=total, codigo=estado.get("codigo", ""))
+        )
+        self._processados_atuais = atual
+        duracao_parcial = None
+        if self._inicio_geracao_ts is not None:
+            duracao_parcial = time.perf_counter() - self._inicio_geracao_ts
+        self._atualizar_resumo_painel(processado=atual, duracao=duracao_parcial)
+        agora = time.monotonic()
+        if agora - self._ultimo_job_progresso_ts >= self.intervalo_job_progresso_s:
+            self._ultimo_job_progresso_ts = agora
+            self._atualizar_job_progresso(atual)
+
     def verificar_fila(self):
+        self._processar_fila()
+        self.root.after(self.intervalo_fallback_fila_ms, self.verificar_fila)
+
+    def _processar_fila(self):
+        estado = self.canal_progresso.consumir()
+        if estado is not None and self.estado_atual in {EstadoAplicacao.GENERATING, EstadoAplicacao.CANCELLING}:
+            self._aplicar_progresso(estado)
         try:
             while True:
                 msg = self.fila.get_nowait()
-                if msg["tipo"] == "progresso":
-                    atual = msg.get("atual", 0)
-                    total = msg.get("total", 1)
-                    self.progress_bar.configure(maximum=max(total, 1), style="App.Horizontal.TProgressbar")
-                    self.progress_bar["value"] = atual
-                    self.progress_label_var.set(
-                        self._t("progress.generating_item", "Gerando {atual}/{total}: {codigo}", atual=atual, total=total, codigo=msg.get("codigo", ""))
-                    )
-                    self._processados_atuais = atual
-                    duracao_parcial = None
-                    if self._inicio_geracao_ts is not None:
-                        duracao_parcial = time.perf_counter() - self._inicio_geracao_ts
-                    self._atualizar_resumo_painel(processado=atual, duracao=duracao_parcial)
-                    self._atualizar_job_progresso(atual)
-                elif msg["tipo"] == "sucesso":
+                if msg["tipo"] == "sucesso":
+                    fluxo = self._consolidar_fluxo_validacao()
                     self._atualizar_resumo_painel(caminho=msg.get("caminho", ""), processado=self._total_planejado)
                     self.progress_bar.configure(style="Success.Horizontal.TProgressbar")
                     self._processados_atuais = self._total_planejado
@@ -1409,7 +1495,13 @@ class QRCodeGenerator:
                             self._t("info.generated_files_in", "Arquivo(s) gerado(s) em: {caminho}", caminho=msg.get("caminho", "")),
                         ),
                     )
+                    if fluxo is not None and fluxo.invalidos:
+                        messagebox.showwarning(
+                            self._t("dialog.title.validation", "Validação"),
+                            self._formatar_relatorio_validacao(fluxo),
+                        )
                 elif msg["tipo"] == "erro":
+                    self._consolidar_fluxo_validacao()
                     self._atualizar_resumo_painel(caminho=self._ultimo_destino_saida)
                     self.progress_bar.configure(style="Error.Horizontal.TProgressbar")
                     self._registrar_metricas_execucao("error", erro=msg.get("msg", ""))
@@ -1422,6 +1514,7 @@ class QRCodeGenerator:
                         erro_msg = self._t("error.technical_details", "{erro}\n\nDetalhes técnicos:\n{detalhe}", erro=erro_msg, detalhe=detalhe)
                     messagebox.showerror(self._t("message.error", "Erro"), erro_msg)
                 elif msg["tipo"] == "cancelado":
+                    self._consolidar_fluxo_validacao()
                     self._atualizar_resumo_painel(caminho=self._ultimo_destino_saida)
                     self.progress_bar.configure(style="App.Horizontal.TProgressbar")
                     self._registrar_metricas_execucao("cancelled", erro=msg.get("msg", ""))
@@ -1432,6 +1525,14 @@ class QRCodeGenerator:
                         self._t("dialog.title.cancelled", "Cancelado"),
                         msg.get("msg", self._t("info.operation_cancelled", "Operação cancelada.")),
                     )
+                elif msg["tipo"] == "dependencias_verificadas":
+                    self._aplicar_dependencias_verificadas(msg)
+                elif msg["tipo"] == "preview_pronto":
+                    if msg["geracao"] == self._preview_geracao:
+                        self._aplicar_preview(msg["imagem"], msg["duracao_ms"])
+                elif msg["tipo"] == "preview_erro":
+                    if msg["geracao"] == self._preview_geracao:
+                        self._exibir_erro_preview(msg["erro"])
                 elif msg["tipo"] == "carregamento_sucesso":
                     self.progress_bar.stop()
                     self.progress_frame.pack_forget()
@@ -1439,6 +1540,9 @@ class QRCodeGenerator:
                     self.arquivo_fonte = msg["caminho"]
                     colunas = self._obter_colunas(self.df)
                     self.column_combo.configure(values=colunas)
+                    planilhas = self.controller.obter_planilhas(self.df)
+                    self.sheet_combo.configure(values=planilhas)
+                    self.sheet_combo.set(getattr(self.df, "planilha", ""))
                     self.status_resumo_var.set(
                         f"Arquivo carregado: {os.path.basename(self.arquivo_fonte)} ({len(colunas)} coluna(s))."
                     )
@@ -1461,18 +1565,74 @@ class QRCodeGenerator:
         except queue.Empty:
             pass
 
-        self.root.after(100, self.verificar_fila)
+    def _modo_perfil(self) -> ModoPerfil | None:
+        """Perfil pedido para a próxima execução: a opção da tela ou ``QRGEN_PROFILE``."""
+        modo = modo_perfil_do_ambiente()
+        if modo is None and self.perfilar_execucao.get():
+            modo = ModoPerfil()
+        return modo
+
+    def _abrir_captura_perfil(self, perfil: ModoPerfil | None):
+        if perfil is None:
+            return None
+        captura = CapturaPerfil(self._job_id_atual or time.strftime("sem_job_%Y%m%d_%H%M%S"), perfil, self.diretorio_perfis)
+        try:
+            captura.__enter__()
+        except (OSError, ValueError) as exc:
+            self.logger.warning("Perfil indisponível para esta execução", extra={"event": "profile_error", "erro": str(exc)})
+            return None
+        self.exportador.render_paralelo = False
+        return captura
 
-    def _executar_geracao(self, codigos, formato, destino):
+    def _fechar_captura_perfil(self, captura):
+        if captura is None:
+            return
+        self.exportador.render_paralelo = True
         try:
+            captura.__exit__(None, None, None)
+            if self._job_id_atual:
+                self.job_store.record_profile(self._job_id_atual, captura.caminho_prof, captura.caminho_resumo)
+            self.logger.info(
+                "Perfil da execução gravado",
+                extra={"event": "profile_saved", "path": str(captura.caminho_prof), "job_id": self._job_id_atual},
+            )
+        except Exception as exc:
+            self.logger.exception("Falha ao gravar perfil", extra={"event": "profile_error", "erro": str(exc)})
+
+    def _executar_geracao(self, codigos, formato, destino, cfg=None, retomar=False, histograma=None, perfil=None):
+        captura = self._abrir_captura_perfil(perfil)
+        try:
+            self._gerar_no_formato(codigos, formato, destino, cfg, retomar, histograma)
+        finally:
+            self._fechar_captura_perfil(captura)
+
+    def _gerar_no_formato(self, codigos, formato, destino, cfg=None, retomar=False, histograma=None):
+        try:
+            # A fonte é lida até o primeiro valor aceito só aqui, no worker: se as primeiras
+            # linhas forem todas rejeitadas, isso pode percorrer o arquivo inteiro.
+            if hasattr(codigos, "tem_validos") and not codigos.tem_validos():
+                self.logger.info("Nenhum código válido", extra={"event": "generate_no_valid", "operation": formato, "path": str(destino)})
+                self.fila.put(
+                    {"tipo": "erro", "msg": self._t("validation.all_rejected", "Todos os dados foram rejeitados pela validação de entrada.")}
+                )
+                return
+            # Backend resolvido uma vez para o job todo (e registrado nas métricas).
+            self._backend_execucao = self.controller.iniciar_job(cfg or self._build_config())
+            ledger, concluidos = None, None
+            if formato in self.FORMATOS_RETOMAVEIS and self._job_id_atual:
+                ledger = LedgerItens(self.job_store, self._job_id_atual)
+                if retomar:
+                    concluidos = self.job_store.get_items(self._job_id_atual)
             if formato == "pdf":
-                self.gerar_pdf(codigos, destino)
+                self.gerar_pdf(codigos, destino, cfg=cfg, histograma=histograma)
             elif formato == "zip":
-                self.gerar_zip(codigos, destino)
+                self.gerar_zip(codigos, destino, cfg=cfg, ledger=ledger, concluidos=concluidos, histograma=histograma)
+            elif formato == "svg_folhas":
+                self.gerar_folhas_svg(codigos, destino, cfg=cfg, histograma=histograma)
             elif formato == "imprimir":
                 self.imprimir_codigos(codigos)
             else:
-                self.gerar_imagens(codigos, formato, destino)
+                self.gerar_imagens(codigos, formato, destino, cfg=cfg, ledger=ledger, concluidos=concluidos, histograma=histograma)
         except OperacaoCancelada as exc:
             self.logger.info("Geração cancelada", extra={"event": "generate_cancel", "operation": formato, "path": str(destino)})
             self.fila.put({"tipo": "cancelado", "msg": str(exc)})
@@ -1480,6 +1640,69 @@ class QRCodeGenerator:
             self.logger.exception("Falha na geração", extra={"event": "generate_error", "operation": formato, "path": str(destino), "erro": str(exc)})
             self.fila.put({"tipo": "erro", "msg": str(exc), "detalhe": traceback.format_exc(limit=3)})
 
+    def _parametros_job(self, cfg: GeracaoConfig) -> dict:
+        """Tudo o que é preciso para refazer a mesma sequência de códigos numa retomada."""
+        return {
+            "arquivo_fonte": self.arquivo_fonte,
+            "planilha": getattr(self.df, "planilha", None),
+            "coluna": self.column_combo.get(),
+            "cfg": asdict(cfg),
+        }
+
+    def retomar_ultimo_job(self):
+        if self.estado_atual in {EstadoAplicacao.LOADING, EstadoAplicacao.GENERATING, EstadoAplicacao.CANCELLING}:
+            return
+        try:
+            run = self.job_store.latest_resumable_run(self.FORMATOS_RETOMAVEIS)
+        except Exception as exc:
+            self.logger.exception("Falha ao consultar jobs", extra={"event": "job_resume_error", "erro": str(exc)})
+            run = None
+        if run is None:
+            messagebox.showinfo(
+                self._t("dialog.title.resume", "Retomar job"),
+                self._t("info.no_resumable_job", "Nenhum job interrompido de PNG/SVG/ZIP para retomar."),
+            )
+            return
+
+        self.logger.info(
+            "Retomando job",
+            extra={"event": "job_resume_start", "operation": run["formato"], "path": run["destino"], "job_id": run["id"]},
+        )
+        histograma = HistogramaEtapas()
+        self._iniciar_progresso(
+            run["total_entradas"], destino=run["destino"], formato=run["formato"], job_id=run["id"], histograma=histograma
+        )
+        worker = threading.Thread(target=self._executar_retomada, args=(run, histograma, self._modo_perfil()), daemon=True)
+        worker.start()
+
+    def _executar_retomada(self, run: dict, histograma=None, perfil=None):
+        parametros = run["parametros"]
+        try:
+            cfg = GeracaoConfig(**parametros["cfg"])
+            tabela = self.controller.carregar_tabela(parametros["arquivo_fonte"], parametros.get("planilha"))
+            codigos = self.controller.preparar_codigos_em_fluxo(tabela, parametros["coluna"], cfg, histograma)
+        except Exception as exc:
+            self.logger.exception("Falha ao retomar job", extra={"event": "job_resume_error", "job_id": run["id"], "erro": str(exc)})
+            self.fila.put({"tipo": "erro", "msg": str(exc), "detalhe": traceback.format_exc(limit=3)})
+            return
+        self._fluxo_validacao = codigos
+        self._executar_geracao(
+            codigos, run["formato"], run["destino"], cfg=cfg, retomar=True, histograma=histograma, perfil=perfil
+        )
+
+    def _formatar_relatorio_validacao(self, relatorio) -> str:
+        linhas = [
+            self._t(
+                "warning.invalid_records_ignored",
+                "{invalidos} registro(s) foram ignorados por não atenderem aos limites de entrada.",
+                invalidos=relatorio.invalidos,
+            )
+        ]
+        for motivo, quantidade in relatorio.resumo().items():
+            rotulo = self._t(f"validation.reason.{motivo}", motivo)
+            linhas.append(f"• {rotulo}: {quantidade}")
+        return "\n".join(linhas)
+
     def gerar_a_partir_da_tabela(self):
         if self.estado_atual in {EstadoAplicacao.LOADING, EstadoAplicacao.GENERATING, EstadoAplicacao.CANCELLING}:
             return
@@ -1489,18 +1712,22 @@ class QRCodeGenerator:
 
         try:
             cfg = self._build_config()
-            codigos, invalidos = self.controller.preparar_codigos(self.df, self.column_combo.get(), cfg)
+            histograma = HistogramaEtapas()
+            # Nada é lido aqui: o worker descobre se há algum valor aceito (ver _gerar_no_formato).
+            codigos = self.controller.preparar_codigos_em_fluxo(self.df, self.column_combo.get(), cfg, histograma)
         except ValueError as exc:
             messagebox.showwarning(self._t("dialog.title.validation", "Validação"), str(exc))
             return
 
-        if invalidos:
+        total_estimado = self._estimar_total(codigos)
+        if self.controller.excede_limite_lote(total_estimado, cfg):
             messagebox.showwarning(
                 self._t("dialog.title.validation", "Validação"),
                 self._t(
-                    "warning.invalid_records_ignored",
-                    "{invalidos} registro(s) foram ignorados por não atenderem aos limites de entrada.",
-                    invalidos=invalidos,
+                    "warning.large_batch",
+                    "A coluna tem cerca de {total} registro(s), acima do recomendado ({limite}) por geração. A geração seguirá em fluxo, com memória constante, mas pode demorar.",
+                    total=total_estimado,
+                    limite=cfg.max_codigos_por_lote,
                 ),
             )
 
@@ -1530,9 +1757,17 @@ class QRCodeGenerator:
         if not destino:
             return
 
-        self.logger.info("Iniciando geração", extra={"event": "generate_start", "operation": formato, "path": str(destino), "total": len(codigos)})
-        self._iniciar_progresso(len(codigos), invalidos=invalidos, destino=str(destino), formato=formato)
-        worker = threading.Thread(target=self._executar_geracao, args=(codigos, formato, destino), daemon=True)
+        self.logger.info("Iniciando geração", extra={"event": "generate_start", "operation": formato, "path": str(destino), "total": total_estimado})
+        self._iniciar_progresso(
+            total_estimado, destino=str(destino), formato=formato, parametros=self._parametros_job(cfg), histograma=histograma
+        )
+        self._fluxo_validacao = codigos
+        worker = threading.Thread(
+            target=self._executar_geracao,
+            args=(codigos, formato, destino, cfg),
+            kwargs={"histograma": histograma, "perfil": self._modo_perfil()},
+            daemon=True,
+        )
         worker.start()
 
     def imprimir_teste(self):
@@ -1562,32 +1797,40 @@ class QRCodeGenerator:
 
         try:
             cfg = self._build_config()
-            codigos, invalidos = self.controller.preparar_codigos(self.df, self.column_combo.get(), cfg)
+            codigos = self.controller.preparar_codigos_em_fluxo(self.df, self.column_combo.get(), cfg)
         except ValueError as exc:
             messagebox.showwarning(self._t("dialog.title.validation", "Validação"), str(exc))
             return
 
-        if not codigos:
-            messagebox.showwarning(
-                self._t("dialog.title.validation", "Validação"),
-                self._t("validation.no_valid_codes_for_print", "Nenhum código válido encontrado para impressão."),
-            )
-            return
-
-        codigo_teste = [codigos[0]]
         impressora = self.impressora_var.get().strip()
         destino = f"impressora:{impressora or 'padrão do sistema'} (teste)"
 
         self.logger.info(
             "Iniciando impressão de teste",
-            extra={"event": "print_test_start", "operation": "imprimir_teste", "path": destino, "codigo": codigo_teste[0]},
+            extra={"event": "print_test_start", "operation": "imprimir_teste", "path": destino},
         )
-        self._iniciar_progresso(len(codigo_teste), invalidos=invalidos, destino=destino, formato="imprimir")
-        worker = threading.Thread(target=self._executar_geracao, args=(codigo_teste, "imprimir", destino), daemon=True)
+        self._iniciar_progresso(1, destino=destino, formato="imprimir")
+        self._fluxo_validacao = codigos
+        worker = threading.Thread(target=self._executar_impressao_teste, args=(codigos, destino), daemon=True)
         worker.start()
 
+    def _executar_impressao_teste(self, codigos, destino):
+        """Worker do teste de impressão: procura o primeiro código aceito fora da thread do Tk."""
+        try:
+            tem_validos = codigos.tem_validos()
+        except Exception as exc:
+            self.logger.exception("Falha na leitura para impressão de teste", extra={"event": "print_test_error", "path": destino, "erro": str(exc)})
+            self.fila.put({"tipo": "erro", "msg": str(exc), "detalhe": traceback.format_exc(limit=3)})
+            return
+        if not tem_validos:
+            self.fila.put({"tipo": "erro", "msg": self._t("validation.no_valid_codes_for_print", "Nenhum código válido encontrado para impressão.")})
+            return
+        self._executar_geracao([next(iter(codigos))], "imprimir", destino)
+
 
 if __name__ == "__main__":
+    inicio_ts = time.perf_counter()
+    multiprocessing.freeze_support()
     root = tk.Tk()
-    app = QRCodeGenerator(root)
+    app = QRCodeGenerator(root, inicio_ts=inicio_ts)
     root.mainloop()
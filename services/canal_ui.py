@@ -0,0 +1,79 @@
+import queue
+import time
+from threading import Lock
+
+
+class FilaNotificadora(queue.Queue):
+    """Fila limitada de mensagens worker -> UI que acorda a UI a cada ``put`` em vez de depender de polling.
+
+    Cheia, ``put`` bloqueia o worker até a UI consumir (contrapressão). Mensagens
+    cujo ``tipo`` está em ``substituiveis`` trocam a pendente do mesmo grupo em vez
+    de ocupar outra vaga: só a mais recente (ex.: o último preview) importa.
+    """
+
+    def __init__(self, notificar=None, maxsize: int = 64, substituiveis: dict[str, str] | None = None):
+        super().__init__(max(1, int(maxsize)))
+        self._notificar = notificar
+        self._substituiveis = dict(substituiveis or {})
+        self.substituidas = 0
+
+    def _grupo(self, item):
+        return self._substituiveis.get(item.get("tipo")) if isinstance(item, dict) else None
+
+    def put(self, item, block=True, timeout=None):
+        grupo = self._grupo(item)
+        if grupo is not None:
+            with self.mutex:
+                for posicao, pendente in enumerate(self.queue):
+                    if self._grupo(pendente) == grupo:
+                        # A UI já foi avisada da pendente: basta trocar o conteúdo.
+                        self.queue[posicao] = item
+                        self.substituidas += 1
+                        return
+        super().put(item, block, timeout)
+        if self._notificar is not None:
+            self._notificar()
+
+
+class CanalProgresso:
+    """Canal de progresso entre o worker e a thread da UI, coalescido no estado mais recente.
+
+    ``publicar`` só sobrescreve o último estado: o worker nunca enfileira nem
+    bloqueia. ``notificar`` (ex.: ``event_generate`` no Tk com threads) é
+    chamado no máximo uma vez por consumo e com intervalo mínimo entre avisos,
+    então a UI recebe uma atualização por tick, não uma por item.
+    """
+
+    def __init__(self, notificar=None, intervalo_min_s: float = 1 / 30):
+        self._notificar = notificar
+        self.intervalo_min_s = max(0.0, float(intervalo_min_s))
+        self._lock = Lock()
+        self._estado = None
+        self._aviso_pendente = False
+        self._ultimo_aviso = 0.0
+        self.publicados = 0
+
+    def publicar(self, atual: int, total: int, codigo: str = ""):
+        agora = time.monotonic()
+        with self._lock:
+            self._estado = {"atual": atual, "total": total, "codigo": codigo}
+            self.publicados += 1
+            avisar = not self._aviso_pendente and (agora - self._ultimo_aviso) >= self.intervalo_min_s
+            if avisar:
+                self._aviso_pendente = True
+                self._ultimo_aviso = agora
+        if avisar and self._notificar is not None:
+            self._notificar()
+
+    def consumir(self) -> dict | None:
+        """Retorna o estado mais recente ainda não consumido (ou ``None``)."""
+        with self._lock:
+            estado, self._estado = self._estado, None
+            self._aviso_pendente = False
+            return estado
+
+    def limpar(self):
+        with self._lock:
+            self._estado = None
+            self._aviso_pendente = False
+            self.publicados = 0
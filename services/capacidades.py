@@ -0,0 +1,121 @@
+import json
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+
+ARQUIVO_CAPACIDADES = "logs/capacidades.json"
+# Incrementar quando a sondagem mudar (novos modelos, backends ou amostras) para invalidar caches antigos.
+VERSAO_SONDA = 2
+PACOTES_SONDADOS = ("reportlab", "python-barcode", "qrcode", "Pillow")
+
+# Dados válidos para cada modelo; os demais usam AMOSTRA_PADRAO.
+AMOSTRAS_MODELOS = {
+    "ean8": "1234567",
+    "ean13": "789123456789",
+    "upca": "12345678901",
+    "dun14": "12345678901231",
+    "interleaved2of5": "12345678",
+    "codabar": "A123456A",
+}
+AMOSTRA_PADRAO = "123456789012"
+
+
+def chave_ambiente() -> dict:
+    """Identifica o ambiente: qualquer mudança de interpretador ou de versão de pacote invalida o cache."""
+    versoes = {}
+    for pacote in PACOTES_SONDADOS:
+        try:
+            versoes[pacote] = metadata.version(pacote)
+        except metadata.PackageNotFoundError:
+            versoes[pacote] = None
+    return {
+        "sonda": VERSAO_SONDA,
+        "python": sys.version,
+        "executavel": sys.executable,
+        "plataforma": sys.platform,
+        "pacotes": versoes,
+    }
+
+
+@dataclass(frozen=True)
+class Capacidades:
+    """O que funciona neste ambiente: exportação PDF e o backend raster de cada modelo de código de barras."""
+
+    pdf: bool
+    backends: dict[str, str | None] = field(default_factory=dict)
+
+    @property
+    def barcode(self) -> bool:
+        return any(self.backends.values())
+
+    def modelos_disponiveis(self) -> list[str]:
+        return [modelo for modelo, backend in self.backends.items() if backend]
+
+    def para_dict(self) -> dict:
+        return {"pdf": self.pdf, "backends": dict(self.backends)}
+
+    @classmethod
+    def de_dict(cls, dados: dict) -> "Capacidades":
+        return cls(pdf=bool(dados["pdf"]), backends=dict(dados["backends"]))
+
+
+def sondar_capacidades(barcode_renderer) -> Capacidades:
+    """Testa cada backend de cada modelo com um código real, na ordem de preferência do renderer."""
+    try:
+        from reportlab.pdfgen import canvas as _pdf_canvas  # noqa: F401
+
+        pdf = True
+    except Exception:
+        pdf = False
+
+    backends = {}
+    for modelo in barcode_renderer.MODELOS_SUPORTADOS:
+        backends[modelo] = barcode_renderer.primeiro_backend_funcional(modelo)
+    return Capacidades(pdf=pdf, backends=backends)
+
+
+class CacheCapacidades:
+    """Sonda uma vez por ambiente e guarda o resultado em JSON, junto com a ``chave_ambiente``.
+
+    Um arquivo ausente, ilegível ou de outro ambiente é simplesmente sondado de
+    novo e regravado (de forma atômica, pois workers do pool podem ler ao mesmo tempo).
+    """
+
+    def __init__(self, caminho: str = ARQUIVO_CAPACIDADES):
+        self.caminho = Path(caminho)
+        self._lock = threading.Lock()
+
+    def carregar(self, chave: dict | None = None) -> Capacidades | None:
+        chave = chave if chave is not None else chave_ambiente()
+        try:
+            dados = json.loads(self.caminho.read_text(encoding="utf-8"))
+            if dados.get("chave") != chave:
+                return None
+            return Capacidades.de_dict(dados)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def salvar(self, capacidades: Capacidades, chave: dict | None = None):
+        chave = chave if chave is not None else chave_ambiente()
+        dados = {"chave": chave, "sondado_em": datetime.now(timezone.utc).isoformat(), **capacidades.para_dict()}
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = self.caminho.with_name(f"{self.caminho.name}.{os.getpid()}.tmp")
+        temporario.write_text(json.dumps(dados, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(temporario, self.caminho)
+
+    def obter(self, barcode_renderer) -> Capacidades:
+        with self._lock:
+            chave = chave_ambiente()
+            capacidades = self.carregar(chave)
+            if capacidades is None:
+                capacidades = sondar_capacidades(barcode_renderer)
+                try:
+                    self.salvar(capacidades, chave)
+                except OSError:
+                    # Sem permissão de escrita: o resultado vale só para este processo.
+                    pass
+            return capacidades
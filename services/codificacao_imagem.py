@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+NIVEL_COMPRESSAO_PADRAO = 6
+
+# Tags EXIF de resolução (TIFF 6.0); unidade 2 = polegada.
+_EXIF_X_RESOLUTION = 0x011A
+_EXIF_Y_RESOLUTION = 0x011B
+_EXIF_RESOLUTION_UNIT = 0x0128
+
+
+@dataclass(frozen=True)
+class PerfilCodificacao:
+    nome: str
+    formato: str  # plugin do Pillow
+    extensao: str
+    descricao: str
+
+
+PERFIS_CODIFICACAO = {
+    "png": PerfilCodificacao("png", "PNG", "png", "PNG RGB 24 bits (máxima compatibilidade)"),
+    "png_paleta": PerfilCodificacao("png_paleta", "PNG", "png", "PNG com paleta de 2 cores, 1 bit por pixel"),
+    "png_1bit": PerfilCodificacao("png_1bit", "PNG", "png", "PNG 1 bit por pixel (preto e branco nativo quando o código é preto e branco)"),
+    "webp": PerfilCodificacao("webp", "WEBP", "webp", "WebP sem perdas"),
+}
+PERFIL_PADRAO = "png"
+
+
+def obter_perfil(nome: str) -> PerfilCodificacao:
+    try:
+        return PERFIS_CODIFICACAO[nome]
+    except KeyError:
+        raise ValueError(f"Perfil de codificação desconhecido: {nome}") from None
+
+
+def validar_nivel_compressao(nivel: int) -> int:
+    nivel = int(nivel)
+    if not 0 <= nivel <= 9:
+        raise ValueError("O nível de compressão deve estar entre 0 e 9.")
+    return nivel
+
+
+_PRETO_E_BRANCO = {(0, 0, 0), (255, 255, 255)}
+
+
+def _cores_usadas(imagem: Image.Image) -> list[tuple[int, int, int]] | None:
+    """Cores RGB que a imagem realmente tem, a do canto superior esquerdo (fundo) primeiro; ``None`` se passar de duas."""
+    usadas = imagem.getcolors(2)
+    if usadas is None:
+        return None
+    if imagem.mode in ("1", "L"):
+        cor = {valor: (valor, valor, valor) for _n, valor in usadas}
+    elif imagem.mode == "P":
+        paleta = imagem.getpalette() or []
+        cor = {indice: tuple(paleta[indice * 3 : indice * 3 + 3]) for _n, indice in usadas}
+    else:
+        cor = {valor: tuple(valor[:3]) for _n, valor in usadas}
+    canto = imagem.getpixel((0, 0))
+    return [cor[canto]] + [rgb for valor, rgb in cor.items() if valor != canto]
+
+
+def reduzir_bitonal(imagem: Image.Image, modo: str) -> Image.Image:
+    """Reduz a imagem a 1 bit por pixel sem trocar nenhuma das cores renderizadas.
+
+    ``modo="1"`` grava preto/branco nativo quando essas são as cores da imagem;
+    com outras cores (ex.: QR colorido) usa uma paleta de 2 entradas, que o PNG
+    também grava com 1 bit. ``modo="P"`` sempre usa a paleta ``(fundo, frente)``
+    do que foi renderizado. As cores vêm da imagem, não da configuração: os
+    renderizadores de código de barras ignoram frente/fundo. Imagem com mais de
+    duas cores (ou com alfa) não é reduzida.
+    """
+    from PIL import Image, ImageChops
+
+    if imagem.mode in ("RGBA", "LA", "PA"):
+        return imagem
+    cores = _cores_usadas(imagem)
+    if cores is None:
+        return imagem if imagem.mode == "RGB" else imagem.convert("RGB")
+    if modo == "1" and set(cores) <= _PRETO_E_BRANCO:
+        return imagem if imagem.mode == "1" else imagem.convert("L").convert("1", dither=Image.Dither.NONE)
+    if imagem.mode == "P" and len(imagem.getpalette() or []) == 3 * len(cores):
+        # QR rasterizado já sai com a paleta (fundo, frente).
+        return imagem
+    # Índice 1 onde o pixel não é a cor do fundo, canal a canal.
+    rgb = imagem.convert("RGB")
+    fundo = cores[0]
+    canais = [canal.point([0 if v == alvo else 255 for v in range(256)]) for canal, alvo in zip(rgb.split(), fundo)]
+    diferente = ImageChops.lighter(ImageChops.lighter(canais[0], canais[1]), canais[2])
+    paleta = diferente.point([0] + [1] * 255).convert("P")
+    paleta.putpalette([componente for cor in cores for componente in cor])
+    return paleta
+
+
+def codificar_imagem(
+    imagem: Image.Image,
+    perfil: str = PERFIL_PADRAO,
+    nivel_compressao: int = NIVEL_COMPRESSAO_PADRAO,
+    dpi: int | None = None,
+) -> bytes:
+    """Codifica a imagem no perfil pedido; os perfis bitonais mantêm as cores renderizadas.
+
+    ``nivel_compressao`` (0–9) é o nível zlib do PNG; no WebP sem perdas vira
+    o esforço (``method`` 0–6). Em ambos, mais alto = menos bytes e mais CPU.
+    O ``dpi`` vai no chunk pHYs do PNG; o plugin WebP do Pillow ignora ``dpi=``,
+    então no WebP a resolução é gravada nas tags EXIF X/YResolution.
+    """
+    definicao = obter_perfil(perfil)
+    nivel = validar_nivel_compressao(nivel_compressao)
+    opcoes = {}
+    if definicao.formato == "WEBP":
+        imagem = imagem if imagem.mode in ("RGB", "RGBA") else imagem.convert("RGB")
+        opcoes.update(lossless=True, method=round(nivel * 6 / 9))
+    else:
+        if perfil == "png_1bit":
+            imagem = reduzir_bitonal(imagem, modo="1")
+        elif perfil == "png_paleta":
+            imagem = reduzir_bitonal(imagem, modo="P")
+        elif imagem.mode not in ("RGB", "RGBA"):
+            imagem = imagem.convert("RGB")
+        opcoes["compress_level"] = nivel
+    if dpi and definicao.formato == "WEBP":
+        from PIL import Image
+
+        exif = Image.Exif()
+        exif[_EXIF_X_RESOLUTION] = exif[_EXIF_Y_RESOLUTION] = dpi
+        exif[_EXIF_RESOLUTION_UNIT] = 2
+        opcoes["exif"] = exif.tobytes()
+    elif dpi:
+        opcoes["dpi"] = (dpi, dpi)
+    buffer = io.BytesIO()
+    imagem.save(buffer, format=definicao.formato, **opcoes)
+    return buffer.getvalue()
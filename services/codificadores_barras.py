@@ -0,0 +1,436 @@
+"""Codificadores próprios dos modelos de código de barras: dado -> padrão de módulos.
+
+O padrão é uma string de ``"1"`` (barra) e ``"0"`` (espaço), um caractere por
+módulo; a rasterização escreve cada módulo com a mesma largura inteira em
+pixels, sem passar por PNG intermediário nem pelo renderPM.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from services.validacao import digito_verificador_gs1
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Larguras em módulos, alternando barra/espaço e começando pela barra.
+_CODE128 = (
+    "212222 222122 222221 121223 121322 131222 122213 122312 132212 221213 221312 231212 112232 122132 "
+    "122231 113222 123122 123221 223211 221132 221231 213212 223112 312131 311222 321122 321221 312212 "
+    "322112 322211 212123 212321 232121 111323 131123 131321 112313 132113 132311 211313 231113 231311 "
+    "112133 112331 132131 113123 113321 133121 313121 211331 231131 213113 213311 213131 311123 311321 "
+    "331121 312113 312311 332111 314111 221411 431111 111224 111422 121124 121421 141122 141221 112214 "
+    "112412 122114 122411 142112 142211 241211 221114 413111 241112 134111 111242 121142 121241 114212 "
+    "124112 124211 411212 421112 421211 212141 214121 412121 111143 111341 131141 114113 114311 411113 "
+    "411311 113141 114131 311141 411131 211412 211214 211232"
+).split()
+_CODE128_STOP = "2331112"  # stop + barra de terminação
+_CODE128_INICIO = {"A": 103, "B": 104, "C": 105}
+_CODE128_TROCA = {"A": 101, "B": 100, "C": 99}
+_CODE128_FNC1 = 102
+
+_CODE39_CARACTERES = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ-. $/+%"
+_CODE39 = (
+    "111331311 311311113 113311113 313311111 111331113 311331111 113331111 111311313 311311311 113311311 "
+    "311113113 113113113 313113111 111133113 311133111 113133111 111113313 311113311 113113311 111133311 "
+    "311111133 113111133 313111131 111131133 311131131 113131131 111111333 311111331 113111331 111131331 "
+    "331111113 133111113 333111111 131131113 331131111 133131111 131111313 331111311 133111311 131313111 "
+    "131311131 131113131 111313131"
+).split()
+_CODE39_BORDA = "131131311"  # "*"
+
+# _CODE93 tem 47 entradas: as 4 últimas são os shifts ($) (%) (/) (+) do Full ASCII,
+# que aqui só aparecem como valor dos verificadores C e K.
+_CODE93_CARACTERES = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ-. $/+%"
+_CODE93 = (
+    "131112 111213 111312 111411 121113 121212 121311 111114 131211 141111 211113 211212 211311 221112 "
+    "221211 231111 112113 112212 112311 122112 132111 111123 111222 111321 121122 131121 212112 212211 "
+    "211122 211221 221121 222111 112122 112221 122121 123111 121131 311112 311211 321111 112131 113121 "
+    "211131 121221 312111 311121 122211"
+).split()
+_CODE93_INICIO = "111141"
+_CODE93_FIM = "1111411"  # stop + barra de terminação
+
+# Code 11: larguras de cada caractere (5 elementos), "-" no fim; o início/fim é "S".
+_CODE11_CARACTERES = "0123456789-"
+_CODE11 = "11112 21112 12112 22111 11212 21211 12211 11122 21121 21111 11211".split()
+_CODE11_BORDA = "11221"
+
+# EAN/UPC: larguras do conjunto R (barra primeiro); L tem as mesmas larguras
+# começando pelo espaço e G é R espelhado.
+_EAN_R = "3211 2221 2122 1411 1132 1231 1114 1312 1213 3112".split()
+_EAN_PARIDADE = "LLLLLL LLGLGG LLGGLG LLGGGL LGLLGG LGGLLG LGGGLL LGLGLG LGLGGL LGGLGL".split()
+_EAN_BORDA = "101"
+_EAN_MEIO = "01010"
+
+# ITF e Codabar: "1" = elemento largo. Estreito = 2 módulos e largo = 5 (razão 2,5:1).
+_ESTREITO, _LARGO = 2, 5
+_ITF = "00110 10001 01001 11000 00101 10100 01100 00011 10010 01010".split()
+_CODABAR = {
+    "0": "0000011", "1": "0000110", "2": "0001001", "3": "1100000", "4": "0010010",
+    "5": "1000010", "6": "0100001", "7": "0100100", "8": "0110000", "9": "1001000",
+    "-": "0001100", "$": "0011000", ":": "1000101", "/": "1010001", ".": "1010100",
+    "+": "0010101", "A": "0011010", "B": "0101001", "C": "0001011", "D": "0001110",
+}  # fmt: skip
+_CODABAR_BORDAS = "ABCD"
+
+
+@dataclass(frozen=True)
+class PadraoBarras:
+    """Símbolo linear pronto para desenhar; ``quiet_zone`` em módulos, de cada lado."""
+
+    modulos: str
+    texto: str
+    quiet_zone: int = 10
+    moldura: bool = False  # bearer bars do ITF-14
+
+
+def _larguras(larguras: str, barra_primeiro: bool = True) -> str:
+    """``"3211"`` -> ``"1110110"`` (ou o inverso, começando pelo espaço)."""
+    saida = []
+    barra = barra_primeiro
+    for largura in larguras:
+        saida.append(("1" if barra else "0") * int(largura))
+        barra = not barra
+    return "".join(saida)
+
+
+def _estreito_largo(elementos: str) -> str:
+    return "".join(str(_LARGO if largo == "1" else _ESTREITO) for largo in elementos)
+
+
+# ---------------------------------------------------------------------- #
+#  EAN / UPC                                                             #
+# ---------------------------------------------------------------------- #
+def _completar_gs1(dado: str, tamanho: int) -> str:
+    return dado if len(dado) == tamanho else dado + str(digito_verificador_gs1(dado))
+
+
+def _ean(digitos: str, paridade: str) -> str:
+    meio = len(digitos) // 2
+    esquerda = "".join(
+        _larguras(_EAN_R[int(d)][::-1] if tipo == "G" else _EAN_R[int(d)], barra_primeiro=False)
+        for d, tipo in zip(digitos[:meio], paridade)
+    )
+    direita = "".join(_larguras(_EAN_R[int(d)]) for d in digitos[meio:])
+    return _EAN_BORDA + esquerda + _EAN_MEIO + direita + _EAN_BORDA
+
+
+def codificar_ean13(dado: str) -> PadraoBarras:
+    codigo = _completar_gs1(dado, 13)
+    return PadraoBarras(_ean(codigo[1:], _EAN_PARIDADE[int(codigo[0])]), codigo, quiet_zone=11)
+
+
+def codificar_ean8(dado: str) -> PadraoBarras:
+    codigo = _completar_gs1(dado, 8)
+    return PadraoBarras(_ean(codigo, "LLLL"), codigo, quiet_zone=7)
+
+
+def codificar_upca(dado: str) -> PadraoBarras:
+    # UPC-A é o EAN-13 com o primeiro dígito 0 (paridade toda L).
+    codigo = _completar_gs1(dado, 12)
+    return PadraoBarras(_ean(codigo, "LLLLLL"), codigo, quiet_zone=9)
+
+
+# ---------------------------------------------------------------------- #
+#  ITF (Intercalado 2 de 5 / DUN-14)                                     #
+# ---------------------------------------------------------------------- #
+def _itf(digitos: str) -> str:
+    partes = [_larguras(_estreito_largo("0000"))]
+    for i in range(0, len(digitos), 2):
+        barras, espacos = _ITF[int(digitos[i])], _ITF[int(digitos[i + 1])]
+        partes.append(_larguras(_estreito_largo("".join(b + e for b, e in zip(barras, espacos)))))
+    partes.append(_larguras(_estreito_largo("100")))
+    return "".join(partes)
+
+
+def codificar_interleaved2of5(dado: str) -> PadraoBarras:
+    return PadraoBarras(_itf(dado), dado, quiet_zone=10 * _ESTREITO)
+
+
+def codificar_dun14(dado: str) -> PadraoBarras:
+    return PadraoBarras(_itf(dado), dado, quiet_zone=10 * _ESTREITO, moldura=True)
+
+
+# ---------------------------------------------------------------------- #
+#  Code 39 / Code 93 / Code 11 / Codabar                                 #
+# ---------------------------------------------------------------------- #
+def _indices(dado: str, caracteres: str, nome: str) -> list[int]:
+    try:
+        return [caracteres.index(ch) for ch in dado]
+    except ValueError:
+        raise ValueError(f"{nome} não aceita o caractere informado. Permitidos: {caracteres!r}.") from None
+
+
+def codificar_code39(dado: str) -> PadraoBarras:
+    # Com dígito verificador módulo 43, como o python-barcode já gerava.
+    codigo = dado.upper()
+    indices = _indices(codigo, _CODE39_CARACTERES, "Code 39")
+    indices.append(sum(indices) % 43)
+    simbolos = [_CODE39_BORDA, *(_CODE39[i] for i in indices), _CODE39_BORDA]
+    texto = codigo + _CODE39_CARACTERES[indices[-1]]
+    return PadraoBarras("0".join(_larguras(s) for s in simbolos), texto)
+
+
+def _verificador_ponderado(indices: list[int], peso_maximo: int, modulo: int) -> int:
+    return sum(((i % peso_maximo) + 1) * v for i, v in enumerate(reversed(indices))) % modulo
+
+
+def codificar_code93(dado: str) -> PadraoBarras:
+    codigo = dado.upper()
+    indices = _indices(codigo, _CODE93_CARACTERES, "Code 93")
+    indices.append(_verificador_ponderado(indices, 20, 47))  # C
+    indices.append(_verificador_ponderado(indices, 15, 47))  # K
+    corpo = "".join(_larguras(_CODE93[i]) for i in indices)
+    return PadraoBarras(_larguras(_CODE93_INICIO) + corpo + _larguras(_CODE93_FIM), codigo)
+
+
+def codificar_code11(dado: str) -> PadraoBarras:
+    # Verificador C sempre; K também acima de 10 caracteres (como o reportlab).
+    indices = _indices(dado, _CODE11_CARACTERES, "Code 11")
+    indices.append(_verificador_ponderado(indices, 10, 11))
+    if len(dado) > 10:
+        indices.append(_verificador_ponderado(indices, 9, 11))
+    simbolos = [_CODE11_BORDA, *(_CODE11[i] for i in indices), _CODE11_BORDA]
+    largos = ["".join("1" if largura == "2" else "0" for largura in s) for s in simbolos]
+    separador = _larguras(_estreito_largo("0"), barra_primeiro=False)
+    return PadraoBarras(separador.join(_larguras(_estreito_largo(s)) for s in largos), dado, quiet_zone=10 * _ESTREITO)
+
+
+def codificar_codabar(dado: str) -> PadraoBarras:
+    codigo = dado.upper()
+    if not (len(codigo) >= 2 and codigo[0] in _CODABAR_BORDAS and codigo[-1] in _CODABAR_BORDAS):
+        codigo = f"A{codigo}A"
+    miolo = codigo[1:-1]
+    if any(ch not in _CODABAR or ch in _CODABAR_BORDAS for ch in miolo):
+        raise ValueError("Codabar aceita apenas dígitos e - $ : / . + entre os caracteres de início/fim A-D.")
+    separador = _larguras(_estreito_largo("0"), barra_primeiro=False)
+    return PadraoBarras(
+        separador.join(_larguras(_estreito_largo(_CODABAR[ch])) for ch in codigo), codigo, quiet_zone=10 * _ESTREITO
+    )
+
+
+# ---------------------------------------------------------------------- #
+#  Code 128 / GS1-128                                                    #
+# ---------------------------------------------------------------------- #
+def _digitos_seguidos(dado: str, inicio: int) -> int:
+    fim = inicio
+    while fim < len(dado) and "0" <= dado[fim] <= "9":
+        fim += 1
+    return fim - inicio
+
+
+def _valor_code128(ch: str, conjunto: str) -> int:
+    codigo = ord(ch)
+    if codigo > 127:
+        raise ValueError("Code 128 aceita apenas caracteres ASCII.")
+    if conjunto == "A":
+        return codigo - 32 if codigo >= 32 else codigo + 64
+    return codigo - 32
+
+
+def _conjunto_para(ch: str, atual: str | None) -> str:
+    codigo = ord(ch)
+    if atual == "A" and codigo < 96 or codigo < 32:
+        return "A"
+    return "B"
+
+
+def _valores_code128(dado: str, gs1: bool) -> list[int]:
+    """Valores dos símbolos (início, dados e trocas de conjunto), sem o verificador.
+
+    Sequências de 4+ dígitos nas pontas (6+ no meio) vão para o conjunto C, dois
+    dígitos por símbolo; o resto usa B, ou A para caracteres de controle.
+    No GS1-128, o FNC1 segue o início e o separador GS (``\\x1d``) também vira FNC1.
+    """
+    valores = []
+    conjunto = None
+
+    def trocar(alvo: str):
+        nonlocal conjunto
+        if conjunto is None:
+            valores.append(_CODE128_INICIO[alvo])
+            if gs1:
+                valores.append(_CODE128_FNC1)
+        elif conjunto != alvo:
+            valores.append(_CODE128_TROCA[alvo])
+        conjunto = alvo
+
+    i = 0
+    while i < len(dado):
+        if gs1 and dado[i] == "\x1d":
+            trocar(conjunto or "B")
+            valores.append(_CODE128_FNC1)
+            i += 1
+            continue
+        digitos = _digitos_seguidos(dado, i)
+        if conjunto != "C":
+            nas_pontas = i == 0 or i + digitos == len(dado)
+            if digitos >= 6 or (digitos >= 4 and nas_pontas) or (digitos == 2 == len(dado)):
+                if digitos % 2:
+                    # Dígito ímpar fica no conjunto atual; os pares seguem em C.
+                    trocar(_conjunto_para(dado[i], conjunto))
+                    valores.append(_valor_code128(dado[i], conjunto))
+                    i += 1
+                    digitos -= 1
+                trocar("C")
+        if conjunto == "C" and digitos >= 2:
+            while digitos >= 2:
+                valores.append(int(dado[i : i + 2]))
+                i += 2
+                digitos -= 2
+            continue
+        trocar(_conjunto_para(dado[i], conjunto))
+        valores.append(_valor_code128(dado[i], conjunto))
+        i += 1
+    return valores
+
+
+def _code128(dado: str, gs1: bool = False) -> PadraoBarras:
+    valores = _valores_code128(dado, gs1)
+    valores.append((valores[0] + sum(i * v for i, v in enumerate(valores[1:], start=1))) % 103)
+    modulos = "".join(_larguras(_CODE128[v]) for v in valores) + _larguras(_CODE128_STOP)
+    return PadraoBarras(modulos, dado.replace("\x1d", " "))
+
+
+def codificar_code128(dado: str) -> PadraoBarras:
+    return _code128(dado)
+
+
+def codificar_gs1128(dado: str) -> PadraoBarras:
+    return _code128(dado, gs1=True)
+
+
+CODIFICADORES = {
+    "ean13": codificar_ean13,
+    "dun14": codificar_dun14,
+    "upca": codificar_upca,
+    "code11": codificar_code11,
+    "code39": codificar_code39,
+    "code93": codificar_code93,
+    "ean8": codificar_ean8,
+    "interleaved2of5": codificar_interleaved2of5,
+    "code128": codificar_code128,
+    "gs1128": codificar_gs1128,
+    "codabar": codificar_codabar,
+}
+MODELOS_MATRICIAIS = ("datamatrix",)
+
+
+def codificar(dado: str, modelo: str) -> PadraoBarras:
+    try:
+        codificador = CODIFICADORES[modelo]
+    except KeyError:
+        raise ValueError(f"Modelo '{modelo}' não é linear.") from None
+    return codificador(dado)
+
+
+def matriz_datamatrix(dado: str) -> list[list[int]]:
+    """Módulos do Data Matrix ECC 200, linha de cima primeiro, sem a quiet zone.
+
+    Só a codificação vem do reportlab (Python puro); o desenho é nosso, sem renderPM.
+    """
+    from reportlab.graphics.barcode.ecc200datamatrix import ECC200DataMatrix
+
+    simbolo = ECC200DataMatrix(value=dado)
+    simbolo.validate()
+    simbolo.encode()
+    # O reportlab guarda as linhas de baixo para cima (origem do PDF).
+    return [list(linha) for linha in reversed(simbolo.encoded)]
+
+
+# ---------------------------------------------------------------------- #
+#  Rasterização                                                          #
+# ---------------------------------------------------------------------- #
+_PROPORCAO_BARRAS = 0.35  # altura das barras / largura do símbolo com keep_ratio
+
+
+@lru_cache(maxsize=16)
+def _fonte(tamanho: int):
+    # Carregar a fonte custa mais que desenhar as barras: uma por tamanho, reaproveitada.
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.load_default(size=tamanho)
+    except TypeError:  # Pillow < 10.1: fonte bitmap de tamanho fixo
+        return ImageFont.load_default()
+
+
+def _linha_de_modulos(modulos: str, modulo_px: int) -> bytes:
+    # 0 = barra (preto), 255 = espaço; cada módulo vira exatamente modulo_px pixels.
+    return b"".join((b"\x00" if m == "1" else b"\xff") * modulo_px for m in modulos)
+
+
+def rasterizar_padrao(padrao: PadraoBarras, width_px: int, height_px: int, keep_ratio: bool) -> Image.Image:
+    """Desenha o padrão em modo "L" com barras de largura inteira (mesmo número de pixels por módulo).
+
+    O módulo é o maior inteiro que cabe na largura pedida; o símbolo fica
+    centralizado. Só quando a largura não comporta 1 px por módulo é que o
+    resultado é reduzido (NEAREST) a partir de 1 px por módulo. Nada aqui cria
+    tons intermediários: o texto também é desenhado sem antialiasing.
+    """
+    from PIL import Image, ImageDraw
+
+    width_px = max(1, width_px)
+    height_px = max(1, height_px)
+    total_modulos = len(padrao.modulos) + 2 * padrao.quiet_zone
+    modulo_px = max(1, width_px // total_modulos)
+    largura_simbolo = total_modulos * modulo_px
+    largura_canvas = max(width_px, largura_simbolo)
+
+    altura_texto = round(height_px * 0.18) if padrao.texto and height_px >= 40 else 0
+    espessura = 2 * _ESTREITO * modulo_px if padrao.moldura else 0
+    altura_barras = height_px - altura_texto - 2 * espessura
+    if keep_ratio:
+        altura_barras = min(altura_barras, round(largura_simbolo * _PROPORCAO_BARRAS))
+    altura_barras = max(1, altura_barras)
+    altura_total = altura_barras + 2 * espessura + altura_texto
+    x0 = (largura_canvas - largura_simbolo) // 2
+    y0 = max(0, (height_px - altura_total) // 2)
+
+    linha = _linha_de_modulos("0" * padrao.quiet_zone + padrao.modulos + "0" * padrao.quiet_zone, modulo_px)
+    barras = Image.frombytes("L", (largura_simbolo, 1), linha).resize((largura_simbolo, altura_barras), Image.Resampling.NEAREST)
+    canvas = Image.new("L", (largura_canvas, max(height_px, altura_total)), 255)
+    canvas.paste(barras, (x0, y0 + espessura))
+
+    desenho = ImageDraw.Draw(canvas)
+    desenho.fontmode = "1"
+    if espessura:
+        y_fim = y0 + altura_barras + 2 * espessura - 1
+        for i in range(espessura):
+            desenho.rectangle((x0 + i, y0 + i, x0 + largura_simbolo - 1 - i, y_fim - i), outline=0)
+    if altura_texto:
+        fonte = _fonte(max(8, round(altura_texto * 0.8)))
+        centro_x = x0 + largura_simbolo / 2
+        topo_texto = y0 + altura_barras + 2 * espessura
+        desenho.text((centro_x, topo_texto + altura_texto / 2), padrao.texto, fill=0, font=fonte, anchor="mm")
+
+    if canvas.size != (width_px, height_px):
+        canvas = canvas.resize((width_px, height_px), Image.Resampling.NEAREST)
+    return canvas
+
+
+def rasterizar_matriz(matriz, width_px: int, height_px: int, quiet_zone: int = 1) -> Image.Image:
+    """Data Matrix em modo "L", módulos quadrados de pixels inteiros (sempre mantém a proporção)."""
+    from PIL import Image
+
+    width_px = max(1, width_px)
+    height_px = max(1, height_px)
+    linhas, colunas = len(matriz) + 2 * quiet_zone, len(matriz[0]) + 2 * quiet_zone
+    modulo_px = max(1, min(width_px // colunas, height_px // linhas))
+    borda = b"\xff" * quiet_zone
+    dados = b"".join(
+        borda + bytes(0 if escuro else 255 for escuro in linha) + borda
+        for linha in [[0] * (colunas - 2 * quiet_zone)] * quiet_zone + matriz + [[0] * (colunas - 2 * quiet_zone)] * quiet_zone
+    )
+    modulos = Image.frombytes("L", (colunas, linhas), dados)
+    simbolo = modulos.resize((colunas * modulo_px, linhas * modulo_px), Image.Resampling.NEAREST)
+    if simbolo.width > width_px or simbolo.height > height_px:
+        escala = min(width_px / simbolo.width, height_px / simbolo.height)
+        simbolo = simbolo.resize((max(1, round(simbolo.width * escala)), max(1, round(simbolo.height * escala))), Image.Resampling.NEAREST)
+    canvas = Image.new("L", (width_px, height_px), 255)
+    canvas.paste(simbolo, ((width_px - simbolo.width) // 2, (height_px - simbolo.height) // 2))
+    return canvas
@@ -1,25 +1,62 @@
+import hashlib
+import os
+import zipfile
+
 from models.geracao_config import GeracaoConfig
+from services.capacidades import CacheCapacidades, Capacidades
+from services.codificacao_imagem import codificar_imagem, obter_perfil, validar_nivel_compressao
 from services.data_importer import DataImporter
+from services.escritor_svg import SimboloSvg, cor_svg, documento_codigo
+from services.histograma_etapas import HistogramaEtapas
+from services.render_cache import RenderCache
+from services.render_pool import RenderPool
 from services.renderers import BarcodeRenderer, QRCodeRenderer
+from services.validacao import RelatorioValidacao, ValidacaoEmFluxo, validar_coluna
 
 
 class CodigoService:
     """Camada de negócio orquestrando importação, validação e renderização."""
 
     DPI_PADRAO = 200
+    # Formatos já comprimidos: deflate gasta CPU sem reduzir o tamanho.
+    EXTENSOES_ZIP_SEM_COMPRESSAO = {".png", ".webp", ".svgz", ".gif", ".jpg", ".jpeg"}
     BARCODE_MODELOS_SUPORTADOS = BarcodeRenderer.MODELOS_SUPORTADOS
 
-    def __init__(self):
+    def __init__(self, workers: int | None = None, cache_max_bytes: int = 64 * 1024 * 1024):
         self.data_importer = DataImporter()
         self.qr_renderer = QRCodeRenderer(self.DPI_PADRAO)
         self.barcode_renderer = BarcodeRenderer(self.DPI_PADRAO)
+        self.render_cache = RenderCache(cache_max_bytes)
+        self.render_pool = RenderPool(workers)
+        self.cache_capacidades = CacheCapacidades()
+        self.capacidades: Capacidades | None = None
+
+    def obter_capacidades(self) -> Capacidades:
+        """Capacidades do ambiente, sondadas uma vez (cache em disco) e aplicadas ao renderer de barras."""
+        if self.capacidades is None:
+            capacidades = self.cache_capacidades.obter(self.barcode_renderer)
+            self.barcode_renderer.definir_backends(capacidades.backends)
+            self.capacidades = capacidades
+        return self.capacidades
+
+    def iniciar_job(self, cfg: GeracaoConfig) -> str:
+        """Resolve o backend do job uma vez (antes do primeiro item) e o devolve para as métricas.
+
+        QR Code sempre usa a biblioteca ``qrcode``; para códigos de barras é o
+        backend escolhido para o modelo, ou ``""`` se nenhum funciona aqui.
+        """
+        if cfg.tipo_codigo != "barcode":
+            return QRCodeRenderer.BACKEND_QRCODE
+        self.obter_capacidades()
+        self.barcode_renderer.iniciar_job()
+        return self.barcode_renderer.resolver_backend(cfg.barcode_model or "code128") or ""
 
     @staticmethod
     def formatar_excecao(exc: Exception, contexto: str) -> str:
         return DataImporter.formatar_excecao(exc, contexto)
 
-    def carregar_tabela(self, caminho):
-        return self.data_importer.carregar_tabela(caminho)
+    def carregar_tabela(self, caminho, planilha: str | None = None):
+        return self.data_importer.carregar_tabela(caminho, planilha)
 
     def obter_colunas(self, tabela):
         return self.data_importer.obter_colunas(tabela)
@@ -27,6 +64,18 @@ class CodigoService:
     def obter_valores_coluna(self, tabela, coluna):
         return self.data_importer.obter_valores_coluna(tabela, coluna)
 
+    def iterar_valores_coluna(self, tabela, coluna):
+        return self.data_importer.iterar_valores_coluna(tabela, coluna)
+
+    def iterar_valores_texto(self, arquivo, coluna: str | None = None):
+        return self.data_importer.iterar_valores_texto(arquivo, coluna)
+
+    def estimar_total_linhas(self, tabela):
+        return self.data_importer.estimar_total_linhas(tabela)
+
+    def obter_planilhas(self, tabela):
+        return self.data_importer.obter_planilhas(tabela)
+
     @staticmethod
     def sanitizar_nome_arquivo(nome: str, fallback: str) -> str:
         nome_limpo = "".join("_" if c in '\\/:*?"<>|' else c for c in str(nome))
@@ -48,12 +97,18 @@ class CodigoService:
         ]
 
     @staticmethod
-    def validar_parametros_geracao(codigos, cfg: GeracaoConfig):
-        if not isinstance(codigos, list) or not codigos:
+    def excede_limite_lote(total: int | None, cfg: GeracaoConfig) -> bool:
+        """Limite de lote é só um aviso: o pipeline em fluxo mantém a memória constante."""
+        return bool(total) and total > cfg.max_codigos_por_lote
+
+    @staticmethod
+    def validar_config_geracao(total: int, cfg: GeracaoConfig):
+        if not total:
             raise ValueError("Nenhum código válido foi encontrado para geração.")
-        if len(codigos) > cfg.max_codigos_por_lote:
-            raise ValueError(f"Limite excedido: máximo de {cfg.max_codigos_por_lote} códigos por geração.")
+        CodigoService.validar_dimensoes(cfg)
 
+    @staticmethod
+    def validar_dimensoes(cfg: GeracaoConfig):
         if cfg.qr_width_cm <= 0 or cfg.qr_height_cm <= 0:
             raise ValueError("Tamanho de QR inválido. Informe largura/altura em cm maiores que zero.")
         if cfg.barcode_width_cm <= 0 or cfg.barcode_height_cm <= 0:
@@ -65,30 +120,105 @@ class CodigoService:
             raise ValueError("Tamanho de QR inválido. Use valores até 30 cm.")
         if cfg.barcode_width_cm > 40 or cfg.barcode_height_cm > 20:
             raise ValueError("Tamanho de código de barras inválido. Use até 40x20 cm.")
+        obter_perfil(cfg.perfil_codificacao)
+        validar_nivel_compressao(cfg.nivel_compressao)
 
-        validos = []
-        invalidos = 0
-        for bruto in codigos:
-            dado = CodigoService.normalizar_dado(bruto, cfg)
-            if not dado or not dado.strip() or len(dado) > cfg.max_tamanho_dado:
-                invalidos += 1
-                continue
-            if cfg.tipo_codigo == "barcode" and any(ord(ch) < 32 for ch in dado):
-                invalidos += 1
-                continue
-            if cfg.tipo_codigo == "barcode":
-                try:
-                    BarcodeRenderer.validar_modelo(dado.strip(), cfg.barcode_model)
-                except ValueError:
-                    invalidos += 1
-                    continue
-            validos.append(str(bruto))
-
-        if not validos:
+    @staticmethod
+    def validar_coluna_detalhado(codigos, cfg: GeracaoConfig) -> RelatorioValidacao:
+        """Valida a coluna inteira de uma vez e retorna o relatório de rejeição por motivo/linha."""
+        if codigos is None:
+            codigos = []
+        CodigoService.validar_config_geracao(len(codigos), cfg)
+        relatorio = validar_coluna(codigos, cfg)
+        if not relatorio.validos:
             raise ValueError("Todos os dados foram rejeitados pela validação de entrada.")
-        return validos, invalidos
+        return relatorio
+
+    @staticmethod
+    def validar_bloco(codigos, cfg: GeracaoConfig) -> RelatorioValidacao:
+        """Valida um trecho da coluna sem exigir que algum item seja aceito."""
+        return validar_coluna(codigos, cfg)
+
+    @staticmethod
+    def validar_em_fluxo(
+        valores, cfg: GeracaoConfig, total_estimado: int | None = None, histograma: HistogramaEtapas | None = None
+    ) -> ValidacaoEmFluxo:
+        CodigoService.validar_dimensoes(cfg)
+        return ValidacaoEmFluxo(valores, cfg, total_estimado=total_estimado, histograma=histograma)
+
+    @staticmethod
+    def validar_parametros_geracao(codigos, cfg: GeracaoConfig):
+        relatorio = CodigoService.validar_coluna_detalhado(codigos, cfg)
+        return relatorio.validos, relatorio.invalidos
+
+    def gerar_imagem_obj(self, dado: str, cfg: GeracaoConfig, histograma: HistogramaEtapas | None = None):
+        chave = (dado, cfg.campos_render())
+        imagem = self.render_cache.obter(chave)
+        if imagem is not None:
+            return imagem
+        if cfg.tipo_codigo == "barcode":
+            self.obter_capacidades()
+            imagem = self.barcode_renderer.render(dado, cfg, histograma)
+        else:
+            imagem = self.qr_renderer.render(dado, cfg, histograma)
+        self.render_cache.guardar(chave, imagem)
+        return imagem
+
+    def desenhar_codigo_pdf(self, pdf, dado: str, cfg: GeracaoConfig, x: float, y: float, largura: float, altura: float):
+        renderer = self.barcode_renderer if cfg.tipo_codigo == "barcode" else self.qr_renderer
+        renderer.desenhar_pdf(pdf, dado, cfg, x, y, largura, altura)
+
+    @staticmethod
+    def chave_conteudo(dado: str, cfg: GeracaoConfig) -> str:
+        """Hash estável do conteúdo visual de um item (payload + campos de render)."""
+        return hashlib.sha1(repr((dado, cfg.campos_render(), cfg.pdf_vetorial)).encode("utf-8")).hexdigest()
+
+    def estatisticas_cache(self) -> dict:
+        return self.render_cache.estatisticas()
+
+    @classmethod
+    def codificar_imagem(cls, imagem, cfg: GeracaoConfig | None = None) -> bytes:
+        """Codifica no perfil de ``cfg`` (PNG RGB sem ``cfg``), com o DPI usado na renderização."""
+        if cfg is None:
+            return codificar_imagem(imagem, dpi=cls.DPI_PADRAO)
+        return codificar_imagem(imagem, cfg.perfil_codificacao, cfg.nivel_compressao, cls.DPI_PADRAO)
+
+    @staticmethod
+    def extensao_imagem(cfg: GeracaoConfig) -> str:
+        return obter_perfil(cfg.perfil_codificacao).extensao
+
+    def codificar_svg(self, dado: str, cfg: GeracaoConfig) -> bytes:
+        """SVG de um código no tamanho do item, com um único path por símbolo."""
+        largura_mm, altura_mm, manter = self.dimensoes_item_mm(cfg)
+        return documento_codigo(
+            self.simbolo_svg(dado, cfg), largura_mm, altura_mm, manter, cor_svg(cfg.foreground), cor_svg(cfg.background)
+        )
+
+    @staticmethod
+    def dimensoes_item_mm(cfg: GeracaoConfig) -> tuple[float, float, bool]:
+        """Largura e altura do item em mm, e se a proporção do código deve ser mantida."""
+        if cfg.tipo_codigo == "barcode":
+            return cfg.barcode_width_cm * 10, cfg.barcode_height_cm * 10, cfg.keep_barcode_ratio
+        return cfg.qr_width_cm * 10, cfg.qr_height_cm * 10, cfg.keep_qr_ratio
+
+    def simbolo_svg(self, dado: str, cfg: GeracaoConfig) -> SimboloSvg:
+        if cfg.tipo_codigo == "barcode":
+            return self.barcode_renderer.simbolo_svg(dado, cfg)
+        return self.qr_renderer.simbolo_svg(dado)
+
+    def aquecer_render_pool(self):
+        if self.render_pool.workers > 1:
+            self.render_pool.aquecer()
+
+    @classmethod
+    def escolher_compressao_zip(cls, nome_entrada: str) -> int:
+        extensao = os.path.splitext(nome_entrada)[1].lower()
+        if extensao in cls.EXTENSOES_ZIP_SEM_COMPRESSAO:
+            return zipfile.ZIP_STORED
+        return zipfile.ZIP_DEFLATED
 
-    def gerar_imagem_obj(self, dado: str, cfg: GeracaoConfig):
+    def renderizar_lote(self, dados, cfg: GeracaoConfig, cancelar_evento=None, histograma: HistogramaEtapas | None = None):
         if cfg.tipo_codigo == "barcode":
-            return self.barcode_renderer.render(dado, cfg)
-        return self.qr_renderer.render(dado, cfg)
+            # Garante o cache em disco antes de os workers lerem, em vez de cada um sondar.
+            self.obter_capacidades()
+        return self.render_pool.renderizar(dados, cfg, cancelar_evento, histograma)
@@ -1,4 +1,125 @@
 import csv
+import zipfile
+
+EXTENSOES_XLSX = (".xlsx", ".xlsm")
+EXTENSOES_PARQUET = (".parquet", ".pq")
+EXTENSOES_ARROW = (".arrow", ".feather", ".ipc")
+
+
+class TabelaXlsx:
+    """Planilha XLSX aberta de forma preguiçosa em modo somente leitura do openpyxl.
+
+    Na abertura lê apenas os nomes das abas e a linha de cabeçalho; os valores de
+    uma coluna são lidos sob demanda, linha a linha, sem carregar as demais células.
+    """
+
+    def __init__(self, caminho: str, planilha: str | None = None):
+        self.caminho = caminho
+        workbook = self._abrir()
+        try:
+            self.planilhas = list(workbook.sheetnames)
+            self.planilha = planilha if planilha is not None else self.planilhas[0]
+            if self.planilha not in self.planilhas:
+                raise ValueError(f"Aba não encontrada: {self.planilha}")
+            worksheet = workbook[self.planilha]
+            cabecalho = next(worksheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+            self.columns = self._nomear_colunas(cabecalho)
+            self.total_linhas_estimado = max(0, (worksheet.max_row or 1) - 1)
+        finally:
+            workbook.close()
+
+    def _abrir(self):
+        from openpyxl import load_workbook
+
+        return load_workbook(self.caminho, read_only=True, data_only=True)
+
+    @staticmethod
+    def _nomear_colunas(cabecalho) -> list[str]:
+        """Nomeia as colunas como o pandas: vazias viram ``Unnamed: i`` e repetidas ganham sufixo ``.n``."""
+        valores = list(cabecalho)
+        while valores and valores[-1] is None:
+            valores.pop()
+        nomes = []
+        vistos = {}
+        for indice, valor in enumerate(valores):
+            nome = f"Unnamed: {indice}" if valor is None else str(valor)
+            repeticoes = vistos.get(nome, 0)
+            vistos[nome] = repeticoes + 1
+            nomes.append(nome if repeticoes == 0 else f"{nome}.{repeticoes}")
+        return nomes
+
+    def iterar_valores_coluna(self, coluna):
+        """Gera os valores não vazios da coluna, em ordem, com memória constante."""
+        indice = self.columns.index(str(coluna)) + 1
+        workbook = self._abrir()
+        try:
+            linhas = workbook[self.planilha].iter_rows(min_row=2, min_col=indice, max_col=indice, values_only=True)
+            for (valor,) in linhas:
+                if valor is not None:
+                    yield str(valor)
+        finally:
+            workbook.close()
+
+
+class TabelaColunar:
+    """Arquivo Parquet ou Arrow IPC/Feather lido via pyarrow com memory-map.
+
+    As colunas vêm apenas do schema (nenhum dado é lido na abertura) e a leitura
+    de valores projeta somente a coluna escolhida, lote a lote.
+    """
+
+    TAMANHO_LOTE = 65536
+
+    def __init__(self, caminho: str, formato: str):
+        self.caminho = caminho
+        self.formato = formato
+        if formato == "parquet":
+            import pyarrow.parquet as pq
+
+            metadados = pq.read_metadata(caminho, memory_map=True)
+            self.columns = list(metadados.schema.to_arrow_schema().names)
+            self.total_linhas_estimado = metadados.num_rows
+        else:
+            import pyarrow as pa
+
+            with pa.memory_map(caminho, "r") as origem:
+                leitor = pa.ipc.open_file(origem)
+                self.columns = list(leitor.schema.names)
+                self.total_linhas_estimado = sum(
+                    leitor.get_batch(i).num_rows for i in range(leitor.num_record_batches)
+                )
+
+    def _iterar_lotes(self, coluna):
+        if self.formato == "parquet":
+            import pyarrow.parquet as pq
+
+            arquivo = pq.ParquetFile(self.caminho, memory_map=True)
+            try:
+                for lote in arquivo.iter_batches(batch_size=self.TAMANHO_LOTE, columns=[coluna]):
+                    yield lote.column(0)
+            finally:
+                arquivo.close()
+            return
+
+        import pyarrow as pa
+
+        with pa.memory_map(self.caminho, "r") as origem:
+            leitor = pa.ipc.open_file(origem)
+            indice = leitor.schema.get_field_index(coluna)
+            for i in range(leitor.num_record_batches):
+                yield leitor.get_batch(i).column(indice)
+
+    def iterar_valores_coluna(self, coluna):
+        """Gera os valores não nulos da coluna, em ordem, um lote por vez."""
+        coluna = str(coluna)
+        if coluna not in self.columns:
+            raise KeyError(coluna)
+        for valores in self._iterar_lotes(coluna):
+            for valor in valores.drop_null().to_pylist():
+                yield str(valor)
+
+
+TABELAS_PREGUICOSAS = (TabelaXlsx, TabelaColunar)
 
 
 class DataImporter:
@@ -8,7 +129,7 @@ class DataImporter:
     def formatar_excecao(exc: Exception, contexto: str) -> str:
         return f"{contexto}: {exc}"
 
-    def carregar_tabela(self, caminho):
+    def carregar_tabela(self, caminho, planilha: str | None = None):
         if caminho.lower().endswith(".csv"):
             try:
                 import pandas as pd
@@ -23,6 +144,26 @@ class DataImporter:
             except (OSError, UnicodeDecodeError, ValueError) as exc:
                 raise RuntimeError(self.formatar_excecao(exc, "Falha ao carregar CSV")) from exc
 
+        extensao = caminho.lower()
+        if extensao.endswith(EXTENSOES_PARQUET + EXTENSOES_ARROW):
+            formato = "parquet" if extensao.endswith(EXTENSOES_PARQUET) else "arrow"
+            try:
+                return TabelaColunar(caminho, formato)
+            except ImportError as exc:
+                raise RuntimeError(
+                    "Falha ao carregar Parquet/Arrow. Instale o pacote opcional 'pyarrow' no ambiente."
+                ) from exc
+            except (OSError, ValueError) as exc:
+                raise RuntimeError(self.formatar_excecao(exc, "Falha ao carregar Parquet/Arrow")) from exc
+
+        if extensao.endswith(EXTENSOES_XLSX):
+            try:
+                return TabelaXlsx(caminho, planilha)
+            except ImportError as exc:
+                raise RuntimeError("Falha ao carregar Excel. Instale/repare 'openpyxl' no ambiente.") from exc
+            except (OSError, ValueError, KeyError, zipfile.BadZipFile) as exc:
+                raise RuntimeError(self.formatar_excecao(exc, "Falha ao carregar Excel")) from exc
+
         try:
             import pandas as pd
 
@@ -45,14 +186,56 @@ class DataImporter:
         return []
 
     @staticmethod
-    def obter_valores_coluna(tabela, coluna):
-        if hasattr(tabela, "__getitem__") and hasattr(tabela, "columns"):
-            return [str(v) for v in tabela[coluna].dropna().tolist()]
-        if isinstance(tabela, list):
-            vals = []
+    def obter_planilhas(tabela) -> list[str]:
+        return list(tabela.planilhas) if isinstance(tabela, TabelaXlsx) else []
+
+    @staticmethod
+    def estimar_total_linhas(tabela) -> int | None:
+        """Quantidade de linhas conhecida sem ler os dados (``None`` quando não há estimativa)."""
+        if isinstance(tabela, TABELAS_PREGUICOSAS):
+            return tabela.total_linhas_estimado
+        if hasattr(tabela, "__len__"):
+            return len(tabela)
+        return None
+
+    @staticmethod
+    def iterar_valores_coluna(tabela, coluna):
+        if isinstance(tabela, TABELAS_PREGUICOSAS):
+            yield from tabela.iterar_valores_coluna(coluna)
+        elif hasattr(tabela, "__getitem__") and hasattr(tabela, "columns"):
+            for valor in tabela[coluna].dropna():
+                yield str(valor)
+        elif isinstance(tabela, list):
             for linha in tabela:
                 valor = linha.get(coluna)
                 if valor is not None and str(valor).strip() != "":
-                    vals.append(str(valor))
-            return vals
-        return []
+                    yield str(valor)
+
+    @staticmethod
+    def iterar_valores_texto(arquivo, coluna: str | None = None):
+        """Valores de um fluxo de texto (ex.: stdin), lidos sob demanda.
+
+        Com ``coluna``, o fluxo é um CSV com cabeçalho; sem ela, cada linha não vazia é um valor.
+        """
+        if coluna is None:
+            for linha in arquivo:
+                valor = linha.rstrip("\r\n")
+                if valor.strip():
+                    yield valor
+            return
+
+        leitor = csv.DictReader(arquivo)
+        if coluna not in (leitor.fieldnames or []):
+            raise ValueError(f"Coluna '{coluna}' não encontrada no CSV de entrada.")
+        for linha in leitor:
+            valor = linha.get(coluna)
+            if valor is not None and valor.strip() != "":
+                yield valor
+
+    @staticmethod
+    def obter_valores_coluna(tabela, coluna):
+        if isinstance(tabela, TABELAS_PREGUICOSAS):
+            return list(tabela.iterar_valores_coluna(coluna))
+        if hasattr(tabela, "__getitem__") and hasattr(tabela, "columns"):
+            return [str(v) for v in tabela[coluna].dropna().tolist()]
+        return list(DataImporter.iterar_valores_coluna(tabela, coluna))
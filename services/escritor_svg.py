@@ -0,0 +1,156 @@
+import gzip
+from dataclasses import dataclass
+from xml.sax.saxutils import escape
+
+# Folha A4 em milímetros, com a mesma grade do PDF (margem 20 mm, espaço 10 mm).
+PAGINA_A4_MM = (210.0, 297.0)
+MARGEM_FOLHA_MM = 20.0
+ESPACO_FOLHA_MM = 10.0
+
+QUIET_ZONE_MODULOS = 10
+_CABECALHO = '<?xml version="1.0" encoding="UTF-8"?>\n'
+
+
+def _n(valor: float) -> str:
+    """Número compacto: até 3 casas, sem zeros à direita."""
+    texto = f"{valor:.3f}".rstrip("0").rstrip(".")
+    return texto if texto not in ("", "-0") else "0"
+
+
+def cor_svg(cor: str) -> str:
+    """Converte nomes/cores aceitos pelo Tk/Pillow para ``#rrggbb``."""
+    from PIL import ImageColor
+
+    r, g, b = ImageColor.getrgb(cor)[:3]
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+@dataclass(frozen=True)
+class SimboloSvg:
+    """Um código já vetorizado, no sistema de coordenadas próprio (``viewBox 0 0 largura altura``).
+
+    ``corpo`` não define cor: herda ``fill``/``color`` de quem o posiciona.
+    """
+
+    largura: float
+    altura: float
+    corpo: str
+
+
+def simbolo_qr(segmentos, n: int) -> SimboloSvg:
+    """QR como um único path; ``segmentos`` são ``(linha, coluna, comprimento)`` de módulos escuros."""
+    d = "".join(f"M{coluna} {linha}h{comprimento}v1h-{comprimento}z" for linha, coluna, comprimento in segmentos)
+    return SimboloSvg(n, n, f'<path d="{d}"/>')
+
+
+def simbolo_barras(
+    padrao: str, texto: str | None = None, moldura: bool = False, quiet_zone: int = QUIET_ZONE_MODULOS
+) -> SimboloSvg:
+    """Código linear como um único path a partir do padrão de módulos (``"1"`` = barra)."""
+    largura = len(padrao) + 2 * quiet_zone
+    altura_barras = round(largura * 0.35)
+    # Bearer bars do ITF-14: moldura de 2 módulos ao redor das barras e da quiet zone.
+    espessura = 2 if moldura else 0
+    partes = []
+    inicio = None
+    for i, modulo in enumerate(padrao + "0"):
+        if modulo == "1" and inicio is None:
+            inicio = i
+        elif modulo != "1" and inicio is not None:
+            comprimento = i - inicio
+            partes.append(f"M{inicio + quiet_zone} {espessura}h{comprimento}v{altura_barras}h-{comprimento}z")
+            inicio = None
+    corpo = [f'<path d="{"".join(partes)}"/>']
+    altura = altura_barras + 2 * espessura
+    if moldura:
+        corpo.append(
+            f'<rect x="1" y="1" width="{largura - 2}" height="{altura - 2}" fill="none" stroke="currentColor" stroke-width="2"/>'
+        )
+    if texto:
+        fonte = largura * 0.08
+        corpo.append(
+            f'<text x="{_n(largura / 2)}" y="{_n(altura + fonte * 1.05)}" font-family="monospace" '
+            f'font-size="{_n(fonte)}" text-anchor="middle">{escape(texto)}</text>'
+        )
+        altura += fonte * 1.3
+    return SimboloSvg(largura, altura, "".join(corpo))
+
+
+def _definir_simbolo(id_simbolo: str, simbolo: SimboloSvg, manter_proporcao: bool) -> str:
+    proporcao = "xMidYMid meet" if manter_proporcao else "none"
+    return (
+        f'<symbol id="{id_simbolo}" viewBox="0 0 {_n(simbolo.largura)} {_n(simbolo.altura)}" '
+        f'preserveAspectRatio="{proporcao}">{simbolo.corpo}</symbol>'
+    )
+
+
+def _posicionar(id_simbolo: str, x: float, y: float, largura: float, altura: float, frente: str, fundo: str) -> str:
+    return (
+        f'<rect x="{_n(x)}" y="{_n(y)}" width="{_n(largura)}" height="{_n(altura)}" fill="{fundo}"/>'
+        f'<use xlink:href="#{id_simbolo}" x="{_n(x)}" y="{_n(y)}" width="{_n(largura)}" height="{_n(altura)}" '
+        f'fill="{frente}" color="{frente}"/>'
+    )
+
+
+def documento_svg(largura_mm: float, altura_mm: float, elementos) -> bytes:
+    """Documento SVG em milímetros (1 unidade do ``viewBox`` = 1 mm)."""
+    return (
+        _CABECALHO
+        + f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{_n(largura_mm)}mm" height="{_n(altura_mm)}mm" viewBox="0 0 {_n(largura_mm)} {_n(altura_mm)}" '
+        f'shape-rendering="crispEdges">'
+        + "".join(elementos)
+        + "</svg>\n"
+    ).encode("utf-8")
+
+
+def documento_codigo(simbolo: SimboloSvg, largura_mm: float, altura_mm: float, manter_proporcao: bool, frente: str, fundo: str) -> bytes:
+    return documento_svg(
+        largura_mm,
+        altura_mm,
+        (_definir_simbolo("c", simbolo, manter_proporcao), _posicionar("c", 0, 0, largura_mm, altura_mm, frente, fundo)),
+    )
+
+
+def comprimir_svgz(conteudo: bytes) -> bytes:
+    # mtime fixo: o mesmo SVG gera sempre os mesmos bytes (o registro de retomada compara hashes).
+    return gzip.compress(conteudo, compresslevel=9, mtime=0)
+
+
+class FolhaSvg:
+    """Uma folha A4 em SVG com a grade do PDF; códigos repetidos na folha viram ``<use>`` do mesmo ``<symbol>``."""
+
+    def __init__(self, item_largura_mm: float, item_altura_mm: float, manter_proporcao: bool, frente: str, fundo: str):
+        self.item_largura = item_largura_mm
+        self.item_altura = item_altura_mm
+        self.manter_proporcao = manter_proporcao
+        self.frente = frente
+        self.fundo = fundo
+        self.x = MARGEM_FOLHA_MM
+        self.y = MARGEM_FOLHA_MM
+        self.itens = 0
+        self._elementos = []
+        self._simbolos = {}
+
+    def cheia(self) -> bool:
+        return self.itens > 0 and self.y + self.item_altura > PAGINA_A4_MM[1] - MARGEM_FOLHA_MM
+
+    def tem_simbolo(self, chave: str) -> bool:
+        return chave in self._simbolos
+
+    def adicionar(self, chave: str, simbolo: SimboloSvg | None = None):
+        """Posiciona o próximo item; ``simbolo`` só é exigido na primeira vez que ``chave`` aparece na folha."""
+        id_simbolo = self._simbolos.get(chave)
+        if id_simbolo is None:
+            id_simbolo = f"s{len(self._simbolos)}"
+            self._simbolos[chave] = id_simbolo
+            self._elementos.append(_definir_simbolo(id_simbolo, simbolo, self.manter_proporcao))
+        self._elementos.append(_posicionar(id_simbolo, self.x, self.y, self.item_largura, self.item_altura, self.frente, self.fundo))
+        self.itens += 1
+        self.x += self.item_largura + ESPACO_FOLHA_MM
+        if self.x + self.item_largura > PAGINA_A4_MM[0] - MARGEM_FOLHA_MM:
+            self.x = MARGEM_FOLHA_MM
+            self.y += self.item_altura + ESPACO_FOLHA_MM
+
+    def para_bytes(self) -> bytes:
+        return documento_svg(*PAGINA_A4_MM, self._elementos)
@@ -0,0 +1,452 @@
+import io
+import itertools
+import os
+import struct
+import threading
+import zipfile
+import zlib
+
+from models.geracao_config import GeracaoConfig
+from services.escritor_svg import FolhaSvg, comprimir_svgz, cor_svg
+from services.histograma_etapas import ETAPA_CODIFICACAO, ETAPA_GRAVACAO, ETAPA_PNG, medir_etapa
+from services.job_run_store import LedgerItens
+
+# Equivalentes do ReportLab para evitar dependência em tempo de import.
+MM_TO_POINTS = 72 / 25.4
+mm = MM_TO_POINTS
+A4 = (210 * mm, 297 * mm)
+
+FORMATOS_EXPORTACAO = ("png", "svg", "svgz", "svg_folhas", "zip", "pdf")
+# Formatos em que cada item vira uma saída independente, registrável e retomável.
+FORMATOS_RETOMAVEIS = ("png", "svg", "svgz", "zip")
+# Cabeçalho local de entrada ZIP (APPNOTE 4.3.7), lido na recuperação de um ZIP sem diretório central.
+_CABECALHO_LOCAL_ZIP = struct.Struct("<4s5H3L2H")
+_ASSINATURA_LOCAL_ZIP = b"PK\x03\x04"
+# Itens lidos por vez no PDF: limita o que fica retido enquanto as chaves novas renderizam.
+_ITENS_POR_JANELA_PDF = 512
+
+
+class OperacaoCancelada(Exception):
+    """Sinaliza cancelamento de operação longa."""
+
+
+def _obter_modulos_pdf_reportlab():
+    try:
+        from reportlab.lib.utils import ImageReader
+        from reportlab.pdfgen import canvas as pdf_canvas
+        return pdf_canvas, ImageReader
+    except ImportError as exc:
+        raise RuntimeError(
+            "Exportação PDF requer a dependência opcional 'reportlab'. "
+            "Instale com: pip install reportlab"
+        ) from exc
+
+
+class _SemProgresso:
+    def publicar(self, atual: int, total: int, codigo: str = ""):
+        pass
+
+
+def estimar_total(codigos) -> int:
+    if hasattr(codigos, "__len__"):
+        return len(codigos)
+    return int(getattr(codigos, "total_estimado", None) or 0)
+
+
+class Exportador:
+    """Grava PNG/SVG/SVGZ/ZIP/PDF ou folhas SVG a partir de um iterável de códigos, sem depender de interface.
+
+    O progresso é entregue a ``progresso.publicar(atual, total, codigo)`` e o
+    cancelamento é observado em ``cancelar_evento``; a interface Tk e a CLI
+    apenas escolhem como exibir um e disparar o outro.
+    """
+
+    def __init__(self, service, logger, progresso=None, cancelar_evento: threading.Event | None = None, min_codigos_render_paralelo: int = 64):
+        self.service = service
+        self.logger = logger
+        self.progresso = progresso or _SemProgresso()
+        self.cancelar_evento = cancelar_evento or threading.Event()
+        self.min_codigos_render_paralelo = min_codigos_render_paralelo
+        # Desligado durante a captura de perfil: o cProfile só enxerga a thread atual.
+        self.render_paralelo = True
+
+    def _verificar_cancelamento(self):
+        if self.cancelar_evento.is_set():
+            raise OperacaoCancelada("Operação cancelada pelo usuário.")
+
+    def _iterar_imagens_codificadas(self, dados, cfg: GeracaoConfig, total: int | None = None, histograma=None):
+        """Entrega o PNG de cada dado na ordem de entrada, usando o pool de processos em lotes grandes.
+
+        ``dados`` pode ser um iterador: nada é materializado além dos blocos em voo no pool.
+        """
+        if total is None:
+            total = estimar_total(dados)
+        # Total 0 é tamanho desconhecido (ex.: entrada padrão): trata como lote grande.
+        lote_grande = total == 0 or total >= self.min_codigos_render_paralelo
+        if lote_grande and self.service.render_pool.workers > 1 and self.render_paralelo:
+            yield from self.service.renderizar_lote(dados, cfg, self.cancelar_evento, histograma=histograma)
+            self._verificar_cancelamento()
+            return
+
+        for dado in dados:
+            self._verificar_cancelamento()
+            imagem = self.service.gerar_imagem_obj(dado, cfg, histograma)
+            with medir_etapa(histograma, ETAPA_PNG):
+                conteudo = self.service.codificar_imagem(imagem, cfg)
+            yield conteudo
+
+    def _reservar_nome_arquivo(self, codigo: str, indice: int, nomes_usados: set) -> str:
+        nome_base = self.service.sanitizar_nome_arquivo(codigo, f"codigo_{indice}")
+        nome_arquivo = nome_base
+        sufixo = 2
+        while nome_arquivo in nomes_usados:
+            nome_arquivo = f"{nome_base}_{sufixo}"
+            sufixo += 1
+        nomes_usados.add(nome_arquivo)
+        return nome_arquivo
+
+    def _planejar_itens(self, codigos, extensao: str, ja_concluido):
+        """Gera ``(indice, codigo, nome, pular)`` na ordem de saída; ``pular`` marca itens já gravados e conferidos."""
+        nomes_usados = set()
+        for i, codigo in enumerate(codigos, start=1):
+            nome = f"{self._reservar_nome_arquivo(codigo, i, nomes_usados)}.{extensao}"
+            yield i, codigo, nome, ja_concluido(i, nome)
+
+    @staticmethod
+    def _arquivo_confere(caminho: str, registro) -> bool:
+        _nome, tamanho, sha = registro
+        try:
+            if os.path.getsize(caminho) != tamanho:
+                return False
+            with open(caminho, "rb") as f:
+                return LedgerItens.resumo_conteudo(f.read()) == (tamanho, sha)
+        except OSError:
+            return False
+
+    @staticmethod
+    def _entradas_locais_zip(caminho_zip: str):
+        """Entrega ``(nome, conteudo, metodo)`` de cada entrada completa, em ordem, pelos cabeçalhos locais.
+
+        Não depende do diretório central (ausente se a execução caiu antes de
+        fechar o ZIP). Para na primeira entrada truncada, com CRC divergente ou
+        em formato não gravado por ``gerar_zip``: o que vem depois não é confiável.
+        """
+        with open(caminho_zip, "rb") as f:
+            while True:
+                cabecalho = f.read(_CABECALHO_LOCAL_ZIP.size)
+                if len(cabecalho) < _CABECALHO_LOCAL_ZIP.size:
+                    return
+                assinatura, _versao, flags, metodo, _hora, _data, crc, tamanho_comprimido, _tamanho, tamanho_nome, tamanho_extra = (
+                    _CABECALHO_LOCAL_ZIP.unpack(cabecalho)
+                )
+                # 0x01: cifrada; 0x08: tamanhos só no descritor após os dados.
+                if assinatura != _ASSINATURA_LOCAL_ZIP or flags & 0x09 or metodo not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+                    return
+                nome = f.read(tamanho_nome).decode("utf-8" if flags & 0x800 else "cp437")
+                f.seek(tamanho_extra, os.SEEK_CUR)
+                bruto = f.read(tamanho_comprimido)
+                if len(bruto) < tamanho_comprimido:
+                    return
+                try:
+                    conteudo = bruto if metodo == zipfile.ZIP_STORED else zlib.decompress(bruto, -zlib.MAX_WBITS)
+                except zlib.error:
+                    return
+                if zlib.crc32(conteudo) != crc:
+                    return
+                yield nome, conteudo, metodo
+
+    @staticmethod
+    def _reconstruir_zip_parcial(caminho_zip: str, concluidos: dict) -> dict:
+        """Refaz o ZIP só com as entradas que conferem com o registro, em ordem, até a primeira divergência."""
+        por_nome = {registro[0]: (indice, registro) for indice, registro in concluidos.items()}
+        recuperados = {}
+        temporario = f"{caminho_zip}.recuperando"
+        try:
+            with zipfile.ZipFile(temporario, "w") as destino:
+                for nome, conteudo, metodo in Exportador._entradas_locais_zip(caminho_zip):
+                    indice, registro = por_nome.get(nome, (None, None))
+                    # Entradas além do último lote registrado (ou divergentes) são regeradas.
+                    if registro is None or LedgerItens.resumo_conteudo(conteudo) != registro[1:]:
+                        break
+                    destino.writestr(nome, conteudo, compress_type=metodo)
+                    recuperados[indice] = registro
+            os.replace(temporario, caminho_zip)
+        except OSError:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            return {}
+        return recuperados
+
+    @staticmethod
+    def _validar_zip_parcial(caminho_zip: str, concluidos: dict) -> dict:
+        """Itens reaproveitáveis de um ZIP interrompido; vazio se nada confere com o registro.
+
+        Um ZIP fechado que bate com o registro é reaberto como está. Se a execução
+        caiu antes de fechá-lo, ou gravou além do último lote registrado, o ZIP é
+        refeito a partir dos cabeçalhos locais (ver ``_reconstruir_zip_parcial``).
+        """
+        if not os.path.exists(caminho_zip):
+            return {}
+        try:
+            with zipfile.ZipFile(caminho_zip, "r") as zf:
+                if set(zf.namelist()) == {nome for nome, _tamanho, _sha in concluidos.values()} and all(
+                    zf.getinfo(nome).file_size == tamanho and LedgerItens.resumo_conteudo(zf.read(nome)) == (tamanho, sha)
+                    for nome, tamanho, sha in concluidos.values()
+                ):
+                    return concluidos
+        except (OSError, zipfile.BadZipFile, KeyError):
+            pass
+        return Exportador._reconstruir_zip_parcial(caminho_zip, concluidos)
+
+    def exportar(self, codigos, formato: str, destino: str, cfg: GeracaoConfig, ledger=None, concluidos=None, histograma=None) -> int:
+        """Despacha para o gerador do formato; retorna a quantidade de itens processados."""
+        if formato == "pdf":
+            return self.gerar_pdf(codigos, destino, cfg, histograma=histograma)
+        if formato == "zip":
+            return self.gerar_zip(codigos, destino, cfg, ledger=ledger, concluidos=concluidos, histograma=histograma)
+        if formato == "svg_folhas":
+            return self.gerar_folhas_svg(codigos, destino, cfg, histograma=histograma)
+        if formato in ("png", "svg", "svgz"):
+            return self.gerar_imagens(codigos, formato, destino, cfg, ledger=ledger, concluidos=concluidos, histograma=histograma)
+        raise ValueError(f"Formato de saída não suportado: {formato}")
+
+    def gerar_imagens(self, codigos, formato, destino, cfg: GeracaoConfig, ledger=None, concluidos=None, histograma=None) -> int:
+        """Grava um arquivo por código em ``destino``.
+
+        Com ``ledger``, cada arquivo gravado é registrado no job; ``concluidos``
+        (itens registrados numa execução anterior do mesmo job) evita regerar os
+        arquivos que ainda existem com o mesmo tamanho e hash.
+        """
+        try:
+            os.makedirs(destino, exist_ok=True)
+            total = estimar_total(codigos)
+            concluidos = concluidos or {}
+            extensao = formato if formato in ("svg", "svgz") else self.service.extensao_imagem(cfg)
+
+            def ja_concluido(indice, nome):
+                registro = concluidos.get(indice)
+                return registro is not None and registro[0] == nome and self._arquivo_confere(os.path.join(destino, nome), registro)
+
+            itens_saida, itens_render = itertools.tee(self._planejar_itens(codigos, extensao, ja_concluido))
+            dados = (self.service.normalizar_dado(codigo, cfg) for _i, codigo, _nome, pular in itens_render if not pular)
+            if formato in ("svg", "svgz"):
+
+                def conteudos_svg():
+                    for dado in dados:
+                        with medir_etapa(histograma, ETAPA_CODIFICACAO):
+                            conteudo = self.service.codificar_svg(dado, cfg)
+                            if formato == "svgz":
+                                conteudo = comprimir_svgz(conteudo)
+                        yield conteudo
+
+                conteudos = conteudos_svg()
+            else:
+                conteudos = self._iterar_imagens_codificadas(dados, cfg, total, histograma)
+
+            processados = 0
+            try:
+                for i, codigo, nome_arquivo, pular in itens_saida:
+                    self._verificar_cancelamento()
+                    if not pular:
+                        conteudo = next(conteudos)
+                        with medir_etapa(histograma, ETAPA_GRAVACAO), open(os.path.join(destino, nome_arquivo), "wb") as f:
+                            f.write(conteudo)
+                        if ledger is not None:
+                            ledger.registrar(i, nome_arquivo, conteudo)
+                    processados = i
+                    self.progresso.publicar(i, max(total, i), codigo)
+            finally:
+                if ledger is not None:
+                    ledger.descarregar()
+
+            self.logger.info("Geração de imagens concluída", extra={"event": "generate_done", "operation": "images", "path": destino, "total": processados})
+            return processados
+        except (OSError, ValueError) as exc:
+            raise RuntimeError(self.service.formatar_excecao(exc, "Erro ao gerar imagens")) from exc
+
+    def gerar_zip(self, codigos, caminho_zip, cfg: GeracaoConfig, ledger=None, concluidos=None, histograma=None) -> int:
+        """Grava cada imagem direto no ZIP a partir da memória, sem diretório temporário.
+
+        Na retomada (``concluidos``), as entradas de um ZIP interrompido que ainda
+        batem com o registro do job são mantidas, mesmo após uma queda que deixou o
+        arquivo sem diretório central, e só os itens faltantes são gravados.
+        """
+        try:
+            total = estimar_total(codigos)
+            if concluidos:
+                concluidos = self._validar_zip_parcial(caminho_zip, concluidos)
+                if not concluidos and ledger is not None:
+                    # ZIP ausente/corrompido: recomeça do zero e descarta o registro antigo.
+                    ledger.store.clear_items(ledger.job_id)
+            concluidos = concluidos or {}
+
+            def ja_concluido(indice, nome):
+                registro = concluidos.get(indice)
+                return registro is not None and registro[0] == nome
+
+            itens_saida, itens_render = itertools.tee(self._planejar_itens(codigos, self.service.extensao_imagem(cfg), ja_concluido))
+            dados = (self.service.normalizar_dado(codigo, cfg) for _i, codigo, _nome, pular in itens_render if not pular)
+            processados = 0
+            try:
+                with zipfile.ZipFile(caminho_zip, "a" if concluidos else "w") as zf:
+                    if ledger is not None:
+                        ledger.antes_de_descarregar = zf.fp.flush
+                    conteudos = self._iterar_imagens_codificadas(dados, cfg, total, histograma)
+                    for i, codigo, nome_entrada, pular in itens_saida:
+                        self._verificar_cancelamento()
+                        if not pular:
+                            conteudo = next(conteudos)
+                            with medir_etapa(histograma, ETAPA_GRAVACAO):
+                                zf.writestr(nome_entrada, conteudo, compress_type=self.service.escolher_compressao_zip(nome_entrada))
+                            if ledger is not None:
+                                ledger.registrar(i, nome_entrada, conteudo)
+                        processados = i
+                        self.progresso.publicar(i, max(total, i), codigo)
+            except BaseException:
+                # Sem registro de job não há como retomar: não deixa um ZIP parcial no destino.
+                # Com registro, o ZIP fechado (válido) fica para a retomada.
+                if ledger is None and os.path.exists(caminho_zip):
+                    os.remove(caminho_zip)
+                raise
+            finally:
+                if ledger is not None:
+                    # O ZIP já foi fechado (e gravado) aqui.
+                    ledger.antes_de_descarregar = None
+                    ledger.descarregar()
+            self.logger.info("ZIP gerado com sucesso", extra={"event": "generate_done", "operation": "zip", "path": caminho_zip, "total": processados})
+            return processados
+        except (OSError, zipfile.BadZipFile, ValueError, RuntimeError) as exc:
+            raise RuntimeError(self.service.formatar_excecao(exc, "Erro ao gerar ZIP")) from exc
+
+    def gerar_pdf(self, codigos, caminho_pdf, cfg: GeracaoConfig, histograma=None) -> int:
+        try:
+            pdf_canvas, image_reader_cls = _obter_modulos_pdf_reportlab()
+            pdf = pdf_canvas.Canvas(caminho_pdf, pagesize=A4)
+            largura_pagina, altura_pagina = A4
+
+            x = 20 * mm
+            y = altura_pagina - 20 * mm
+            largura_item = cfg.qr_width_cm * 10 * mm
+            altura_item = cfg.qr_height_cm * 10 * mm
+            if cfg.tipo_codigo == "barcode":
+                largura_item = cfg.barcode_width_cm * 10 * mm
+                altura_item = cfg.barcode_height_cm * 10 * mm
+            margem = 10 * mm
+            y -= altura_item
+            total = estimar_total(codigos)
+
+            def itens():
+                for codigo in codigos:
+                    dado = self.service.normalizar_dado(codigo, cfg)
+                    yield codigo, dado, self.service.chave_conteudo(dado, cfg)
+
+            # Cada payload+config único vira um único XObject (form); repetições são só posicionamentos.
+            formularios = {}
+
+            # Os itens são lidos em janelas limitadas; só as chaves ainda sem formulário vão
+            # para o render, uma vez cada, então repetições nunca ficam retidas além da janela.
+            # No modo vetorial nada é rasterizado: o conteúdo fica None e o item é desenhado
+            # direto no canvas.
+            def janelas():
+                fonte = itens()
+                while True:
+                    janela = list(itertools.islice(fonte, _ITENS_POR_JANELA_PDF))
+                    if not janela:
+                        return
+                    novos = {}
+                    for _codigo, dado, chave in janela:
+                        if chave not in formularios:
+                            novos.setdefault(chave, dado)
+                    if cfg.pdf_vetorial or not novos:
+                        conteudos = dict.fromkeys(novos)
+                    else:
+                        conteudos = dict(zip(novos, self._iterar_imagens_codificadas(iter(novos.values()), cfg, total, histograma)))
+                        # O pool para em silêncio ao cancelar: não posicionar uma janela incompleta.
+                        self._verificar_cancelamento()
+                    yield janela, conteudos
+
+            i = 0
+            for janela, conteudos in janelas():
+                for codigo, dado, chave in janela:
+                    i += 1
+                    self._verificar_cancelamento()
+                    nome_formulario = formularios.get(chave)
+                    if nome_formulario is None:
+                        nome_formulario = f"codigo_{chave[:20]}"
+                        conteudo = conteudos.pop(chave)
+                        pdf.beginForm(nome_formulario, lowerx=0, lowery=0, upperx=largura_item, uppery=altura_item)
+                        if conteudo is None:
+                            with medir_etapa(histograma, ETAPA_CODIFICACAO):
+                                self.service.desenhar_codigo_pdf(pdf, dado, cfg, 0, 0, largura_item, altura_item)
+                        else:
+                            with medir_etapa(histograma, ETAPA_GRAVACAO):
+                                image_reader = image_reader_cls(io.BytesIO(conteudo))
+                                pdf.drawImage(image_reader, 0, 0, width=largura_item, height=altura_item, preserveAspectRatio=True)
+                        pdf.endForm()
+                        formularios[chave] = nome_formulario
+
+                    pdf.saveState()
+                    pdf.translate(x, y)
+                    pdf.doForm(nome_formulario)
+                    pdf.restoreState()
+                    self.progresso.publicar(i, max(total, i), codigo)
+
+                    x += largura_item + margem
+                    if x + largura_item > largura_pagina - 20 * mm:
+                        x = 20 * mm
+                        y -= altura_item + margem
+
+                    if y < 20 * mm:
+                        pdf.showPage()
+                        x = 20 * mm
+                        y = altura_pagina - 20 * mm - altura_item
+
+            with medir_etapa(histograma, ETAPA_GRAVACAO):
+                pdf.save()
+            self.logger.info("PDF gerado com sucesso", extra={"event": "generate_done", "operation": "pdf", "path": caminho_pdf, "total": i})
+            return i
+        except (OSError, ValueError, RuntimeError) as exc:
+            raise RuntimeError(self.service.formatar_excecao(exc, "Erro ao gerar PDF")) from exc
+
+    def gerar_folhas_svg(self, codigos, destino, cfg: GeracaoConfig, histograma=None) -> int:
+        """Distribui os códigos em folhas A4 SVG (``folha_001.svg``...) na grade do PDF.
+
+        Cada folha é gravada assim que enche; códigos repetidos na mesma folha
+        reaproveitam o ``<symbol>`` já escrito em vez de vetorizar de novo.
+        """
+        try:
+            os.makedirs(destino, exist_ok=True)
+            largura_mm, altura_mm, manter = self.service.dimensoes_item_mm(cfg)
+            frente, fundo = cor_svg(cfg.foreground), cor_svg(cfg.background)
+            total = estimar_total(codigos)
+
+            def nova_folha():
+                return FolhaSvg(largura_mm, altura_mm, manter, frente, fundo)
+
+            def gravar(folha, numero):
+                with medir_etapa(histograma, ETAPA_GRAVACAO), open(os.path.join(destino, f"folha_{numero:03d}.svg"), "wb") as f:
+                    f.write(folha.para_bytes())
+
+            folha, folhas, i = nova_folha(), 0, 0
+            for i, codigo in enumerate(codigos, start=1):
+                self._verificar_cancelamento()
+                if folha.cheia():
+                    folhas += 1
+                    gravar(folha, folhas)
+                    folha = nova_folha()
+                dado = self.service.normalizar_dado(codigo, cfg)
+                chave = self.service.chave_conteudo(dado, cfg)
+                simbolo = None
+                if not folha.tem_simbolo(chave):
+                    with medir_etapa(histograma, ETAPA_CODIFICACAO):
+                        simbolo = self.service.simbolo_svg(dado, cfg)
+                folha.adicionar(chave, simbolo)
+                self.progresso.publicar(i, max(total, i), codigo)
+            if folha.itens:
+                folhas += 1
+                gravar(folha, folhas)
+
+            self.logger.info("Folhas SVG geradas", extra={"event": "generate_done", "operation": "svg_folhas", "path": destino, "total": i})
+            return i
+        except (OSError, ValueError, RuntimeError) as exc:
+            raise RuntimeError(self.service.formatar_excecao(exc, "Erro ao gerar folhas SVG")) from exc
@@ -0,0 +1,105 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+
+ETAPA_IMPORTACAO = "importacao"
+ETAPA_VALIDACAO = "validacao"
+ETAPA_CODIFICACAO = "codificacao"
+ETAPA_REDIMENSIONAMENTO = "redimensionamento"
+ETAPA_PNG = "png"
+ETAPA_GRAVACAO = "gravacao"
+
+ETAPAS = (
+    ETAPA_IMPORTACAO,
+    ETAPA_VALIDACAO,
+    ETAPA_CODIFICACAO,
+    ETAPA_REDIMENSIONAMENTO,
+    ETAPA_PNG,
+    ETAPA_GRAVACAO,
+)
+
+# Limites superiores fixos (ms) em escala logarítmica: 10 µs a ~5,6 min, razão √2.
+# O último bucket (índice len(LIMITES_BUCKETS_MS)) acumula o que passar do maior limite.
+LIMITES_BUCKETS_MS = tuple(0.01 * 2 ** (k / 2) for k in range(51))
+
+
+def indice_bucket(duracao_ms: float) -> int:
+    return bisect_left(LIMITES_BUCKETS_MS, duracao_ms)
+
+
+def limites_bucket(indice: int) -> tuple[float, float]:
+    inferior = LIMITES_BUCKETS_MS[indice - 1] if indice > 0 else 0.0
+    if indice < len(LIMITES_BUCKETS_MS):
+        return inferior, LIMITES_BUCKETS_MS[indice]
+    return inferior, inferior * 2
+
+
+def percentil_buckets(contagens: dict[int, int], p: float) -> float:
+    """Estima o percentil ``p`` (0–100), em ms, interpolando linearmente dentro do bucket."""
+    total = sum(contagens.values())
+    if total <= 0:
+        return 0.0
+    alvo = max(1.0, total * p / 100)
+    acumulado = 0
+    for indice in sorted(contagens):
+        contagem = contagens[indice]
+        if acumulado + contagem >= alvo:
+            inferior, superior = limites_bucket(indice)
+            return inferior + (superior - inferior) * (alvo - acumulado) / contagem
+        acumulado += contagem
+    return limites_bucket(max(contagens))[1]
+
+
+class HistogramaEtapas:
+    """Histogramas de latência por etapa do pipeline, com buckets logarítmicos fixos.
+
+    Uma instância por execução, passada explicitamente a quem mede. Como os
+    buckets são fixos, histogramas de workers do pool se somam com ``mesclar``.
+    Não é thread-safe: cada execução mede a partir de uma única thread.
+    """
+
+    def __init__(self):
+        self.contagens: dict[str, dict[int, int]] = {}
+
+    def registrar(self, etapa: str, duracao_s: float):
+        buckets = self.contagens.setdefault(etapa, {})
+        indice = indice_bucket(max(0.0, duracao_s) * 1000)
+        buckets[indice] = buckets.get(indice, 0) + 1
+
+    @contextmanager
+    def medir(self, etapa: str):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(etapa, time.perf_counter() - inicio)
+
+    def exportar(self) -> dict[str, dict[int, int]]:
+        """Cópia serializável (pickle/JSON) para devolver do worker ao processo principal."""
+        return {etapa: dict(buckets) for etapa, buckets in self.contagens.items()}
+
+    def mesclar(self, outro):
+        contagens = outro.contagens if isinstance(outro, HistogramaEtapas) else outro
+        for etapa, buckets in contagens.items():
+            destino = self.contagens.setdefault(etapa, {})
+            for indice, contagem in buckets.items():
+                destino[int(indice)] = destino.get(int(indice), 0) + contagem
+
+    def total(self, etapa: str) -> int:
+        return sum(self.contagens.get(etapa, {}).values())
+
+    def percentis(self, etapa: str) -> dict:
+        buckets = self.contagens.get(etapa, {})
+        return {
+            "count": sum(buckets.values()),
+            "p50_ms": percentil_buckets(buckets, 50),
+            "p95_ms": percentil_buckets(buckets, 95),
+            "p99_ms": percentil_buckets(buckets, 99),
+        }
+
+
+def medir_etapa(histograma: HistogramaEtapas | None, etapa: str):
+    """``histograma.medir(etapa)`` ou um contexto vazio quando a execução não está sendo medida."""
+    if histograma is None:
+        return nullcontext()
+    return histograma.medir(etapa)
@@ -1,3 +1,5 @@
+import hashlib
+import json
 import sqlite3
 from datetime import datetime, timezone
 from pathlib import Path
@@ -10,36 +12,62 @@ class JobRunStore:
 
     def __init__(self, db_path: str = "logs/jobs.db"):
         self.db_path = Path(db_path)
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._lock = Lock()
-        self._init_db()
+        # Pasta e schema são criados na primeira operação, não na abertura do app.
+        self._schema_pronto = False
 
     @staticmethod
     def _agora_iso() -> str:
         return datetime.now(timezone.utc).isoformat()
 
-    def _init_db(self):
-        with self._lock, sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS job_runs (
-                    id TEXT PRIMARY KEY,
-                    created_at TEXT NOT NULL,
-                    started_at TEXT NOT NULL,
-                    finished_at TEXT,
-                    status TEXT NOT NULL,
-                    formato TEXT,
-                    tipo_codigo TEXT,
-                    modo TEXT,
-                    destino TEXT,
-                    total_entradas INTEGER NOT NULL,
-                    total_invalidos INTEGER NOT NULL,
-                    total_processado INTEGER NOT NULL DEFAULT 0,
-                    erro TEXT
-                )
-                """
+    def _conectar(self) -> sqlite3.Connection:
+        """Abre uma conexão, criando/migrando o schema no primeiro uso; chamar com ``_lock`` adquirido."""
+        if not self._schema_pronto:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            with sqlite3.connect(self.db_path) as conn:
+                self._init_db(conn)
+            self._schema_pronto = True
+        return sqlite3.connect(self.db_path)
+
+    def _init_db(self, conn: sqlite3.Connection):
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS job_runs (
+                id TEXT PRIMARY KEY,
+                created_at TEXT NOT NULL,
+                started_at TEXT NOT NULL,
+                finished_at TEXT,
+                status TEXT NOT NULL,
+                formato TEXT,
+                tipo_codigo TEXT,
+                modo TEXT,
+                destino TEXT,
+                total_entradas INTEGER NOT NULL,
+                total_invalidos INTEGER NOT NULL,
+                total_processado INTEGER NOT NULL DEFAULT 0,
+                erro TEXT
             )
-            conn.commit()
+            """
+        )
+        colunas = {linha[1] for linha in conn.execute("PRAGMA table_info(job_runs)")}
+        if "parametros" not in colunas:
+            conn.execute("ALTER TABLE job_runs ADD COLUMN parametros TEXT")
+        for coluna in ("perfil_prof", "perfil_resumo"):
+            if coluna not in colunas:
+                conn.execute(f"ALTER TABLE job_runs ADD COLUMN {coluna} TEXT")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS job_items (
+                job_id TEXT NOT NULL,
+                indice INTEGER NOT NULL,
+                nome TEXT NOT NULL,
+                tamanho INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                PRIMARY KEY (job_id, indice)
+            )
+            """
+        )
+        conn.commit()
 
     def create_run(
         self,
@@ -50,16 +78,17 @@ class JobRunStore:
         destino: str,
         total_entradas: int,
         total_invalidos: int,
+        parametros: dict | None = None,
     ) -> str:
         job_id = str(uuid4())
         now = self._agora_iso()
-        with self._lock, sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conectar() as conn:
             conn.execute(
                 """
                 INSERT INTO job_runs (
                     id, created_at, started_at, status, formato, tipo_codigo, modo,
-                    destino, total_entradas, total_invalidos, total_processado
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    destino, total_entradas, total_invalidos, total_processado, parametros
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                 (
                     job_id,
@@ -73,21 +102,35 @@ class JobRunStore:
                     int(total_entradas),
                     int(total_invalidos),
                     0,
+                    json.dumps(parametros, ensure_ascii=False) if parametros is not None else None,
                 ),
             )
             conn.commit()
         return job_id
 
     def update_progress(self, job_id: str, processado: int):
-        with self._lock, sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conectar() as conn:
             conn.execute(
                 "UPDATE job_runs SET total_processado = ?, status = ? WHERE id = ?",
                 (int(processado), "running", job_id),
             )
             conn.commit()
 
-    def finish_run(self, job_id: str, status: str, erro: str = "", processado: int | None = None):
-        with self._lock, sqlite3.connect(self.db_path) as conn:
+    def finish_run(
+        self,
+        job_id: str,
+        status: str,
+        erro: str = "",
+        processado: int | None = None,
+        total_invalidos: int | None = None,
+    ):
+        with self._lock, self._conectar() as conn:
+            if total_invalidos is not None:
+                # Em lotes em fluxo os inválidos só são conhecidos ao final da leitura.
+                conn.execute(
+                    "UPDATE job_runs SET total_invalidos = ? WHERE id = ?",
+                    (int(total_invalidos), job_id),
+                )
             if processado is None:
                 conn.execute(
                     "UPDATE job_runs SET finished_at = ?, status = ?, erro = ? WHERE id = ?",
@@ -103,3 +146,100 @@ class JobRunStore:
                     (self._agora_iso(), status, erro, int(processado), job_id),
                 )
             conn.commit()
+
+    def reopen_run(self, job_id: str):
+        """Marca um job interrompido como em execução novamente, para retomada."""
+        with self._lock, self._conectar() as conn:
+            conn.execute(
+                "UPDATE job_runs SET started_at = ?, finished_at = NULL, status = ?, erro = NULL WHERE id = ?",
+                (self._agora_iso(), "running", job_id),
+            )
+            conn.commit()
+
+    def record_profile(self, job_id: str, caminho_prof: str, caminho_resumo: str):
+        """Associa ao job os arquivos da captura de perfil (cProfile e resumo em texto)."""
+        with self._lock, self._conectar() as conn:
+            conn.execute(
+                "UPDATE job_runs SET perfil_prof = ?, perfil_resumo = ? WHERE id = ?",
+                (str(caminho_prof), str(caminho_resumo), job_id),
+            )
+            conn.commit()
+
+    def get_run(self, job_id: str) -> dict | None:
+        with self._lock, self._conectar() as conn:
+            conn.row_factory = sqlite3.Row
+            linha = conn.execute("SELECT * FROM job_runs WHERE id = ?", (job_id,)).fetchone()
+        if linha is None:
+            return None
+        run = dict(linha)
+        run["parametros"] = json.loads(run["parametros"]) if run.get("parametros") else None
+        return run
+
+    def latest_resumable_run(self, formatos=("png", "svg", "zip")) -> dict | None:
+        """Job mais recente que não terminou com sucesso e tem parâmetros suficientes para retomar."""
+        marcadores = ", ".join("?" for _ in formatos)
+        with self._lock, self._conectar() as conn:
+            linha = conn.execute(
+                f"""
+                SELECT id FROM job_runs
+                WHERE status != 'completed' AND parametros IS NOT NULL AND formato IN ({marcadores})
+                ORDER BY created_at DESC LIMIT 1
+                """,
+                tuple(formatos),
+            ).fetchone()
+        return self.get_run(linha[0]) if linha else None
+
+    def record_items(self, job_id: str, itens):
+        """Grava em lote ``(indice, nome, tamanho, sha256)`` dos itens já escritos no destino."""
+        with self._lock, self._conectar() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO job_items (job_id, indice, nome, tamanho, sha256) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, int(indice), nome, int(tamanho), sha) for indice, nome, tamanho, sha in itens],
+            )
+            conn.commit()
+
+    def get_items(self, job_id: str) -> dict[int, tuple[str, int, str]]:
+        with self._lock, self._conectar() as conn:
+            linhas = conn.execute(
+                "SELECT indice, nome, tamanho, sha256 FROM job_items WHERE job_id = ?", (job_id,)
+            ).fetchall()
+        return {indice: (nome, tamanho, sha) for indice, nome, tamanho, sha in linhas}
+
+    def clear_items(self, job_id: str):
+        with self._lock, self._conectar() as conn:
+            conn.execute("DELETE FROM job_items WHERE job_id = ?", (job_id,))
+            conn.commit()
+
+
+class LedgerItens:
+    """Registro por item de um job, acumulado em memória e gravado em lotes com ``executemany``.
+
+    Só registra itens já escritos no destino; numa queda, perde-se no máximo um
+    lote de registros (esses itens são apenas regerados na retomada).
+    """
+
+    def __init__(self, store: JobRunStore, job_id: str, tamanho_lote: int = 256):
+        self.store = store
+        self.job_id = job_id
+        self.tamanho_lote = max(1, int(tamanho_lote))
+        self._pendentes = []
+        # Chamado antes de cada lote ir ao banco (ex.: esvaziar o buffer do arquivo de
+        # destino), para o registro nunca apontar itens que ainda não chegaram ao disco.
+        self.antes_de_descarregar = None
+
+    @staticmethod
+    def resumo_conteudo(conteudo: bytes) -> tuple[int, str]:
+        return len(conteudo), hashlib.sha256(conteudo).hexdigest()
+
+    def registrar(self, indice: int, nome: str, conteudo: bytes):
+        tamanho, sha = self.resumo_conteudo(conteudo)
+        self._pendentes.append((indice, nome, tamanho, sha))
+        if len(self._pendentes) >= self.tamanho_lote:
+            self.descarregar()
+
+    def descarregar(self):
+        if self._pendentes:
+            if self.antes_de_descarregar is not None:
+                self.antes_de_descarregar()
+            pendentes, self._pendentes = self._pendentes, []
+            self.store.record_items(self.job_id, pendentes)
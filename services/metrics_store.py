@@ -3,39 +3,65 @@ from datetime import datetime, timezone
 from pathlib import Path
 from threading import Lock
 
+from services.histograma_etapas import HistogramaEtapas
+
 
 class MetricsStore:
     """Camada simples de métricas locais para saúde/performance."""
 
     def __init__(self, db_path: str = "logs/metrics.db"):
         self.db_path = Path(db_path)
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._lock = Lock()
-        self._init_db()
+        # Pasta e schema são criados na primeira operação, não na abertura do app.
+        self._schema_pronto = False
 
     @staticmethod
     def _agora_iso() -> str:
         return datetime.now(timezone.utc).isoformat()
 
-    def _init_db(self):
-        with self._lock, sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS run_metrics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    ts TEXT NOT NULL,
-                    formato TEXT NOT NULL,
-                    status TEXT NOT NULL,
-                    total_entradas INTEGER NOT NULL,
-                    total_invalidos INTEGER NOT NULL,
-                    total_processado INTEGER NOT NULL,
-                    duracao_s REAL NOT NULL,
-                    throughput_itens_s REAL NOT NULL,
-                    erro TEXT
-                )
-                """
+    def _conectar(self) -> sqlite3.Connection:
+        """Abre uma conexão, criando/migrando o schema no primeiro uso; chamar com ``_lock`` adquirido."""
+        if not self._schema_pronto:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            with sqlite3.connect(self.db_path) as conn:
+                self._init_db(conn)
+            self._schema_pronto = True
+        return sqlite3.connect(self.db_path)
+
+    def _init_db(self, conn: sqlite3.Connection):
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS run_metrics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts TEXT NOT NULL,
+                formato TEXT NOT NULL,
+                status TEXT NOT NULL,
+                total_entradas INTEGER NOT NULL,
+                total_invalidos INTEGER NOT NULL,
+                total_processado INTEGER NOT NULL,
+                duracao_s REAL NOT NULL,
+                throughput_itens_s REAL NOT NULL,
+                erro TEXT,
+                backend TEXT
             )
-            conn.commit()
+            """
+        )
+        colunas = {linha[1] for linha in conn.execute("PRAGMA table_info(run_metrics)")}
+        if "backend" not in colunas:
+            conn.execute("ALTER TABLE run_metrics ADD COLUMN backend TEXT")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stage_histograms (
+                run_id INTEGER NOT NULL,
+                formato TEXT NOT NULL,
+                etapa TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                contagem INTEGER NOT NULL,
+                PRIMARY KEY (run_id, etapa, bucket)
+            )
+            """
+        )
+        conn.commit()
 
     def record_run(
         self,
@@ -47,17 +73,19 @@ class MetricsStore:
         total_processado: int,
         duracao_s: float,
         erro: str = "",
-    ):
+        histograma: HistogramaEtapas | None = None,
+        backend: str = "",
+    ) -> int:
         duracao = max(0.0, float(duracao_s))
         processado = max(0, int(total_processado))
         throughput = processado / duracao if duracao > 0 else 0.0
-        with self._lock, sqlite3.connect(self.db_path) as conn:
-            conn.execute(
+        with self._lock, self._conectar() as conn:
+            cursor = conn.execute(
                 """
                 INSERT INTO run_metrics (
                     ts, formato, status, total_entradas, total_invalidos, total_processado,
-                    duracao_s, throughput_itens_s, erro
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    duracao_s, throughput_itens_s, erro, backend
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                 (
                     self._agora_iso(),
@@ -69,12 +97,24 @@ class MetricsStore:
                     duracao,
                     throughput,
                     erro,
+                    backend,
                 ),
             )
+            run_id = cursor.lastrowid
+            if histograma is not None:
+                conn.executemany(
+                    "INSERT INTO stage_histograms (run_id, formato, etapa, bucket, contagem) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (run_id, formato, etapa, int(indice), int(contagem))
+                        for etapa, buckets in histograma.contagens.items()
+                        for indice, contagem in buckets.items()
+                    ],
+                )
             conn.commit()
+        return run_id
 
     def get_health_snapshot(self) -> dict:
-        with self._lock, sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conectar() as conn:
             conn.row_factory = sqlite3.Row
             total_runs = conn.execute("SELECT COUNT(*) AS c FROM run_metrics").fetchone()["c"]
             avg_duration = conn.execute(
@@ -101,11 +141,45 @@ class MetricsStore:
                 ORDER BY runs DESC
                 """
             ).fetchall()
+            by_backend = conn.execute(
+                """
+                SELECT COALESCE(backend, '') AS backend,
+                       COUNT(*) AS runs,
+                       COALESCE(AVG(throughput_itens_s), 0) AS avg_throughput
+                FROM run_metrics
+                GROUP BY COALESCE(backend, '')
+                ORDER BY runs DESC
+                """
+            ).fetchall()
+            buckets = conn.execute(
+                """
+                SELECT formato, etapa, bucket, SUM(contagem) AS contagem
+                FROM stage_histograms
+                GROUP BY formato, etapa, bucket
+                """
+            ).fetchall()
+
+        geral = HistogramaEtapas()
+        por_formato = {}
+        for row in buckets:
+            parcial = {row["etapa"]: {row["bucket"]: row["contagem"]}}
+            geral.mesclar(parcial)
+            por_formato.setdefault(row["formato"], HistogramaEtapas()).mesclar(parcial)
 
         return {
             "total_runs": int(total_runs),
             "avg_duration_s": float(avg_duration),
             "avg_throughput_itens_s": float(avg_throughput),
             "error_rate": float(err_rate),
-            "by_formato": [dict(row) for row in by_formato],
+            "by_formato": [
+                {**dict(row), "stages": self._percentis_etapas(por_formato.get(row["formato"]))} for row in by_formato
+            ],
+            "by_backend": [dict(row) for row in by_backend],
+            "stages": self._percentis_etapas(geral),
         }
+
+    @staticmethod
+    def _percentis_etapas(histograma: HistogramaEtapas | None) -> dict:
+        if histograma is None:
+            return {}
+        return {etapa: histograma.percentis(etapa) for etapa in sorted(histograma.contagens)}
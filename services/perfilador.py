@@ -0,0 +1,103 @@
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+
+ENV_PERFIL = "QRGEN_PROFILE"
+DIRETORIO_PERFIS = "logs/profiles"
+
+_VALORES_DESLIGADO = {"", "0", "false", "off", "nao", "não"}
+_VALORES_MEMORIA = {"mem", "memoria", "memória", "tracemalloc", "2"}
+
+
+@dataclass(frozen=True)
+class ModoPerfil:
+    """Como perfilar uma execução: sempre cProfile; ``memoria`` liga também o tracemalloc."""
+
+    memoria: bool = False
+    top_n: int = 30
+
+
+def modo_perfil_do_ambiente(valor: str | None = None) -> ModoPerfil | None:
+    """Lê ``QRGEN_PROFILE``: ``1``/``cpu`` só cProfile, ``mem`` cProfile + tracemalloc."""
+    if valor is None:
+        valor = os.environ.get(ENV_PERFIL, "")
+    valor = valor.strip().lower()
+    if valor in _VALORES_DESLIGADO:
+        return None
+    return ModoPerfil(memoria=valor in _VALORES_MEMORIA)
+
+
+class CapturaPerfil:
+    """Perfila o bloco ``with`` na thread atual e grava ``<job_id>.prof`` e ``<job_id>.txt``.
+
+    O cProfile só enxerga a thread que o ligou: quem usa a captura deve manter a
+    renderização serial nessa thread enquanto ela estiver ativa. O resumo em
+    texto traz as funções mais caras (tempo cumulativo) e, com ``memoria``, as
+    linhas que mais alocaram e o pico medido pelo tracemalloc.
+    """
+
+    def __init__(self, job_id: str, modo: ModoPerfil, diretorio: str = DIRETORIO_PERFIS):
+        self.job_id = job_id
+        self.modo = modo
+        self.diretorio = Path(diretorio)
+        self.caminho_prof = self.diretorio / f"{job_id}.prof"
+        self.caminho_resumo = self.diretorio / f"{job_id}.txt"
+        self._profiler = None
+        self._iniciou_tracemalloc = False
+        self._inicio = 0.0
+
+    def __enter__(self):
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        if self.modo.memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._iniciou_tracemalloc = True
+        self._profiler = cProfile.Profile()
+        try:
+            self._profiler.enable()
+        except ValueError:
+            # Outro perfilador já ativo no processo: não há como capturar esta execução.
+            self._parar_tracemalloc()
+            raise
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *_exc):
+        self._profiler.disable()
+        duracao = time.perf_counter() - self._inicio
+        try:
+            self._profiler.dump_stats(str(self.caminho_prof))
+            self.caminho_resumo.write_text(self._montar_resumo(duracao), encoding="utf-8")
+        finally:
+            self._parar_tracemalloc()
+        return False
+
+    def _parar_tracemalloc(self):
+        if self._iniciou_tracemalloc:
+            tracemalloc.stop()
+            self._iniciou_tracemalloc = False
+
+    def _montar_resumo(self, duracao: float) -> str:
+        saida = io.StringIO()
+        saida.write(f"Job {self.job_id} — {duracao:.3f} s\n\n")
+        saida.write(f"== Funções por tempo cumulativo (top {self.modo.top_n}) ==\n")
+        pstats.Stats(self._profiler, stream=saida).strip_dirs().sort_stats("cumulative").print_stats(self.modo.top_n)
+
+        if self.modo.memoria and tracemalloc.is_tracing():
+            atual, pico = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                (
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+                )
+            )
+            saida.write(f"\n== Alocações (top {self.modo.top_n}) ==\n")
+            saida.write(f"Memória rastreada: atual {atual / 1024:.1f} KiB, pico {pico / 1024:.1f} KiB\n")
+            for estatistica in snapshot.statistics("lineno")[: self.modo.top_n]:
+                saida.write(f"{estatistica}\n")
+        return saida.getvalue()
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from services.render_cache import RenderCache
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+MM_TO_POINTS = 72 / 25.4
+
+
+@dataclass(frozen=True)
+class LayoutPreview:
+    """Geometria da página de pré-visualização, em pontos (72 dpi)."""
+
+    largura: int
+    altura: int
+    margem_px: int
+    espaco_px: int
+
+
+class PreviewComposer:
+    """Compõe a página de pré-visualização reaproveitando cada nível já calculado.
+
+    Níveis de cache: tiles redimensionados (por dado + config + tamanho), página
+    base com régua (por tamanho + margem), página composta e página escalada
+    pelo zoom. Mudar margem/espaço só recompõe; mudar zoom só reescala.
+    """
+
+    def __init__(self, tiles_max_bytes: int = 32 * 1024 * 1024):
+        self.tiles = RenderCache(tiles_max_bytes)
+        self._base = (None, None)
+        self._composta = (None, None)
+        self._escalada = (None, None, None)
+
+    @staticmethod
+    def tamanho_item(cfg) -> tuple[int, int]:
+        if cfg.tipo_codigo == "barcode":
+            largura_cm, altura_cm = cfg.barcode_width_cm, cfg.barcode_height_cm
+        else:
+            largura_cm, altura_cm = cfg.qr_width_cm, cfg.qr_height_cm
+        return max(24, int(largura_cm * 10 * MM_TO_POINTS)), max(24, int(altura_cm * 10 * MM_TO_POINTS))
+
+    def _obter_tile(self, dado: str, cfg, tamanho: tuple[int, int], renderizar) -> Image.Image:
+        chave = (dado, cfg.campos_render(), tamanho)
+        tile = self.tiles.obter(chave)
+        if tile is None:
+            tile = renderizar(dado).resize(tamanho)
+            self.tiles.guardar(chave, tile)
+        return tile
+
+    @staticmethod
+    def _area_util(layout: LayoutPreview) -> tuple[int, int, int, int]:
+        largura, altura = layout.largura, layout.altura
+        # Evita geometria inválida (x1 < x0 / y1 < y0) em etiquetas pequenas
+        # ou quando margem é maior que metade da área útil.
+        margem_limite = max(1, min((largura - 2) // 2, (altura - 2) // 2))
+        margem_px = min(layout.margem_px, margem_limite)
+
+        # Coordenadas defensivas para evitar ValueError do Pillow em presets pequenos.
+        x0, x1 = sorted((margem_px, largura - margem_px))
+        y0, y1 = sorted((margem_px, altura - margem_px))
+        x0 = max(0, min(x0, largura - 1))
+        x1 = max(0, min(x1, largura - 1))
+        y0 = max(0, min(y0, altura - 1))
+        y1 = max(0, min(y1, altura - 1))
+        return x0, y0, x1, y1
+
+    def _obter_base(self, layout: LayoutPreview) -> Image.Image:
+        from PIL import Image, ImageDraw
+
+        chave = (layout.largura, layout.altura, layout.margem_px)
+        if self._base[0] == chave:
+            return self._base[1]
+
+        largura, altura = layout.largura, layout.altura
+        x0, y0, x1, y1 = self._area_util(layout)
+        preview = Image.new("RGB", (largura, altura), "white")
+        draw_preview = ImageDraw.Draw(preview)
+        if x1 >= x0 and y1 >= y0:
+            draw_preview.rectangle((x0, y0, x1, y1), outline="#9ca3af", width=2)
+
+        pixels_por_cm = MM_TO_POINTS * 10
+        largura_util = max(1, x1 - x0)
+        for cm in range(0, int(largura_util / pixels_por_cm) + 1, 5):
+            px = int(x0 + cm * pixels_por_cm)
+            if px > x1:
+                break
+            if y0 >= 8:
+                draw_preview.line((px, y0 - 8, px, y0), fill="#6b7280", width=1)
+            draw_preview.text((px + 2, max(0, y0 - 24)), f"{cm}cm", fill="#6b7280")
+
+        self._base = (chave, preview)
+        return preview
+
+    def compor(self, dados, cfg, layout: LayoutPreview, renderizar) -> Image.Image:
+        """Retorna a página composta; ``renderizar(dado)`` só é chamado para tiles ausentes do cache."""
+        from PIL import Image, ImageDraw
+
+        tamanho = self.tamanho_item(cfg)
+        chave = (layout, cfg.campos_render(), tuple(dados))
+        if self._composta[0] == chave:
+            return self._composta[1]
+
+        item_largura, item_altura = tamanho
+        x0, y0, x1, y1 = self._area_util(layout)
+        preview = self._obter_base(layout).copy()
+
+        x_cursor = x0
+        y_cursor = y0
+        for dado in dados:
+            preview.paste(self._obter_tile(dado, cfg, tamanho, renderizar), (x_cursor, y_cursor))
+
+            x_cursor += item_largura + layout.espaco_px
+            if x_cursor + item_largura > x1:
+                x_cursor = x0
+                y_cursor += item_altura + layout.espaco_px
+            if y_cursor + item_altura > y1:
+                break
+
+        fundo = Image.new("RGB", (layout.largura + 120, layout.altura + 120), "#e5e7eb")
+        ImageDraw.Draw(fundo).rounded_rectangle(
+            (70, 70, layout.largura + 90, layout.altura + 90), radius=10, fill="#cbd5e1"
+        )
+        fundo.paste(preview, (60, 60))
+        self._composta = (chave, fundo)
+        return fundo
+
+    def escalar(self, pagina: Image.Image, zoom_factor: float, limite: tuple[int, int]) -> Image.Image:
+        """Aplica zoom e limita ao tamanho do widget, reaproveitando o resultado para a mesma página."""
+        from PIL import Image
+
+        chave = (zoom_factor, limite)
+        if self._escalada[0] == chave and self._escalada[1] is pagina:
+            return self._escalada[2]
+
+        img = pagina
+        if zoom_factor != 1.0:
+            img = img.resize(
+                (max(1, int(img.width * zoom_factor)), max(1, int(img.height * zoom_factor))),
+                Image.Resampling.LANCZOS,
+            )
+        else:
+            img = img.copy()
+        img.thumbnail(limite, Image.Resampling.LANCZOS)
+        self._escalada = (chave, pagina, img)
+        return img
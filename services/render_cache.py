@@ -0,0 +1,64 @@
+from collections import OrderedDict
+from threading import Lock
+
+
+class RenderCache:
+    """Cache LRU de imagens renderizadas, limitado por orçamento de memória em bytes.
+
+    As imagens são compartilhadas entre quem as solicita: os chamadores não devem
+    modificá-las in-place (``paste``/``ImageDraw``); ``resize``/``save`` são seguros.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max(0, int(max_bytes))
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def tamanho_imagem(imagem) -> int:
+        return imagem.width * imagem.height * len(imagem.getbands())
+
+    def obter(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self.misses += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return item[0]
+
+    def guardar(self, chave, imagem):
+        tamanho = self.tamanho_imagem(imagem)
+        if tamanho > self.max_bytes:
+            return
+        with self._lock:
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= anterior[1]
+            self._itens[chave] = (imagem, tamanho)
+            self._bytes += tamanho
+            while self._bytes > self.max_bytes:
+                _chave, (_img, tamanho_removido) = self._itens.popitem(last=False)
+                self._bytes -= tamanho_removido
+                self.evictions += 1
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "itens": len(self._itens),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
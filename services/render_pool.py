@@ -0,0 +1,155 @@
+import atexit
+import concurrent.futures as cf
+import multiprocessing
+import os
+import weakref
+from collections import deque
+from itertools import islice
+from threading import Lock
+
+_service_worker = None
+# Pools vivos, sem mantê-los vivos: um único hook de saída encerra os que sobraram.
+_pools_ativos = weakref.WeakSet()
+
+
+def _encerrar_pools_ativos():
+    for pool in list(_pools_ativos):
+        pool.encerrar()
+
+
+atexit.register(_encerrar_pools_ativos)
+
+
+def _inicializar_worker():
+    """Aquece o processo filho com as dependências pesadas já importadas."""
+    global _service_worker
+    import qrcode  # noqa: F401
+    from PIL import Image, ImageDraw  # noqa: F401
+
+    try:
+        from reportlab.graphics.barcode import createBarcodeDrawing  # noqa: F401
+    except ImportError:
+        pass
+
+    from services.codigo_service import CodigoService
+
+    _service_worker = CodigoService(workers=1)
+
+
+def _renderizar_bloco(dados, cfg, medir: bool = False):
+    """Renderiza o bloco; com ``medir``, devolve também o histograma de etapas do worker."""
+    from services.codigo_service import CodigoService
+    from services.histograma_etapas import ETAPA_PNG, HistogramaEtapas, medir_etapa
+
+    histograma = HistogramaEtapas() if medir else None
+    conteudos = []
+    for dado in dados:
+        imagem = _service_worker.gerar_imagem_obj(dado, cfg, histograma)
+        with medir_etapa(histograma, ETAPA_PNG):
+            conteudos.append(CodigoService.codificar_imagem(imagem, cfg))
+    if medir:
+        return conteudos, histograma.exportar()
+    return conteudos
+
+
+def _aquecer_worker():
+    return os.getpid()
+
+
+def resolver_quantidade_workers(workers: int | None = None) -> int:
+    if workers is None:
+        try:
+            workers = int(os.environ.get("QRGEN_WORKERS", "0"))
+        except ValueError:
+            workers = 0
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+class RenderPool:
+    """Pool de processos que renderiza blocos de códigos em paralelo, preservando a ordem."""
+
+    def __init__(self, workers: int | None = None, tamanho_bloco: int = 16):
+        self.workers = resolver_quantidade_workers(workers)
+        self.tamanho_bloco = max(1, int(tamanho_bloco))
+        self._executor = None
+        self._lock = Lock()
+        _pools_ativos.add(self)
+
+    def _obter_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # "spawn" evita herdar o estado do Tk/threads do processo principal via fork.
+                self._executor = cf.ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_inicializar_worker,
+                )
+            return self._executor
+
+    def aquecer(self):
+        """Inicia os workers antecipadamente para que o primeiro lote não pague o custo de spawn."""
+        executor = self._obter_executor()
+        for futuro in [executor.submit(_aquecer_worker) for _ in range(self.workers)]:
+            futuro.result()
+
+    def renderizar(self, dados, cfg, cancelar_evento=None, histograma=None):
+        """Gera o conteúdo codificado de cada dado, na ordem de entrada.
+
+        Mantém no máximo ``2 * workers`` blocos em voo para limitar memória e
+        interrompe a iteração assim que ``cancelar_evento`` é sinalizado.
+        Com ``histograma``, os tempos medidos em cada worker são somados a ele.
+        """
+        medir = histograma is not None
+        executor = self._obter_executor()
+        iterador = iter(dados)
+        pendentes = deque()
+        esgotado = False
+
+        def cancelado():
+            return cancelar_evento is not None and cancelar_evento.is_set()
+
+        try:
+            while True:
+                while not esgotado and len(pendentes) < self.workers * 2:
+                    bloco = list(islice(iterador, self.tamanho_bloco))
+                    if not bloco:
+                        esgotado = True
+                        break
+                    pendentes.append(executor.submit(_renderizar_bloco, bloco, cfg, medir))
+                if not pendentes:
+                    return
+
+                while True:
+                    if cancelado():
+                        return
+                    try:
+                        resultado = pendentes[0].result(timeout=0.05)
+                        break
+                    except cf.TimeoutError:
+                        continue
+                    except cf.process.BrokenProcessPool as exc:
+                        self._descartar_executor()
+                        raise RuntimeError("Pool de renderização interrompido inesperadamente.") from exc
+                pendentes.popleft()
+                if medir:
+                    resultado, tempos = resultado
+                    histograma.mesclar(tempos)
+
+                for conteudo in resultado:
+                    if cancelado():
+                        return
+                    yield conteudo
+        finally:
+            for futuro in pendentes:
+                futuro.cancel()
+
+    def _descartar_executor(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def encerrar(self):
+        self._descartar_executor()
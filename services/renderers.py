@@ -1,49 +1,170 @@
+from __future__ import annotations
+
 import io
-import qrcode
-from PIL import Image, ImageDraw
+import threading
+from itertools import chain
+from typing import TYPE_CHECKING
+
+from services import codificadores_barras
+from services.capacidades import AMOSTRA_PADRAO, AMOSTRAS_MODELOS
+from services.escritor_svg import SimboloSvg, simbolo_barras, simbolo_qr
+from services.histograma_etapas import ETAPA_CODIFICACAO, ETAPA_REDIMENSIONAMENTO, medir_etapa
+from services.validacao import validar_dado_modelo
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# qrcode e Pillow são importados no primeiro uso: abrir a interface não paga esse custo.
+
+
+# Tabela do point(): cinza -> preto/branco pelo meio da faixa.
+_LIMIAR_BITONAL = [0] * 128 + [255] * 128
 
 
 class ImageResizer:
+    """Redimensiona mantendo o modo da imagem ("1"/"L" nos códigos de barras): nada é expandido para RGB aqui."""
+
     @staticmethod
-    def resize_with_ratio(img: Image.Image, width_px: int, height_px: int, keep_ratio: bool) -> Image.Image:
+    def _redimensionar(img: Image.Image, tamanho: tuple[int, int]) -> Image.Image:
+        from PIL import Image
+
+        if img.size == tamanho:
+            return img
+        if tamanho[0] % img.width == 0 and tamanho[1] % img.height == 0:
+            # Ampliação inteira: NEAREST é exato e não cria tons intermediários.
+            return img.resize(tamanho, Image.Resampling.NEAREST)
+        # Escala fracionária: BOX (média de área) posiciona as bordas melhor que o
+        # NEAREST, mas cria cinzas nas bordas; o limiar devolve a imagem a duas cores
+        # para que os perfis de 1 bit/paleta não recebam tons intermediários.
+        reduzida = img.resize(tamanho, Image.Resampling.BOX)
+        return reduzida.point(_LIMIAR_BITONAL) if reduzida.mode == "L" else reduzida
+
+    @classmethod
+    def resize_with_ratio(cls, img: Image.Image, width_px: int, height_px: int, keep_ratio: bool) -> Image.Image:
+        from PIL import Image
+
         width_px = max(1, width_px)
         height_px = max(1, height_px)
         if not keep_ratio:
-            return img.resize((width_px, height_px), Image.Resampling.LANCZOS)
-
-        base = img.copy()
-        base.thumbnail((width_px, height_px), Image.Resampling.LANCZOS)
-        canvas = Image.new("RGB", (width_px, height_px), "white")
-        x = (width_px - base.width) // 2
-        y = (height_px - base.height) // 2
-        canvas.paste(base, (x, y))
+            return cls._redimensionar(img, (width_px, height_px))
+
+        # Como o thumbnail: só reduz, nunca amplia além do original.
+        escala = min(width_px / img.width, height_px / img.height, 1.0)
+        base = cls._redimensionar(img, (max(1, round(img.width * escala)), max(1, round(img.height * escala))))
+        if base.size == (width_px, height_px):
+            return base
+        canvas = Image.new(img.mode, (width_px, height_px), "white")
+        canvas.paste(base, ((width_px - base.width) // 2, (height_px - base.height) // 2))
         return canvas
 
 
 class QRCodeRenderer:
+    BACKEND_QRCODE = "qrcode"
+
     def __init__(self, dpi_padrao: int = 200):
         self.dpi_padrao = dpi_padrao
 
     def _cm_para_px(self, cm: float) -> int:
         return max(1, int(round((cm / 2.54) * self.dpi_padrao)))
 
-    def render(self, dado: str, cfg) -> Image.Image:
-        from qrcode.image.svg import SvgImage
+    @staticmethod
+    def obter_matriz(dado: str) -> list[list[bool]]:
+        """Retorna a matriz de módulos do QR, já incluindo a borda (quiet zone)."""
+        import qrcode
 
-        qr = qrcode.QRCode(box_size=10, border=2)
+        qr = qrcode.QRCode(border=2)
         qr.add_data(dado)
         qr.make(fit=True)
-        img = qr.make_image(fill_color=cfg.foreground, back_color=cfg.background)
-        if hasattr(img, "get_image"):
-            img = img.get_image()
+        return qr.get_matrix()
+
+    @staticmethod
+    def rasterizar_matriz(
+        matriz, width_px: int, height_px: int, keep_ratio: bool, foreground: str, background: str
+    ) -> Image.Image:
+        """Escreve os módulos direto no tamanho final, com bordas alinhadas a pixels inteiros.
 
-        qr_img = img.convert("RGB")
-        return ImageResizer.resize_with_ratio(
-            qr_img,
-            self._cm_para_px(cfg.qr_width_cm),
-            self._cm_para_px(cfg.qr_height_cm),
-            cfg.keep_qr_ratio,
-        )
+        O redimensionamento NEAREST a partir de 1 px por módulo não interpola:
+        cada borda de módulo cai em um pixel inteiro e só as duas cores existem.
+        O resultado fica em modo "P" (índice 0 = fundo, 1 = frente), 1 byte por
+        pixel; a expansão para RGB só acontece ao compor ou codificar.
+        """
+        from PIL import Image, ImageColor
+
+        width_px = max(1, width_px)
+        height_px = max(1, height_px)
+        n = len(matriz)
+        modulos = Image.frombytes("P", (n, n), bytes(chain.from_iterable(matriz)))
+        modulos.putpalette([*ImageColor.getrgb(background), *ImageColor.getrgb(foreground)])
+
+        if not keep_ratio:
+            return modulos.resize((width_px, height_px), Image.Resampling.NEAREST)
+
+        lado = min(width_px, height_px)
+        qr_img = modulos.resize((lado, lado), Image.Resampling.NEAREST)
+        if (lado, lado) == (width_px, height_px):
+            return qr_img
+        canvas = Image.new("P", (width_px, height_px), 0)
+        canvas.putpalette(modulos.getpalette())
+        canvas.paste(qr_img, ((width_px - lado) // 2, (height_px - lado) // 2))
+        return canvas
+
+    @staticmethod
+    def calcular_segmentos(matriz) -> list[tuple[int, int, int]]:
+        """Agrupa módulos escuros consecutivos de cada linha em (linha, coluna, comprimento)."""
+        segmentos = []
+        for linha, valores in enumerate(matriz):
+            inicio = None
+            for coluna, escuro in enumerate(valores):
+                if escuro and inicio is None:
+                    inicio = coluna
+                elif not escuro and inicio is not None:
+                    segmentos.append((linha, inicio, coluna - inicio))
+                    inicio = None
+            if inicio is not None:
+                segmentos.append((linha, inicio, len(valores) - inicio))
+        return segmentos
+
+    def simbolo_svg(self, dado: str) -> SimboloSvg:
+        """QR vetorial para SVG: os mesmos segmentos mesclados do PDF, em unidades de módulo."""
+        matriz = self.obter_matriz(dado)
+        return simbolo_qr(self.calcular_segmentos(matriz), len(matriz))
+
+    def desenhar_pdf(self, pdf, dado: str, cfg, x: float, y: float, largura: float, altura: float):
+        """Desenha o QR como vetor: um único path com os segmentos de módulos mesclados."""
+        from reportlab.lib.colors import toColor
+
+        matriz = self.obter_matriz(dado)
+        n = len(matriz)
+        if cfg.keep_qr_ratio:
+            lado = min(largura, altura)
+            x += (largura - lado) / 2
+            y += (altura - lado) / 2
+            largura = altura = lado
+        modulo_x = largura / n
+        modulo_y = altura / n
+
+        pdf.saveState()
+        pdf.setFillColor(toColor(cfg.background))
+        pdf.rect(x, y, largura, altura, stroke=0, fill=1)
+        path = pdf.beginPath()
+        for linha, coluna, comprimento in self.calcular_segmentos(matriz):
+            path.rect(x + coluna * modulo_x, y + (n - 1 - linha) * modulo_y, comprimento * modulo_x, modulo_y)
+        pdf.setFillColor(toColor(cfg.foreground))
+        pdf.drawPath(path, stroke=0, fill=1)
+        pdf.restoreState()
+
+    def render(self, dado: str, cfg, histograma=None) -> Image.Image:
+        with medir_etapa(histograma, ETAPA_CODIFICACAO):
+            matriz = self.obter_matriz(dado)
+        with medir_etapa(histograma, ETAPA_REDIMENSIONAMENTO):
+            return self.rasterizar_matriz(
+                matriz,
+                self._cm_para_px(cfg.qr_width_cm),
+                self._cm_para_px(cfg.qr_height_cm),
+                cfg.keep_qr_ratio,
+                cfg.foreground,
+                cfg.background,
+            )
 
 
 # Mapeamento: chave interna → nome no python-barcode
@@ -79,56 +200,161 @@ class BarcodeRenderer:
         "datamatrix": ("Data Matrix", "ECC200DataMatrix"),
     }
 
+    BACKEND_NATIVO = "nativo"
+    BACKEND_PYBARCODE = "python-barcode"
+    BACKEND_REPORTLAB = "reportlab"
+
     def __init__(self, dpi_padrao: int = 200):
         self.dpi_padrao = dpi_padrao
+        # modelo -> backend que funciona neste ambiente (ver services.capacidades);
+        # None enquanto não houver sondagem: aí o backend é resolvido com uma amostra.
+        self.backends: dict[str, str | None] | None = None
+        # modelo -> backend escolhido para o job atual (ver iniciar_job/resolver_backend).
+        self._resolvidos: dict[str, str | None] = {}
+        # Classes/writers de cada backend, por thread (o ImageWriter guarda estado durante o write).
+        self._local = threading.local()
 
     def _cm_para_px(self, cm: float) -> int:
         return max(1, int(round((cm / 2.54) * self.dpi_padrao)))
 
+    def definir_backends(self, backends: dict[str, str | None] | None):
+        self.backends = backends
+        self._resolvidos.clear()
+
+    def iniciar_job(self):
+        """Descarta as escolhas do job anterior; os writers já criados continuam aquecidos."""
+        self._resolvidos.clear()
+
+    def resolver_backend(self, modelo: str) -> str | None:
+        """Backend que atende o modelo neste job, resolvido uma única vez.
+
+        Com sondagem, é o backend registrado nas capacidades; sem ela, o primeiro
+        candidato que gera a amostra do modelo. Os itens do job usam só esse
+        backend: uma falha em um item é erro daquele item, não motivo para
+        tentar (e importar) outro backend a cada código.
+        """
+        if modelo in self._resolvidos:
+            return self._resolvidos[modelo]
+        if self.backends is not None and modelo in self.backends:
+            backend = self.backends[modelo]
+        else:
+            backend = self.primeiro_backend_funcional(modelo)
+        self._resolvidos[modelo] = backend
+        return backend
+
+    def primeiro_backend_funcional(self, modelo: str) -> str | None:
+        """Testa os candidatos com um código real do modelo, na ordem de preferência."""
+        amostra = AMOSTRAS_MODELOS.get(modelo, AMOSTRA_PADRAO)
+        for backend in self.backends_candidatos(modelo):
+            try:
+                self.renderizar_com_backend(backend, amostra, modelo, 64, 32, True)
+            except Exception:
+                continue
+            return backend
+        return None
+
+    @classmethod
+    def backends_candidatos(cls, modelo: str) -> list[str]:
+        """Backends que podem gerar o modelo, em ordem de preferência (o nativo cobre todos)."""
+        candidatos = [cls.BACKEND_NATIVO]
+        if modelo in _PYBARCODE_MAP:
+            candidatos.append(cls.BACKEND_PYBARCODE)
+        if cls.MODELOS_SUPORTADOS[modelo][1] is not None:
+            candidatos.append(cls.BACKEND_REPORTLAB)
+        return candidatos
+
+    def renderizar_com_backend(
+        self, backend: str, dado: str, modelo: str, width_px: int, height_px: int, keep_ratio: bool, histograma=None
+    ) -> Image.Image:
+        if backend == self.BACKEND_NATIVO:
+            return self._render_nativo(dado, modelo, width_px, height_px, keep_ratio, histograma)
+        if backend == self.BACKEND_PYBARCODE:
+            return self._render_pybarcode(dado, modelo, width_px, height_px, keep_ratio, histograma)
+        if backend == self.BACKEND_REPORTLAB:
+            return self._render_reportlab(dado, modelo, width_px, height_px, keep_ratio, histograma)
+        raise RuntimeError(f"Backend de código de barras desconhecido: {backend}")
+
+    def _escritor(self, backend: str, modelo: str):
+        """Objetos do backend para o modelo (codificador, classe + writer...), criados uma vez por thread."""
+        escritores = getattr(self._local, "escritores", None)
+        if escritores is None:
+            escritores = self._local.escritores = {}
+        chave = (backend, modelo)
+        if chave not in escritores:
+            escritores[chave] = self._criar_escritor(backend, modelo)
+        return escritores[chave]
+
+    def _criar_escritor(self, backend: str, modelo: str):
+        if backend == self.BACKEND_NATIVO:
+            if modelo in codificadores_barras.MODELOS_MATRICIAIS:
+                return codificadores_barras.matriz_datamatrix
+            return codificadores_barras.CODIFICADORES[modelo]
+        if backend == self.BACKEND_PYBARCODE:
+            import barcode
+            from barcode.writer import ImageWriter
+
+            nome_pb = _PYBARCODE_MAP.get(modelo)
+            if nome_pb is None:
+                raise ValueError(f"Modelo '{modelo}' não suportado pelo python-barcode.")
+            return barcode.get_barcode_class(nome_pb), ImageWriter(mode="L")
+        if backend == self.BACKEND_REPORTLAB:
+            from reportlab.graphics import renderPM
+            from reportlab.graphics.barcode import createBarcodeDrawing
+
+            if self.MODELOS_SUPORTADOS[modelo][1] is None:
+                raise RuntimeError("Modelo sem backend reportlab dedicado; use backend ITF-14 via python-barcode.")
+            return createBarcodeDrawing, renderPM
+        raise RuntimeError(f"Backend de código de barras desconhecido: {backend}")
+
     @staticmethod
     def validar_modelo(dado: str, modelo: str):
-        if modelo == "ean13" and (not dado.isdigit() or len(dado) not in (12, 13)):
-            raise ValueError("EAN-13 exige apenas dígitos com 12 ou 13 caracteres.")
-        if modelo == "ean8" and (not dado.isdigit() or len(dado) not in (7, 8)):
-            raise ValueError("EAN-8 exige apenas dígitos com 7 ou 8 caracteres.")
-        if modelo == "upca" and (not dado.isdigit() or len(dado) not in (11, 12)):
-            raise ValueError("UPC-A exige apenas dígitos com 11 ou 12 caracteres.")
-        if modelo == "dun14" and (not dado.isdigit() or len(dado) != 14):
-            raise ValueError("DUN-14 exige exatamente 14 dígitos numéricos.")
-        if modelo == "interleaved2of5":
-            if not dado.isdigit():
-                raise ValueError("Intercalado 2 de 5 exige apenas dígitos.")
-            if len(dado) % 2 != 0:
-                raise ValueError("Intercalado 2 de 5 exige quantidade par de dígitos.")
+        validar_dado_modelo(dado, modelo)
 
     # ------------------------------------------------------------------ #
-    #  Backend 1: python-barcode (não precisa de renderPM)                #
+    #  Backend 1: codificadores próprios, barras em pixels inteiros       #
+    # ------------------------------------------------------------------ #
+    def _render_nativo(
+        self, dado: str, modelo: str, width_px: int, height_px: int, keep_ratio: bool, histograma=None
+    ) -> Image.Image:
+        codificador = self._escritor(self.BACKEND_NATIVO, modelo)
+        if modelo in codificadores_barras.MODELOS_MATRICIAIS:
+            with medir_etapa(histograma, ETAPA_CODIFICACAO):
+                matriz = codificador(dado)
+            with medir_etapa(histograma, ETAPA_REDIMENSIONAMENTO):
+                return codificadores_barras.rasterizar_matriz(matriz, width_px, height_px)
+        with medir_etapa(histograma, ETAPA_CODIFICACAO):
+            padrao = codificador(dado)
+        with medir_etapa(histograma, ETAPA_REDIMENSIONAMENTO):
+            return codificadores_barras.rasterizar_padrao(padrao, width_px, height_px, keep_ratio)
+
+    # ------------------------------------------------------------------ #
+    #  Backend 2: python-barcode (não precisa de renderPM)                #
     # ------------------------------------------------------------------ #
     def _render_pybarcode(
-        self, dado: str, modelo: str, width_px: int, height_px: int, keep_ratio: bool
+        self, dado: str, modelo: str, width_px: int, height_px: int, keep_ratio: bool, histograma=None
     ) -> Image.Image:
-        import barcode
-        from barcode.writer import ImageWriter
-
-        nome_pb = _PYBARCODE_MAP.get(modelo)
-        if nome_pb is None:
-            raise ValueError(f"Modelo '{modelo}' não suportado pelo python-barcode.")
-
-        bc_class = barcode.get_barcode_class(nome_pb)
-        buf = io.BytesIO()
-        # options controlam tamanho mínimo; o resize final ajusta para o tamanho pedido
-        bc = bc_class(dado, writer=ImageWriter())
-        bc.write(buf, options={"write_text": True, "quiet_zone": 2})
-        buf.seek(0)
-        img = Image.open(buf).convert("RGB")
-        img = ImageResizer.resize_with_ratio(img, width_px, height_px, keep_ratio)
-        if modelo == "dun14":
-            img = self._aplicar_moldura_itf14(img)
+        from PIL import Image
+
+        bc_class, writer = self._escritor(self.BACKEND_PYBARCODE, modelo)
+        with medir_etapa(histograma, ETAPA_CODIFICACAO):
+            buf = io.BytesIO()
+            # options controlam tamanho mínimo; o resize final ajusta para o tamanho pedido
+            bc = bc_class(dado, writer=writer)
+            bc.write(buf, options={"write_text": True, "quiet_zone": 2})
+            buf.seek(0)
+            img = Image.open(buf)
+            img = img if img.mode == "L" else img.convert("L")
+        with medir_etapa(histograma, ETAPA_REDIMENSIONAMENTO):
+            img = ImageResizer.resize_with_ratio(img, width_px, height_px, keep_ratio)
+            if modelo == "dun14":
+                img = self._aplicar_moldura_itf14(img)
         return img
 
     @staticmethod
     def _aplicar_moldura_itf14(img: Image.Image) -> Image.Image:
         # ITF-14 costuma utilizar "bearer bars" (moldura) para melhorar leitura industrial.
+        from PIL import ImageDraw
+
         img_itf14 = img.copy()
         draw = ImageDraw.Draw(img_itf14)
         espessura = max(2, min(img_itf14.width, img_itf14.height) // 40)
@@ -137,29 +363,89 @@ class BarcodeRenderer:
         return img_itf14
 
     # ------------------------------------------------------------------ #
-    #  Backend 2: ReportLab renderPM (original — usado como fallback)     #
+    #  Backend 3: ReportLab renderPM (original — usado como fallback)     #
     # ------------------------------------------------------------------ #
     def _render_reportlab(
-        self, dado: str, modelo: str, width_px: int, height_px: int, keep_ratio: bool
+        self, dado: str, modelo: str, width_px: int, height_px: int, keep_ratio: bool, histograma=None
     ) -> Image.Image:
-        from reportlab.graphics import renderPM
+        from reportlab.lib.units import mm as rl_mm
+
+        criar_desenho, renderPM = self._escritor(self.BACKEND_REPORTLAB, modelo)
+        nome_reportlab = self.MODELOS_SUPORTADOS[modelo][1]
+        opcoes = {"value": dado}
+        if nome_reportlab != "ECC200DataMatrix":
+            opcoes.update({"barHeight": 20 * rl_mm, "barWidth": 0.45, "humanReadable": True})
+        with medir_etapa(histograma, ETAPA_CODIFICACAO):
+            desenho = criar_desenho(nome_reportlab, **opcoes)
+            img = renderPM.drawToPIL(desenho, dpi=self.dpi_padrao).convert("L")
+        with medir_etapa(histograma, ETAPA_REDIMENSIONAMENTO):
+            return ImageResizer.resize_with_ratio(img, width_px, height_px, keep_ratio)
+
+    # ------------------------------------------------------------------ #
+    #  Saída vetorial: widgets do reportlab direto no canvas do PDF       #
+    # ------------------------------------------------------------------ #
+    def _criar_desenho_reportlab(self, dado: str, modelo: str):
         from reportlab.graphics.barcode import createBarcodeDrawing
         from reportlab.lib.units import mm as rl_mm
 
         _rotulo, nome_reportlab = self.MODELOS_SUPORTADOS[modelo]
-        if nome_reportlab is None:
-            raise RuntimeError("Modelo sem backend reportlab dedicado; use backend ITF-14 via python-barcode.")
         opcoes = {"value": dado}
+        if modelo in ("dun14", "interleaved2of5"):
+            # Os dígitos já chegam completos (inclusive o verificador do DUN-14).
+            nome_reportlab = "I2of5"
+            opcoes.update({"checksum": 0, "bearerBox": modelo == "dun14"})
         if nome_reportlab != "ECC200DataMatrix":
             opcoes.update({"barHeight": 20 * rl_mm, "barWidth": 0.45, "humanReadable": True})
-        desenho = createBarcodeDrawing(nome_reportlab, **opcoes)
-        img = renderPM.drawToPIL(desenho, dpi=self.dpi_padrao).convert("RGB")
-        return ImageResizer.resize_with_ratio(img, width_px, height_px, keep_ratio)
+        return createBarcodeDrawing(nome_reportlab, **opcoes)
+
+    def simbolo_svg(self, dado: str, cfg) -> SimboloSvg:
+        """Código de barras vetorial para SVG, direto do padrão de módulos dos codificadores próprios."""
+        dado_limpo = dado.strip()
+        modelo = cfg.barcode_model or "code128"
+        if modelo not in self.MODELOS_SUPORTADOS:
+            raise RuntimeError(f"Modelo de código de barras não suportado: {modelo}")
+        self.validar_modelo(dado_limpo, modelo)
+
+        if modelo in codificadores_barras.MODELOS_MATRICIAIS:
+            try:
+                matriz = codificadores_barras.matriz_datamatrix(dado_limpo)
+            except ImportError as exc:
+                raise RuntimeError("Data Matrix requer 'reportlab'. Instale com: pip install reportlab") from exc
+            # Quiet zone de 1 módulo, como no raster.
+            vazia = [0] * (len(matriz[0]) + 2)
+            matriz = [vazia, *([0, *linha, 0] for linha in matriz), vazia]
+            return simbolo_qr(QRCodeRenderer.calcular_segmentos(matriz), len(matriz))
+        padrao = codificadores_barras.codificar(dado_limpo, modelo)
+        return simbolo_barras(padrao.modulos, padrao.texto, padrao.moldura, padrao.quiet_zone)
+
+    def desenhar_pdf(self, pdf, dado: str, cfg, x: float, y: float, largura: float, altura: float):
+        """Desenha o código de barras como vetor, escalado para a área do item."""
+        from reportlab.graphics import renderPDF
+
+        dado_limpo = dado.strip()
+        modelo = cfg.barcode_model or "code128"
+        if modelo not in self.MODELOS_SUPORTADOS:
+            raise RuntimeError(f"Modelo de código de barras não suportado: {modelo}")
+        self.validar_modelo(dado_limpo, modelo)
+
+        desenho = self._criar_desenho_reportlab(dado_limpo, modelo)
+        escala_x = largura / desenho.width
+        escala_y = altura / desenho.height
+        if cfg.keep_barcode_ratio:
+            escala_x = escala_y = min(escala_x, escala_y)
+            x += (largura - desenho.width * escala_x) / 2
+            y += (altura - desenho.height * escala_y) / 2
+
+        pdf.saveState()
+        pdf.translate(x, y)
+        pdf.scale(escala_x, escala_y)
+        renderPDF.draw(desenho, pdf, 0, 0)
+        pdf.restoreState()
 
     # ------------------------------------------------------------------ #
     #  Ponto de entrada público                                           #
     # ------------------------------------------------------------------ #
-    def render(self, dado: str, cfg) -> Image.Image:
+    def render(self, dado: str, cfg, histograma=None) -> Image.Image:
         width_px = self._cm_para_px(cfg.barcode_width_cm)
         height_px = self._cm_para_px(cfg.barcode_height_cm)
         dado_limpo = dado.strip()
@@ -169,18 +455,10 @@ class BarcodeRenderer:
             raise RuntimeError(f"Modelo de código de barras não suportado: {modelo}")
         self.validar_modelo(dado_limpo, modelo)
 
-        # Tenta python-barcode primeiro (não requer compilação nativa)
-        if modelo in _PYBARCODE_MAP:
-            try:
-                return self._render_pybarcode(dado_limpo, modelo, width_px, height_px, cfg.keep_barcode_ratio)
-            except Exception:
-                pass  # fallback abaixo
-
-        # Fallback: reportlab renderPM
-        try:
-            return self._render_reportlab(dado_limpo, modelo, width_px, height_px, cfg.keep_barcode_ratio)
-        except Exception as exc:
+        backend = self.resolver_backend(modelo)
+        if backend is None:
             raise RuntimeError(
                 "Geração de código de barras indisponível: instale 'python-barcode' "
                 "(pip install python-barcode[images]) ou habilite o backend renderPM do ReportLab."
-            ) from exc
+            )
+        return self.renderizar_com_backend(backend, dado_limpo, modelo, width_px, height_px, cfg.keep_barcode_ratio, histograma)
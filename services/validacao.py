@@ -0,0 +1,282 @@
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import compress, islice
+
+from services.histograma_etapas import ETAPA_IMPORTACAO, ETAPA_VALIDACAO, medir_etapa
+
+MOTIVO_VAZIO = "vazio"
+MOTIVO_TAMANHO = "tamanho_excedido"
+MOTIVO_CONTROLE = "caractere_controle"
+MOTIVO_FORMATO = "formato_modelo"
+MOTIVO_DIGITO = "digito_verificador"
+
+# Ordem de precedência quando uma linha viola mais de uma regra.
+MOTIVOS = (MOTIVO_VAZIO, MOTIVO_TAMANHO, MOTIVO_CONTROLE, MOTIVO_FORMATO, MOTIVO_DIGITO)
+
+
+@dataclass(frozen=True)
+class RegraModelo:
+    nome: str
+    mensagem: str
+    tamanhos: tuple[int, ...] | None = None
+    par: bool = False
+    mensagem_par: str = ""
+    # Comprimento em que o último dígito é o verificador GS1 (módulo 10).
+    verificador_em: int | None = None
+
+
+REGRAS_MODELOS = {
+    "ean13": RegraModelo("EAN-13", "EAN-13 exige apenas dígitos com 12 ou 13 caracteres.", (12, 13), verificador_em=13),
+    "ean8": RegraModelo("EAN-8", "EAN-8 exige apenas dígitos com 7 ou 8 caracteres.", (7, 8), verificador_em=8),
+    "upca": RegraModelo("UPC-A", "UPC-A exige apenas dígitos com 11 ou 12 caracteres.", (11, 12), verificador_em=12),
+    "dun14": RegraModelo("DUN-14", "DUN-14 exige exatamente 14 dígitos numéricos.", (14,), verificador_em=14),
+    "interleaved2of5": RegraModelo(
+        "Intercalado 2 de 5",
+        "Intercalado 2 de 5 exige apenas dígitos.",
+        par=True,
+        mensagem_par="Intercalado 2 de 5 exige quantidade par de dígitos.",
+    ),
+}
+
+
+def somente_digitos(dado: str) -> bool:
+    return dado.isascii() and dado.isdigit()
+
+
+def digito_verificador_gs1(digitos: str) -> int:
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) for i, d in enumerate(reversed(digitos)))
+    return (10 - total % 10) % 10
+
+
+def validar_dado_modelo(dado: str, modelo: str):
+    """Valida um único dado contra as regras do modelo; levanta ValueError com a mensagem da regra."""
+    regra = REGRAS_MODELOS.get(modelo)
+    if regra is None:
+        return
+    if not somente_digitos(dado) or (regra.tamanhos and len(dado) not in regra.tamanhos):
+        raise ValueError(regra.mensagem)
+    if regra.par and len(dado) % 2 != 0:
+        raise ValueError(regra.mensagem_par)
+    if regra.verificador_em == len(dado) and digito_verificador_gs1(dado[:-1]) != int(dado[-1]):
+        raise ValueError(f"{regra.nome}: dígito verificador inválido.")
+
+
+@dataclass
+class RelatorioValidacao:
+    """Resultado da validação de uma coluna: valores aceitos e linhas rejeitadas por motivo."""
+
+    validos: list[str]
+    rejeitados: dict[str, list[int]] = field(default_factory=dict)
+
+    @property
+    def invalidos(self) -> int:
+        return sum(len(linhas) for linhas in self.rejeitados.values())
+
+    def resumo(self) -> dict[str, int]:
+        return {motivo: len(linhas) for motivo, linhas in self.rejeitados.items() if linhas}
+
+
+def _motivo_item(dado: str, cfg) -> str | None:
+    if not dado or not dado.strip():
+        return MOTIVO_VAZIO
+    if len(dado) > cfg.max_tamanho_dado:
+        return MOTIVO_TAMANHO
+    if cfg.tipo_codigo != "barcode":
+        return None
+    if any(ord(ch) < 32 for ch in dado):
+        return MOTIVO_CONTROLE
+    limpo = dado.strip()
+    regra = REGRAS_MODELOS.get(cfg.barcode_model)
+    if regra is None:
+        return None
+    if not somente_digitos(limpo) or (regra.tamanhos and len(limpo) not in regra.tamanhos):
+        return MOTIVO_FORMATO
+    if regra.par and len(limpo) % 2 != 0:
+        return MOTIVO_FORMATO
+    if regra.verificador_em == len(limpo) and digito_verificador_gs1(limpo[:-1]) != int(limpo[-1]):
+        return MOTIVO_DIGITO
+    return None
+
+
+def _validar_iterativo(valores, cfg) -> RelatorioValidacao:
+    validos = []
+    rejeitados = {motivo: [] for motivo in MOTIVOS}
+    for linha, bruto in enumerate(valores):
+        dado = f"{cfg.prefixo}{bruto}{cfg.sufixo}" if cfg.modo == "numerico" else str(bruto)
+        motivo = _motivo_item(dado, cfg)
+        if motivo is None:
+            validos.append(str(bruto))
+        else:
+            rejeitados[motivo].append(linha)
+    return RelatorioValidacao(validos, {m: linhas for m, linhas in rejeitados.items() if linhas})
+
+
+# Linhas por matriz de code points: limita a memória quando a coluna é longa.
+_LINHAS_POR_MATRIZ = 65536
+
+
+def _matriz_codigos(textos, np, largura: int):
+    """Code points em largura fixa ``(linhas, largura)``: textos longos são cortados e os curtos completados com 0."""
+    return np.array(textos, dtype=f"<U{largura}").view(np.uint32).reshape(len(textos), largura)
+
+
+def _analisar_digitos(textos, comprimentos, np, largura: int, verificador_em: int | None):
+    """Máscaras (só dígitos 0-9, verificador GS1 inválido) tiradas da matriz de code points.
+
+    Uma linha só conta como numérica se não for vazia e couber em ``largura``;
+    o verificador só é conferido nas linhas numéricas com ``verificador_em`` dígitos.
+    """
+    numerico = np.zeros(len(textos), dtype=bool)
+    verificador = np.zeros(len(textos), dtype=bool)
+    colunas = np.arange(largura)
+    for inicio in range(0, len(textos), _LINHAS_POR_MATRIZ):
+        fim = inicio + _LINHAS_POR_MATRIZ
+        codigos = _matriz_codigos(textos[inicio:fim], np, largura)
+        tamanhos = comprimentos[inicio:fim]
+        # Posições além do comprimento são o preenchimento (0) e não contam.
+        digitos = ((codigos >= 48) & (codigos <= 57)) | (colunas >= tamanhos[:, None])
+        bloco = digitos.all(axis=1) & (tamanhos > 0) & (tamanhos <= largura)
+        numerico[inicio:fim] = bloco
+        if verificador_em and verificador_em <= largura:
+            linhas = np.flatnonzero(bloco & (tamanhos == verificador_em))
+            valores = codigos[linhas, :verificador_em].astype(np.int64) - 48
+            pesos = np.where(np.arange(verificador_em - 1)[::-1] % 2 == 0, 3, 1)
+            esperado = (10 - (valores[:, :-1] @ pesos) % 10) % 10
+            verificador[inicio + linhas] = esperado != valores[:, -1]
+    return numerico, verificador
+
+
+def validar_coluna(valores, cfg) -> RelatorioValidacao:
+    """Valida a coluna inteira com máscaras NumPy.
+
+    Aplica prefixo/sufixo, limites de tamanho, caracteres de controle e as regras
+    de dígitos/comprimento/paridade/verificador do modelo de código de barras.
+    Dígitos e verificador saem de uma matriz de code points de largura fixa, sem
+    regex nem métodos ``.str`` do pandas; só as linhas que não são puramente
+    numéricas passam pelas checagens em Python (vazio, controle, ``strip``).
+    Sem NumPy disponível, cai para a validação item a item com o mesmo resultado.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return _validar_iterativo(valores, cfg)
+
+    brutos = list(map(str, valores))
+    dados = [f"{cfg.prefixo}{bruto}{cfg.sufixo}" for bruto in brutos] if cfg.modo == "numerico" else brutos
+    total = len(dados)
+    tamanhos = np.fromiter(map(len, dados), dtype=np.int64, count=total)
+    vazio = controle = formato = digito = np.zeros(total, dtype=bool)
+    regra = REGRAS_MODELOS.get(cfg.barcode_model) if cfg.tipo_codigo == "barcode" else None
+
+    if regra is None or not total:
+        vazio = (tamanhos == 0) | np.fromiter(map(str.isspace, dados), dtype=bool, count=total)
+        if cfg.tipo_codigo == "barcode":
+            # isprintable() descarta a maioria das linhas sem olhar caractere a caractere.
+            controle = ~np.fromiter(map(str.isprintable, dados), dtype=bool, count=total)
+            for linha in np.flatnonzero(controle):
+                controle[linha] = any(ch < " " for ch in dados[linha])
+    else:
+        # Linhas mais longas que a largura já falham pelo tamanho do modelo ou pelo limite do dado.
+        largura = max(regra.tamanhos) if regra.tamanhos else min(int(tamanhos.max()), cfg.max_tamanho_dado)
+        largura = max(1, largura)
+        numerico, digito = _analisar_digitos(dados, tamanhos, np, largura, regra.verificador_em)
+        comprimentos = tamanhos.copy()
+        # Linha só de dígitos não é vazia nem tem controle ou espaços a remover; as
+        # demais (poucas em dados reais) são checadas em Python e reanalisadas sem espaços.
+        suspeitas = np.flatnonzero(~numerico)
+        if len(suspeitas):
+            textos = [dados[linha] for linha in suspeitas]
+            vazio = np.zeros(total, dtype=bool)
+            vazio[suspeitas] = [not texto or texto.isspace() for texto in textos]
+            controle = np.zeros(total, dtype=bool)
+            controle[suspeitas] = [any(ch < " " for ch in texto) for texto in textos]
+            limpos = [texto.strip() for texto in textos]
+            comprimentos[suspeitas] = list(map(len, limpos))
+            numerico[suspeitas], digito[suspeitas] = _analisar_digitos(
+                limpos, comprimentos[suspeitas], np, largura, regra.verificador_em
+            )
+        formato = ~numerico
+        if regra.tamanhos:
+            formato |= ~np.isin(comprimentos, regra.tamanhos)
+        if regra.par:
+            formato |= comprimentos % 2 != 0
+    condicoes = [vazio, tamanhos > cfg.max_tamanho_dado, controle, formato, digito & ~formato]
+
+    codigo_motivo = np.select(condicoes, list(range(1, len(MOTIVOS) + 1)), default=0)
+    aceitos = codigo_motivo == 0
+    rejeitados = {}
+    for indice, motivo in enumerate(MOTIVOS, start=1):
+        linhas = np.flatnonzero(codigo_motivo == indice)
+        if len(linhas):
+            rejeitados[motivo] = linhas.tolist()
+    return RelatorioValidacao(list(compress(brutos, aceitos.tolist())), rejeitados)
+
+
+class ValidacaoEmFluxo:
+    """Valida a coluna bloco a bloco enquanto ela é consumida, com memória limitada.
+
+    Iterar entrega apenas os valores aceitos, na ordem de entrada. Ao final, as
+    contagens por motivo ficam disponíveis; as linhas rejeitadas guardadas por
+    motivo são limitadas a ``max_linhas_por_motivo`` para não crescer com o lote.
+    Com ``histograma``, cada bloco registra o tempo de leitura da fonte
+    (importação) separado do tempo de validação.
+    """
+
+    def __init__(
+        self,
+        valores,
+        cfg,
+        tamanho_bloco: int = 8192,
+        max_linhas_por_motivo: int = 1000,
+        total_estimado=None,
+        histograma=None,
+    ):
+        self._valores = iter(valores)
+        self.cfg = cfg
+        self.tamanho_bloco = max(1, int(tamanho_bloco))
+        self.max_linhas_por_motivo = max(0, int(max_linhas_por_motivo))
+        self.total_estimado = total_estimado
+        self.histograma = histograma
+        self.lidos = 0
+        self.aceitos = 0
+        self.contagem = {}
+        self.rejeitados = {}
+        self._pendentes = deque()
+        self._esgotado = False
+
+    @property
+    def invalidos(self) -> int:
+        return sum(self.contagem.values())
+
+    def resumo(self) -> dict[str, int]:
+        return dict(self.contagem)
+
+    def _validar_proximo_bloco(self) -> bool:
+        with medir_etapa(self.histograma, ETAPA_IMPORTACAO):
+            bloco = list(islice(self._valores, self.tamanho_bloco))
+        if not bloco:
+            self._esgotado = True
+            return False
+        with medir_etapa(self.histograma, ETAPA_VALIDACAO):
+            relatorio = validar_coluna(bloco, self.cfg)
+        for motivo, linhas in relatorio.rejeitados.items():
+            self.contagem[motivo] = self.contagem.get(motivo, 0) + len(linhas)
+            guardadas = self.rejeitados.setdefault(motivo, [])
+            espaco = self.max_linhas_por_motivo - len(guardadas)
+            if espaco > 0:
+                guardadas.extend(self.lidos + linha for linha in linhas[:espaco])
+        self.lidos += len(bloco)
+        self._pendentes.extend(relatorio.validos)
+        return True
+
+    def tem_validos(self) -> bool:
+        """Lê blocos só até achar o primeiro valor aceito (que continua disponível na iteração)."""
+        while not self._pendentes and not self._esgotado:
+            self._validar_proximo_bloco()
+        return bool(self._pendentes)
+
+    def __iter__(self):
+        while self._pendentes or self._validar_proximo_bloco():
+            while self._pendentes:
+                self.aceitos += 1
+                yield self._pendentes.popleft()
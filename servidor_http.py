@@ -0,0 +1,426 @@
+"""Servidor HTTP local de renderização (não importa o Tk).
+
+Exemplos::
+
+    python servidor_http.py --porta 8765 --workers 4
+    curl "http://127.0.0.1:8765/render?dado=ABC123&formato=svg" -o abc.svg
+    curl -X POST http://127.0.0.1:8765/batch -d '{"dados": ["A1", "B2"], "formato": "pdf"}' -o etiquetas.pdf
+
+Rotas:
+
+* ``GET /health`` — estado das faixas, do cache e do pool, em JSON.
+* ``GET /render?dado=...`` ou ``POST /render`` com ``{"dado": ...}`` — um código em PNG, WebP, SVG ou PDF.
+* ``POST /batch`` com ``{"dados": [...]}`` — vários códigos num ZIP de imagens ou num PDF.
+
+As opções usam os nomes do CLI (``tipo``, ``modelo``, ``modo``, ``prefixo``,
+``sufixo``, ``largura_cm``, ``altura_cm``, ``cor``, ``fundo``, ``sem_proporcao``,
+``pdf_vetorial``, ``max_tamanho_dado``, ``codificacao``, ``nivel_compressao``), na query
+string ou no corpo JSON.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from argparse import Namespace
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from app_controller import AppController
+from cli import TAMANHOS_PADRAO_CM, criar_parser, montar_config
+from models.geracao_config import GeracaoConfig
+from services.codificacao_imagem import PERFIS_CODIFICACAO, obter_perfil
+from services.histograma_etapas import HistogramaEtapas
+
+FORMATOS_UNITARIOS = {"png": "image/png", "webp": "image/webp", "svg": "image/svg+xml", "pdf": "application/pdf"}
+FORMATOS_LOTE = {"zip": "application/zip", "pdf": "application/pdf"}
+MAX_CORPO_BYTES = 8 * 1024 * 1024
+
+# Mesmos padrões do CLI; cada requisição sobrescreve só as opções que enviar.
+_ARGS_PADRAO = criar_parser().parse_args(["-", "--saida", "-"])
+
+
+def _booleano(valor) -> bool:
+    if isinstance(valor, bool):
+        return valor
+    return str(valor).strip().lower() in {"1", "true", "sim", "yes", "on"}
+
+
+_OPCOES_CONFIG = {
+    "tipo": str,
+    "modelo": str,
+    "modo": str,
+    "prefixo": str,
+    "sufixo": str,
+    "largura_cm": float,
+    "altura_cm": float,
+    "cor": str,
+    "fundo": str,
+    "sem_proporcao": _booleano,
+    "pdf_vetorial": _booleano,
+    "codificacao": str,
+    "nivel_compressao": int,
+    "max_tamanho_dado": int,
+}
+
+
+class FaixaOcupada(Exception):
+    """Todas as vagas da faixa continuaram ocupadas durante a espera máxima."""
+
+
+class RequisicaoInvalida(Exception):
+    def __init__(self, status: int, mensagem: str, **detalhes):
+        super().__init__(mensagem)
+        self.status = status
+        self.corpo = {"error": mensagem, **detalhes}
+
+
+@dataclass
+class RespostaRender:
+    tipo_conteudo: str
+    conteudo: bytes = b""
+    caminho: str | None = None
+    cabecalhos: dict = field(default_factory=dict)
+
+
+class FaixaExecucao:
+    """Limita quantas requisições de uma faixa renderizam ao mesmo tempo.
+
+    Cada faixa tem vagas próprias: lotes grandes esgotam só a faixa de lote e
+    nunca ocupam as vagas das requisições interativas. Quem não consegue vaga
+    em ``espera_max_s`` recebe ``FaixaOcupada`` (HTTP 503) em vez de enfileirar sem limite.
+    """
+
+    def __init__(self, nome: str, vagas: int, espera_max_s: float = 5.0):
+        self.nome = nome
+        self.vagas = max(1, int(vagas))
+        self.espera_max_s = max(0.0, float(espera_max_s))
+        self._semaforo = threading.BoundedSemaphore(self.vagas)
+        self._lock = threading.Lock()
+        self.em_uso = 0
+        self.atendidas = 0
+        self.recusadas = 0
+
+    @contextmanager
+    def ocupar(self):
+        if not self._semaforo.acquire(timeout=self.espera_max_s):
+            with self._lock:
+                self.recusadas += 1
+            raise FaixaOcupada(f"Faixa '{self.nome}' sem vagas; tente novamente.")
+        with self._lock:
+            self.em_uso += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.em_uso -= 1
+                self.atendidas += 1
+            self._semaforo.release()
+
+    def estado(self) -> dict:
+        with self._lock:
+            return {"vagas": self.vagas, "em_uso": self.em_uso, "atendidas": self.atendidas, "recusadas": self.recusadas}
+
+
+class ServicoRender:
+    """Atende as requisições com um único ``AppController`` aquecido e compartilhado.
+
+    Requisições unitárias renderizam na própria thread da conexão, usando o
+    cache de render; lotes usam o ``Exportador`` (e o pool de processos nos
+    lotes grandes). O cache e o pool sobrevivem entre requisições.
+    """
+
+    def __init__(
+        self,
+        controller: AppController,
+        vagas_interativas: int = 4,
+        vagas_lote: int = 1,
+        espera_max_s: float = 5.0,
+        max_itens_lote: int = 5000,
+    ):
+        self.controller = controller
+        self.interativa = FaixaExecucao("interativa", vagas_interativas, espera_max_s)
+        self.lote = FaixaExecucao("lote", vagas_lote, espera_max_s)
+        self.max_itens_lote = max(1, int(max_itens_lote))
+        self.cancelar_evento = threading.Event()
+
+    @staticmethod
+    def montar_config(opcoes: dict) -> GeracaoConfig:
+        args = Namespace(**vars(_ARGS_PADRAO))
+        try:
+            for chave, conversor in _OPCOES_CONFIG.items():
+                if opcoes.get(chave) is not None:
+                    setattr(args, chave, conversor(opcoes[chave]))
+        except (TypeError, ValueError) as exc:
+            raise RequisicaoInvalida(400, f"Opção inválida: {exc}") from exc
+        if args.tipo not in TAMANHOS_PADRAO_CM:
+            raise RequisicaoInvalida(400, f"Tipo de código não suportado: {args.tipo}")
+        if args.modo not in ("texto", "numerico"):
+            raise RequisicaoInvalida(400, f"Modo não suportado: {args.modo}")
+        if args.codificacao not in PERFIS_CODIFICACAO:
+            raise RequisicaoInvalida(400, f"Codificação não suportada: {args.codificacao}", supported=sorted(PERFIS_CODIFICACAO))
+        if not 0 <= args.nivel_compressao <= 9:
+            raise RequisicaoInvalida(400, "nivel_compressao deve estar entre 0 e 9.")
+        return montar_config(args)
+
+    @staticmethod
+    def _formato(opcoes: dict, suportados: dict, padrao: str) -> str:
+        formato = str(opcoes.get("formato") or padrao).lower()
+        if formato not in suportados:
+            raise RequisicaoInvalida(400, f"Formato não suportado: {formato}", supported=sorted(suportados))
+        return formato
+
+    def renderizar_um(self, opcoes: dict) -> RespostaRender:
+        formato = self._formato(opcoes, FORMATOS_UNITARIOS, "png")
+        valor = opcoes.get("dado")
+        if not isinstance(valor, str) or not valor:
+            raise RequisicaoInvalida(400, "Informe 'dado' com o conteúdo do código.")
+        cfg = self.montar_config(opcoes)
+        with self.interativa.ocupar():
+            codigos = self.controller.validar_em_fluxo([valor], cfg, total_estimado=1)
+            aceitos = list(codigos)
+            if not aceitos:
+                raise RequisicaoInvalida(422, "Dado rejeitado pela validação de entrada.", rejected=codigos.resumo())
+            dado = self.controller.normalizar_dado(aceitos[0], cfg)
+            if formato in ("png", "webp"):
+                # O formato pedido manda; 'codificacao' só escolhe entre as variantes de PNG.
+                if formato == "webp" or obter_perfil(cfg.perfil_codificacao).formato != "PNG":
+                    cfg = replace(cfg, perfil_codificacao=formato)
+                conteudo = self.controller.codificar_imagem(self.controller.gerar_imagem_obj(dado, cfg), cfg)
+            elif formato == "svg":
+                conteudo = self.controller.codificar_svg(dado, cfg)
+            else:
+                with tempfile.TemporaryDirectory(prefix="qrgen-http-") as diretorio:
+                    caminho = os.path.join(diretorio, "codigo.pdf")
+                    self.controller.criar_exportador(cancelar_evento=self.cancelar_evento).gerar_pdf(aceitos, caminho, cfg)
+                    with open(caminho, "rb") as f:
+                        conteudo = f.read()
+        return RespostaRender(FORMATOS_UNITARIOS[formato], conteudo=conteudo)
+
+    def renderizar_lote(self, opcoes: dict, diretorio: str) -> RespostaRender:
+        """Grava o lote em ``diretorio`` (temporário, de quem chama) e devolve o caminho do arquivo."""
+        formato = self._formato(opcoes, FORMATOS_LOTE, "zip")
+        dados = opcoes.get("dados")
+        if not isinstance(dados, list) or not dados or not all(isinstance(d, str) for d in dados):
+            raise RequisicaoInvalida(400, "Informe 'dados' como uma lista não vazia de textos.")
+        if len(dados) > self.max_itens_lote:
+            raise RequisicaoInvalida(413, f"Lote acima do limite de {self.max_itens_lote} itens.", limit=self.max_itens_lote)
+        cfg = self.montar_config(opcoes)
+        histograma = HistogramaEtapas()
+        caminho = os.path.join(diretorio, f"lote.{formato}")
+        with self.lote.ocupar():
+            codigos = self.controller.validar_em_fluxo(dados, cfg, total_estimado=len(dados), histograma=histograma)
+            if not codigos.tem_validos():
+                raise RequisicaoInvalida(422, "Todos os dados foram rejeitados pela validação de entrada.", rejected=codigos.resumo())
+            exportador = self.controller.criar_exportador(cancelar_evento=self.cancelar_evento)
+            inicio = time.perf_counter()
+            status, erro = "completed", ""
+            processados, backend = 0, ""
+            try:
+                backend = self.controller.iniciar_job(cfg)
+                processados = exportador.exportar(codigos, formato, caminho, cfg, histograma=histograma)
+            except Exception as exc:
+                status, erro = "error", str(exc)
+                raise
+            finally:
+                self.controller.metrics_store.record_run(
+                    formato=formato,
+                    status=status,
+                    total_entradas=codigos.lidos,
+                    total_invalidos=codigos.invalidos,
+                    total_processado=processados,
+                    duracao_s=time.perf_counter() - inicio,
+                    erro=erro,
+                    histograma=histograma,
+                    backend=backend,
+                )
+        return RespostaRender(
+            FORMATOS_LOTE[formato],
+            caminho=caminho,
+            cabecalhos={
+                "X-Qrgen-Processed": str(processados),
+                "X-Qrgen-Invalid": str(codigos.invalidos),
+                "X-Qrgen-Rejected": json.dumps(codigos.resumo(), ensure_ascii=True),
+            },
+        )
+
+    def estado(self) -> dict:
+        return {
+            "status": "ok",
+            "workers": self.controller.render_workers,
+            "lanes": {"interativa": self.interativa.estado(), "lote": self.lote.estado()},
+            "cache": self.controller.estatisticas_cache(),
+        }
+
+
+class ManipuladorRender(BaseHTTPRequestHandler):
+    # HTTP/1.1 mantém a conexão aberta entre requisições (toda resposta leva Content-Length).
+    protocol_version = "HTTP/1.1"
+    server_version = "qrgen"
+    # Conexões keep-alive ociosas por mais que isso são fechadas.
+    timeout = 30
+
+    @property
+    def servico(self) -> ServicoRender:
+        return self.server.servico
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            self._responder_json(200, self.servico.estado())
+        elif url.path == "/render":
+            opcoes = {chave: valores[-1] for chave, valores in parse_qs(url.query, keep_blank_values=True).items()}
+            self._atender(lambda: self.servico.renderizar_um(opcoes))
+        else:
+            self._responder_json(404, {"error": f"Rota não encontrada: {url.path}"})
+
+    def do_POST(self):
+        rota = urlsplit(self.path).path
+        if rota not in ("/render", "/batch"):
+            self._descartar_corpo()
+            self._responder_json(404, {"error": f"Rota não encontrada: {rota}"})
+            return
+        try:
+            opcoes = self._ler_json()
+        except RequisicaoInvalida as exc:
+            self._responder_json(exc.status, exc.corpo)
+            return
+        if rota == "/render":
+            self._atender(lambda: self.servico.renderizar_um(opcoes))
+            return
+        with tempfile.TemporaryDirectory(prefix="qrgen-http-") as diretorio:
+            self._atender(lambda: self.servico.renderizar_lote(opcoes, diretorio))
+
+    def _tamanho_corpo(self) -> int:
+        try:
+            return max(0, int(self.headers.get("Content-Length") or 0))
+        except ValueError:
+            return 0
+
+    def _descartar_corpo(self):
+        tamanho = self._tamanho_corpo()
+        if tamanho > MAX_CORPO_BYTES:
+            self.close_connection = True
+        elif tamanho:
+            self.rfile.read(tamanho)
+
+    def _ler_json(self) -> dict:
+        tamanho = self._tamanho_corpo()
+        if tamanho > MAX_CORPO_BYTES:
+            # Não lê o corpo: a conexão é fechada para não consumir o excesso.
+            self.close_connection = True
+            raise RequisicaoInvalida(413, f"Corpo acima de {MAX_CORPO_BYTES} bytes.")
+        try:
+            corpo = json.loads(self.rfile.read(tamanho) or b"{}")
+        except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+            raise RequisicaoInvalida(400, f"JSON inválido: {exc}") from exc
+        if not isinstance(corpo, dict):
+            raise RequisicaoInvalida(400, "O corpo deve ser um objeto JSON.")
+        return corpo
+
+    def _atender(self, gerar):
+        inicio = time.perf_counter()
+        try:
+            resposta = gerar()
+        except RequisicaoInvalida as exc:
+            self._responder_json(exc.status, exc.corpo)
+        except FaixaOcupada as exc:
+            self._responder_json(503, {"error": str(exc)}, {"Retry-After": "1"})
+        except ValueError as exc:
+            self._responder_json(400, {"error": str(exc)})
+        except Exception as exc:
+            self.servico.controller.logger.exception(
+                "Falha no servidor HTTP", extra={"event": "http_error", "operation": self.path, "erro": str(exc)}
+            )
+            self._responder_json(500, {"error": str(exc)})
+        else:
+            self._enviar(200, resposta)
+            self.servico.controller.logger.info(
+                "Requisição HTTP atendida",
+                extra={"event": "http_request", "operation": self.path.split("?", 1)[0], "duracao_s": round(time.perf_counter() - inicio, 4)},
+            )
+
+    def _responder_json(self, status: int, corpo: dict, cabecalhos: dict | None = None):
+        conteudo = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self._enviar(status, RespostaRender("application/json; charset=utf-8", conteudo=conteudo, cabecalhos=cabecalhos or {}))
+
+    def _enviar(self, status: int, resposta: RespostaRender):
+        tamanho = os.path.getsize(resposta.caminho) if resposta.caminho else len(resposta.conteudo)
+        self.send_response(status)
+        self.send_header("Content-Type", resposta.tipo_conteudo)
+        self.send_header("Content-Length", str(tamanho))
+        for nome, valor in resposta.cabecalhos.items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        if resposta.caminho:
+            # Lotes são enviados do arquivo temporário, sem carregar tudo na memória.
+            with open(resposta.caminho, "rb") as f:
+                shutil.copyfileobj(f, self.wfile)
+        else:
+            self.wfile.write(resposta.conteudo)
+
+    def log_message(self, formato, *args):
+        # O acesso já vai para o log estruturado em _atender; evita poluir o stderr.
+        pass
+
+
+class ServidorRender(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, endereco, servico: ServicoRender):
+        self.servico = servico
+        super().__init__(endereco, ManipuladorRender)
+
+    def shutdown(self):
+        # Interrompe lotes em andamento entre itens em vez de esperar que terminem.
+        self.servico.cancelar_evento.set()
+        super().shutdown()
+
+
+def criar_parser_servidor() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="qrgen-server", description="Servidor HTTP local de renderização de códigos.")
+    parser.add_argument("--host", default="127.0.0.1", help="endereço de escuta (padrão: só a máquina local)")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("-w", "--workers", type=int, help="processos de renderização dos lotes (padrão: QRGEN_WORKERS ou um por núcleo)")
+    parser.add_argument("--vagas-interativas", type=int, default=4, help="requisições unitárias renderizando ao mesmo tempo")
+    parser.add_argument("--vagas-lote", type=int, default=1, help="lotes renderizando ao mesmo tempo")
+    parser.add_argument("--espera-max", type=float, default=5.0, help="segundos aguardando vaga antes de responder 503")
+    parser.add_argument("--max-itens-lote", type=int, default=5000)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = criar_parser_servidor().parse_args(argv)
+    controller = AppController.build_default(workers=args.workers)
+    servico = ServicoRender(
+        controller,
+        vagas_interativas=args.vagas_interativas,
+        vagas_lote=args.vagas_lote,
+        espera_max_s=args.espera_max,
+        max_itens_lote=args.max_itens_lote,
+    )
+    controller.aquecer_render_pool()
+    servidor = ServidorRender((args.host, args.porta), servico)
+    host, porta = servidor.server_address[:2]
+    controller.logger.info("Servidor HTTP iniciado", extra={"event": "http_start", "path": f"http://{host}:{porta}"})
+    print(f"Servindo em http://{host}:{porta} (Ctrl+C para encerrar)", file=sys.stderr)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servico.cancelar_evento.set()
+        servidor.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())